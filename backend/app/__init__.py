@@ -1,6 +1,7 @@
 from flask import Flask
 from flask_cors import CORS
 import os
+import tempfile
 
 def create_app():
     app = Flask(__name__)
@@ -11,8 +12,16 @@ def create_app():
     # Load configuration
     app.config.from_mapping(
         SECRET_KEY=os.environ.get('SECRET_KEY', 'dev_key'),
+        # Uploads wait here until a background job has processed them
+        UPLOAD_FOLDER=os.environ.get('UPLOAD_FOLDER', os.path.join(tempfile.gettempdir(), 'gradeassist-uploads')),
+        # Load the sample assignments into an empty database
+        SEED_DATABASE=os.environ.get('SEED_DATABASE', '1') != '0',
     )
     
+    # Create indexes (and sample data) before serving requests
+    from .models import database
+    database.init_db(app)
+    
     # Register blueprints
     from .api import routes as api_routes
     app.register_blueprint(api_routes.bp)
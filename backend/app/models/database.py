@@ -1 +1,144 @@
 # Database connection and models
+import os
+import threading
+import time
+from pymongo import ASCENDING, MongoClient, ReturnDocument
+
+# mongodb://host:port/db for a MongoDB server, mongomock://localhost/db for an in-memory database
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/gradeassist')
+# Connections kept open to the server; requests borrow one and hand it back when done
+MONGO_POOL_SIZE = int(os.environ.get('MONGO_POOL_SIZE', '50'))
+MONGO_TIMEOUT_MS = int(os.environ.get('MONGO_TIMEOUT_MS', '5000'))
+DEFAULT_DATABASE = 'gradeassist'
+
+# Fields read when listing assignments, so the question bodies never leave the database
+ASSIGNMENT_SUMMARY_FIELDS = ('id', 'title', 'description', 'questionCount', 'totalPoints', 'createdAt')
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def create_client(uri=MONGO_URI):
+    """A client for the URI; mongomock:// URIs get an in-memory database (no server needed)"""
+    if uri.startswith('mongomock://'):
+        import mongomock
+        return mongomock.MongoClient('mongodb://' + uri[len('mongomock://'):])
+    return MongoClient(uri, maxPoolSize=MONGO_POOL_SIZE, serverSelectionTimeoutMS=MONGO_TIMEOUT_MS, connect=False)
+
+
+def get_client():
+    """The process-wide client, created on first use; its connection pool is shared by all requests"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = create_client()
+        return _client
+
+
+def get_db():
+    return get_client().get_default_database(DEFAULT_DATABASE)
+
+
+def projection(fields=None):
+    """Projection returning only `fields` (every field when None), without Mongo's _id"""
+    if fields is None:
+        return {'_id': 0}
+    return {**{field: 1 for field in fields}, '_id': 0}
+
+
+def ensure_indexes(db):
+    """Create the indexes behind every lookup the API makes; a no-op when they already exist"""
+    db.assignments.create_index([('id', ASCENDING)], unique=True, name='assignment_id')
+    db.submissions.create_index([('id', ASCENDING)], unique=True, name='submission_id')
+    db.submissions.create_index([('assignmentId', ASCENDING)], name='submission_assignment_id')
+
+
+def seed(db):
+    """Add the sample assignments that are missing from the database"""
+    from .seed import assignments, assignment_details
+
+    created_at = {assignment['id']: assignment['createdAt'] for assignment in assignments}
+    inserted = False
+    for assignment_id, assignment in assignment_details.items():
+        document = dict(assignment, questionCount=len(assignment['questions']),
+                        createdAt=created_at.get(assignment_id), revision=1)
+        result = db.assignments.update_one({'id': assignment_id}, {'$setOnInsert': document}, upsert=True)
+        inserted = inserted or result.upserted_id is not None
+    if inserted:
+        bump_assignments_revision(db)
+
+
+def init_db(app):
+    """Prepare the database for the app: indexes, and the sample data unless SEED_DATABASE is off"""
+    db = get_db()
+    ensure_indexes(db)
+    if app.config.get('SEED_DATABASE', True):
+        seed(db)
+
+
+def assignments_revision(db=None):
+    """Counter bumped on every write to the assignments; unchanged means every listing is unchanged"""
+    document = (db or get_db()).revisions.find_one({'_id': 'assignments'})
+    return document['revision'] if document else 0
+
+
+def bump_assignments_revision(db=None):
+    """Record a write to the assignments; call after the write itself"""
+    (db or get_db()).revisions.update_one({'_id': 'assignments'}, {'$inc': {'revision': 1}}, upsert=True)
+
+
+def list_assignments(fields=ASSIGNMENT_SUMMARY_FIELDS, after=None, limit=None):
+    """Assignments ordered by ID, reading only the given fields
+
+    Args:
+        fields: Fields to read
+        after: Only assignments whose ID sorts after this one (the previous page's last ID)
+        limit: Maximum number of assignments to return
+    """
+    query = {} if after is None else {'id': {'$gt': after}}
+    cursor = get_db().assignments.find(query, projection(fields)).sort('id', ASCENDING)
+    if limit is not None:
+        cursor = cursor.limit(limit)
+    return list(cursor)
+
+
+def find_assignment(assignment_id, fields=None):
+    """One assignment (None if it does not exist), reading only the given fields"""
+    return get_db().assignments.find_one({'id': assignment_id}, projection(fields))
+
+
+def assignment_revision(assignment_id):
+    """Revision of an assignment (bumped on every edit), or None if it does not exist"""
+    document = get_db().assignments.find_one({'id': assignment_id}, {'_id': 0, 'revision': 1})
+    return None if document is None else document.get('revision', 0)
+
+
+def update_assignment(assignment_id, changes):
+    """Set the given fields and bump the revision; returns the updated assignment, or None if it does not exist"""
+    changes = dict(changes)
+    if 'questions' in changes:
+        changes['questionCount'] = len(changes['questions'])
+    assignment = get_db().assignments.find_one_and_update(
+        {'id': assignment_id},
+        {'$set': changes, '$inc': {'revision': 1}},
+        projection=projection(),
+        return_document=ReturnDocument.AFTER
+    )
+    if assignment is not None:
+        bump_assignments_revision()
+    return assignment
+
+
+def save_grades(submission_id, assignment_id, grades, total_score, max_score):
+    """Store the grades of a submission, replacing earlier grading runs"""
+    get_db().submissions.update_one(
+        {'id': submission_id},
+        {'$set': {
+            'assignmentId': assignment_id,
+            'grades': grades,
+            'totalScore': total_score,
+            'maxScore': max_score,
+            'gradedAt': time.time()
+        }},
+        upsert=True
+    )
@@ -1 +1,86 @@
 # AI Service for generating rubrics and grading submissions
+import copy
+import os
+
+# Stages of process_document, in order, as reported in job progress
+DOCUMENT_STAGES = ('ocr', 'extract-questions', 'generate-rubrics')
+
+# Until the OCR and Claude pipeline is connected, every document yields this assignment
+MOCK_PROCESSED_DOCUMENT = {
+    "title": "CSC 671 - Deep Learning Midterm Exam",
+    "description": "Midterm exam covering neural networks, backpropagation, CNNs, and other deep learning concepts",
+    "totalPoints": 15,
+    "questions": [
+        {
+            "id": "q1",
+            "text": "Suppose you have the following loss function: $L(x,y,z)=2x^2+3y^2-3zy$. What is the partial derivative $\\frac{\\partial L}{\\partial y}$ when $x=1$, $y=3$, $z=4$?",
+            "answerType": "numerical",
+            "expectedAnswer": "6",
+            "points": 1,
+            "rubric": {
+                "additionCriteria": [{"id": "a1", "text": "Correct answer", "points": 1}],
+                "deductionCriteria": [],
+            },
+        },
+        {
+            "id": "q2",
+            "text": "Suppose we implement a logistic regression model as a binary classifier for a dataset with 4 features using a linear layer `self.linear = torch.nn.Linear(a, b)`. What are the numeric values for `a` and `b` in this case?",
+            "answerType": "multiple-choice",
+            "expectedAnswer": "B",
+            "points": 1,
+            "options": [
+                {"id": 1, "text": "A. a=1, b=2", "isCorrect": False},
+                {"id": 2, "text": "B. a=4, b=1", "isCorrect": True},
+                {"id": 3, "text": "C. a=1, b=4", "isCorrect": False},
+                {"id": 4, "text": "D. a=4, b=2", "isCorrect": False},
+            ],
+            "rubric": {
+                "additionCriteria": [{"id": "a1", "text": "Correct answer selected", "points": 1}],
+                "deductionCriteria": [],
+            },
+        },
+        {
+            "id": "q3",
+            "text": "When we use standardization (z-score normalization), each feature in the training and test sets will have a mean of 0 and a standard deviation of 1.",
+            "answerType": "multiple-choice",
+            "expectedAnswer": "B",
+            "points": 1,
+            "options": [
+                {"id": 1, "text": "A. True", "isCorrect": False},
+                {"id": 2, "text": "B. False", "isCorrect": True},
+            ],
+            "rubric": {
+                "additionCriteria": [{"id": "a1", "text": "Correct answer selected", "points": 1}],
+                "deductionCriteria": [],
+            },
+        },
+        # Including just the first few questions for brevity
+    ]
+}
+
+
+
+def process_document(job, path, filename):
+    """Extract questions from an uploaded document and generate their rubrics
+
+    Runs on the job queue; reports progress through job.update_stage and
+    deletes the upload when done.
+    """
+    print(f"Processing document {filename} (job {job.id})")
+    try:
+        # In a real implementation, we would:
+        # 1. Process the file with OCR if it's an image/PDF
+        # 2. Use an AI service to extract questions
+        # 3. Generate a rubric for each question
+        job.update_stage('ocr', 1.0)
+        
+        processed = copy.deepcopy(MOCK_PROCESSED_DOCUMENT)
+        job.update_stage('extract-questions', 1.0)
+        
+        questions = processed['questions']
+        for i, question in enumerate(questions):
+            job.update_stage('generate-rubrics', (i + 1) / len(questions))
+        return processed
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
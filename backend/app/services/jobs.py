@@ -0,0 +1,130 @@
+# Background jobs for work that outlives a request (document processing, grading)
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Number of jobs processed at once
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '4'))
+# Finished jobs kept for status/result lookups; the oldest are dropped first
+MAX_FINISHED_JOBS = int(os.environ.get('MAX_FINISHED_JOBS', '200'))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class Job:
+    """One unit of background work, with per-stage progress the worker reports as it goes"""
+
+    def __init__(self, kind, stages):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.stages = [{'name': name, 'status': 'pending', 'progress': 0.0} for name in stages]
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.lock = threading.Lock()
+
+    def update_stage(self, name, progress=None, status=None):
+        """Record progress (0-1) of a stage; earlier stages are marked done when a later one starts"""
+        with self.lock:
+            for stage in self.stages:
+                if stage['name'] == name:
+                    if progress is not None:
+                        stage['progress'] = max(0.0, min(1.0, progress))
+                    stage['status'] = status or ('done' if stage['progress'] >= 1 else 'running')
+                    break
+                if stage['status'] != 'done':
+                    stage['status'] = 'done'
+                    stage['progress'] = 1.0
+
+    def progress(self):
+        """Overall progress, weighting every stage equally"""
+        if not self.stages:
+            return 1.0 if self.status == SUCCEEDED else 0.0
+        return sum(stage['progress'] for stage in self.stages) / len(self.stages)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'jobId': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'progress': round(self.progress(), 3),
+                'stages': [dict(stage) for stage in self.stages],
+                'createdAt': self.created_at,
+                'startedAt': self.started_at,
+                'finishedAt': self.finished_at,
+                'error': self.error,
+            }
+
+
+class JobQueue:
+    """Runs jobs on a local worker pool and keeps their status in memory"""
+
+    def __init__(self, workers=JOB_WORKERS, max_finished=MAX_FINISHED_JOBS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self.max_finished = max_finished
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, stages=(), **kwargs):
+        """Queue fn(job, *args, **kwargs); its return value becomes the job's result"""
+        job = Job(kind, stages)
+        with self.lock:
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        with job.lock:
+            job.status = RUNNING
+            job.started_at = time.time()
+        try:
+            result = fn(job, *args, **kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            with job.lock:
+                job.status = FAILED
+                job.error = str(e)
+                job.finished_at = time.time()
+        else:
+            with job.lock:
+                for stage in job.stages:
+                    stage['status'] = 'done'
+                    stage['progress'] = 1.0
+                job.result = result
+                job.status = SUCCEEDED
+                job.finished_at = time.time()
+        self._prune()
+
+    def _prune(self):
+        with self.lock:
+            finished = [job for job in self.jobs.values() if job.finished_at is not None]
+            finished.sort(key=lambda job: job.finished_at)
+            for job in finished[:max(0, len(finished) - self.max_finished)]:
+                del self.jobs[job.id]
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """The process-wide job queue, created on first use"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,68 @@
+# In-memory cache of serialized API responses, for reads that are polled far more often than written
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# Assignment detail responses kept in memory; 0 disables the cache
+ASSIGNMENT_CACHE_SIZE = int(os.environ.get('ASSIGNMENT_CACHE_SIZE', '256'))
+
+
+class CachedResponse:
+    """A serialized response body and its strong ETag"""
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+
+
+class ResponseCache:
+    """LRU cache of response bodies keyed by (resource ID, revision)
+
+    Writes bump the resource's revision, so a stale entry is never served;
+    invalidate() just frees the memory it holds.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, resource_id, revision):
+        with self.lock:
+            entry = self.entries.get((resource_id, revision))
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end((resource_id, revision))
+            self.hits += 1
+            return entry
+
+    def put(self, resource_id, revision, body):
+        """Cache a serialized body (bytes) and return it with its ETag"""
+        entry = CachedResponse(body)
+        if self.max_entries <= 0:
+            return entry
+        with self.lock:
+            self.entries[(resource_id, revision)] = entry
+            self.entries.move_to_end((resource_id, revision))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, resource_id):
+        """Drop every cached revision of a resource"""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == resource_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+assignment_cache = ResponseCache(ASSIGNMENT_CACHE_SIZE)
@@ -0,0 +1,127 @@
+"""Requests/sec of GET /api/assignments/<id> with and without the response cache
+
+Serves the app on a local port and drives it with a pool of client threads,
+first with the assignment cache disabled (every request reads and serializes
+the full assignment), then with it enabled, then with clients revalidating
+through If-None-Match as the polling grading view does.
+
+    python benchmark_assignment_detail.py --concurrency 8 --duration 5
+
+Uses an in-memory mongomock:// database unless --mongo_uri is given.
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args):
+        pass
+
+
+def synthetic_questions(count):
+    """Multiple-choice questions sized like the sample ones"""
+    return [
+        {
+            "id": f"q{number}",
+            "text": f"Question {number}: which of the following statements about the result is correct?",
+            "answerType": "multiple-choice",
+            "expectedAnswer": "A",
+            "points": 1,
+            "options": [{"id": option, "text": f"{chr(64 + option)}. Option {option}", "isCorrect": option == 1}
+                        for option in range(1, 5)],
+            "rubric": {
+                "additionCriteria": [{"id": "a1", "text": "Correct answer selected", "points": 1}],
+                "deductionCriteria": [],
+            },
+        }
+        for number in range(1, count + 1)
+    ]
+
+
+def load(port, path, duration, concurrency, headers):
+    """Send requests from `concurrency` threads for `duration` seconds; returns (count, latencies in ms)"""
+    deadline = time.perf_counter() + duration
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        mine = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            assert response.status in (200, 304), response.status
+            mine.append((time.perf_counter() - start) * 1000)
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    return len(latencies), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark assignment detail reads with and without the response cache')
+    parser.add_argument('--mongo_uri', type=str, default='mongomock://localhost/gradeassist_benchmark',
+                        help='Database to serve from (seeded with the sample assignments)')
+    parser.add_argument('--assignment_id', type=str, default='123')
+    parser.add_argument('--questions', type=int, default=0,
+                        help='Replace the assignment\'s questions with this many synthetic ones first (0 keeps them)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per case')
+    args = parser.parse_args()
+
+    os.environ['MONGO_URI'] = args.mongo_uri
+    from app import create_app
+    from app.services.response_cache import assignment_cache
+
+    app = create_app()
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+    path = f'/api/assignments/{args.assignment_id}'
+
+    if args.questions:
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        connection.request('PATCH', path, body=json.dumps({'questions': synthetic_questions(args.questions)}),
+                           headers={'Content-Type': 'application/json'})
+        assert connection.getresponse().status == 200
+        connection.close()
+
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    connection.request('GET', path)
+    response = connection.getresponse()
+    body_size = len(response.read())
+    etag = response.getheader('ETag')
+    connection.close()
+
+    cache_size = assignment_cache.max_entries or 256
+    cases = [
+        ('no cache', 0, {}),
+        ('cache', cache_size, {}),
+        ('cache + If-None-Match', cache_size, {'If-None-Match': etag}),
+    ]
+    print(f"{path}: {body_size} bytes, {args.concurrency} clients, {args.duration:.0f}s per case")
+    print(f"{'case':<24}{'req/s':>9}{'p50':>10}{'p95':>10}")
+    for name, max_entries, headers in cases:
+        assignment_cache.max_entries = max_entries
+        assignment_cache.clear()
+        count, latencies = load(port, path, args.duration, args.concurrency, headers)
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{name:<24}{count / args.duration:>9.0f}{statistics.median(latencies):>8.2f}ms{p95:>8.2f}ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
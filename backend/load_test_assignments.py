@@ -0,0 +1,131 @@
+"""Load test for GET /api/assignments as the collection grows
+
+Fills a scratch database with synthetic assignments and times listing
+requests through the Flask test client: the first page, a page in the middle
+of the collection, a field-projected page, a conditional request answered
+with 304, and the old unpaginated listing for comparison.
+
+Run it against a local MongoDB server to see real index behaviour:
+
+    python load_test_assignments.py --mongo_uri mongodb://localhost:27017/gradeassist_loadtest
+
+The database named in the URI is wiped for every collection size.
+
+The default mongomock:// database has no indexes, so every query scans the
+whole collection there and paginated latency grows with it too.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+QUESTIONS_PER_ASSIGNMENT = 15
+
+
+def synthetic_assignment(index):
+    """An assignment shaped like the sample data, with full question bodies"""
+    questions = [
+        {
+            "id": f"q{number}",
+            "text": f"Question {number} of assignment {index}: explain the result and show your work.",
+            "answerType": "short-text",
+            "expectedAnswer": str(number),
+            "points": 1,
+            "rubric": {
+                "additionCriteria": [{"id": "a1", "text": "Correct answer", "points": 1}],
+                "deductionCriteria": [{"id": "d1", "text": "Missing work", "points": -0.5}],
+            },
+        }
+        for number in range(1, QUESTIONS_PER_ASSIGNMENT + 1)
+    ]
+    return {
+        "id": f"{index:08d}",
+        "title": f"Assignment {index}",
+        "description": f"Synthetic assignment {index} for load testing",
+        "totalPoints": QUESTIONS_PER_ASSIGNMENT,
+        "questionCount": QUESTIONS_PER_ASSIGNMENT,
+        "createdAt": "2025-01-01",
+        "questions": questions,
+    }
+
+
+def fill(database, size, batch_size=1000):
+    """Replace the scratch database's assignments with `size` synthetic ones"""
+    db = database.get_db()
+    db.assignments.drop()
+    db.revisions.drop()
+    database.ensure_indexes(db)
+    for start in range(0, size, batch_size):
+        db.assignments.insert_many([synthetic_assignment(index) for index in range(start, min(start + batch_size, size))])
+    database.bump_assignments_revision(db)
+
+
+def timed(fn, requests):
+    """Latencies in milliseconds of `requests` calls to fn"""
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def run(sizes, requests, page_size, full_listing_max):
+    from app import create_app
+    from app.api.routes import encode_cursor
+    from app.models import database
+
+    client = create_app().test_client()
+
+    def get(url, **kwargs):
+        response = client.get(url, **kwargs)
+        assert response.status_code in (200, 304), response.get_data(as_text=True)
+        return response
+
+    print(f"{'assignments':>12}  {'request':<24}{'p50':>9}{'p95':>9}{'bytes':>10}")
+    for size in sizes:
+        fill(database, size)
+        first_page = f"/api/assignments?limit={page_size}"
+        etag = get(first_page).headers["ETag"]
+        cases = {
+            "first page": lambda: get(first_page),
+            "middle page": lambda: get(f"{first_page}&cursor={encode_cursor(f'{size // 2:08d}')}"),
+            "fields=id,title": lambda: get(f"{first_page}&fields=id,title"),
+            "If-None-Match (304)": lambda: get(first_page, headers={"If-None-Match": etag}),
+        }
+        if size <= full_listing_max:
+            # What the endpoint did before pagination: every assignment in one response
+            cases["unpaginated"] = lambda: json.dumps(database.list_assignments())
+
+        for name, fn in cases.items():
+            body = fn()
+            body_size = len(body) if isinstance(body, str) else len(body.get_data())
+            latencies = timed(fn, requests)
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(f"{size:>12}  {name:<24}{statistics.median(latencies):>7.2f}ms{p95:>7.2f}ms{body_size:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time /api/assignments listing requests as the collection grows')
+    parser.add_argument('--mongo_uri', type=str, default='mongomock://localhost/gradeassist_loadtest',
+                        help='Scratch database to fill (its assignments are dropped)')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='Collection sizes to test')
+    parser.add_argument('--requests', type=int, default=50, help='Requests timed per case')
+    parser.add_argument('--page_size', type=int, default=50, help='limit= of the paginated requests')
+    parser.add_argument('--full_listing_max', type=int, default=10000,
+                        help='Largest collection the unpaginated listing is timed on')
+    args = parser.parse_args()
+
+    # Only the scratch database given on the command line, never MONGO_URI from the environment
+    os.environ['MONGO_URI'] = args.mongo_uri
+    if args.mongo_uri.startswith('mongomock://'):
+        print("mongomock has no indexes: page latency here grows with the collection, "
+              "pass --mongo_uri mongodb://... to measure the indexed query")
+    os.environ['SEED_DATABASE'] = '0'
+    run(args.sizes, args.requests, args.page_size, args.full_listing_max)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,9 +10,16 @@ export const metadata: Metadata = {
   description: "Manage your assignments and grading",
 }
 
-async function getAssignments() {
+// Only the fields the cards render
+const ASSIGNMENT_FIELDS = "id,title,description,questions,totalPoints,createdAt"
+
+async function getAssignments(cursor?: string) {
   try {
-    const response = await fetch(`${API_URL}/assignments`, {
+    const query = new URLSearchParams({ fields: ASSIGNMENT_FIELDS });
+    if (cursor) {
+      query.set("cursor", cursor);
+    }
+    const response = await fetch(`${API_URL}/assignments?${query}`, {
       cache: 'no-store' // Don't cache this request
     });
     
@@ -20,18 +27,20 @@ async function getAssignments() {
       throw new Error(`API error: ${response.status}`);
     }
     
+    // One page of assignments; nextCursor is null on the last page
     const data = await response.json();
-    return data.assignments;
+    return { assignments: data.assignments, nextCursor: data.nextCursor };
   } catch (error) {
     console.error("Failed to fetch assignments:", error);
     // Return empty array in case of error
-    return [];
+    return { assignments: [], nextCursor: null };
   }
 }
 
-export default async function AssignmentsPage() {
-  // Fetch assignments from the API
-  const assignments = await getAssignments();
+export default async function AssignmentsPage({ searchParams }: { searchParams: { cursor?: string } }) {
+  const { cursor } = await searchParams
+  // Fetch a page of assignments from the API
+  const { assignments, nextCursor } = await getAssignments(cursor);
 
   return (
     <div className="flex flex-col gap-6 max-w-4xl mx-auto">
@@ -84,6 +93,21 @@ export default async function AssignmentsPage() {
           </Card>
         ))}
       </div>
+
+      {(cursor || nextCursor) && (
+        <div className="flex justify-between">
+          {cursor ? (
+            <Button variant="outline" asChild>
+              <Link href="/dashboard/assignments">First page</Link>
+            </Button>
+          ) : <div />}
+          {nextCursor && (
+            <Button variant="outline" asChild>
+              <Link href={`/dashboard/assignments?cursor=${encodeURIComponent(nextCursor)}`}>Next page</Link>
+            </Button>
+          )}
+        </div>
+      )}
     </div>
   )
 }
@@ -39,7 +39,7 @@ export default function GradingInterface({ assignmentId }: GradingInterfaceProps
             'Content-Type': 'application/json',
           },
           mode: 'cors', // Enable CORS
-          cache: 'no-store' // Don't cache this request
+          cache: 'no-cache' // Revalidate with the ETag; unchanged assignments come back as 304
         });
 
         if (!response.ok) {
@@ -79,7 +79,7 @@ export default function GradingResults({
           const response = await fetch(`${API_URL}/submissions/${submission.id}/auto-grade`, {
             method: 'POST',
             headers: {
-              'Accept': 'application/json',
+              'Accept': 'application/x-ndjson, application/json;q=0.9',
               'Content-Type': 'application/json',
             },
             body: JSON.stringify({
@@ -87,16 +87,46 @@ export default function GradingResults({
               answers: submission.answers
             })
           });
-          
+
           if (!response.ok) {
             throw new Error(`API error: ${response.status}`);
           }
-          
-          const gradeData = await response.json();
-          
-          // Update grades with API response
-          setGrades(gradeData.grades);
-          setTotalScore(gradeData.totalScore);
+
+          // Older backends answer with all grades at once
+          if (!response.body || !response.headers.get('Content-Type')?.includes('application/x-ndjson')) {
+            const gradeData = await response.json();
+
+            // Update grades with API response
+            setGrades(gradeData.grades);
+            setTotalScore(gradeData.totalScore);
+            return;
+          }
+
+          // Show each question's grade as soon as the backend streams it
+          const handleEvent = (line: string) => {
+            if (!line.trim()) return;
+            const { event, data } = JSON.parse(line);
+            if (event === 'grade') {
+              setGrades((current) => current.map((grade) => (grade.questionId === data.questionId ? data : grade)));
+            } else if (event === 'summary') {
+              setTotalScore(data.totalScore);
+            } else if (event === 'error') {
+              throw new Error(data.error);
+            }
+          };
+
+          const reader = response.body.getReader();
+          const decoder = new TextDecoder();
+          let buffered = "";
+          while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffered += decoder.decode(value, { stream: true });
+            const lines = buffered.split("\n");
+            buffered = lines.pop() || "";
+            lines.forEach(handleEvent);
+          }
+          handleEvent(buffered + decoder.decode());
         } catch (error) {
           console.error("Error during auto-grading:", error);
           
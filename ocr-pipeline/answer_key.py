@@ -0,0 +1,171 @@
+import datetime
+import hashlib
+import json
+import os
+import re
+import fire
+from problem_splitter import split_problems, normalize_problem_number
+from fast_grader import final_answer, parse_choices, parse_number, numeric_tolerance, CHOICE_LETTERS
+
+COMPILED_SUFFIX = ".compiled.json"
+# Bump when the compiled format or the splitting/normalization rules change
+COMPILER_VERSION = 2
+
+# "- [x] a=4, b=1" / "- [ ] a=1, b=2"
+CHECKBOX_OPTION = re.compile(r'^\s*[-*]\s*\[([ xX])\]\s*\S', re.MULTILINE)
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compiled_path_for(answer_key_path):
+    return os.path.splitext(answer_key_path)[0] + COMPILED_SUFFIX
+
+
+def expected_answer_for(span):
+    """
+    The expected answer for one problem of the key.
+
+    Checkbox lists are turned into option letters in list order, matching
+    how the questions are lettered on the student's paper.
+    """
+    options = CHECKBOX_OPTION.findall(span)
+    checked = [CHOICE_LETTERS[i] for i, mark in enumerate(options[:len(CHOICE_LETTERS)]) if mark.strip()]
+    if checked:
+        return ", ".join(checked)
+    return final_answer(span)
+
+
+def normalize_expected(expected_answer):
+    """
+    Machine-comparable form of an expected answer, read by fast_grader.fast_grade
+    instead of re-parsing expectedAnswer for every submission.
+    """
+    choices = parse_choices(expected_answer)
+    if choices is not None:
+        return {"type": "multiple-choice", "choices": sorted(choices)}
+
+    number = parse_number(expected_answer)
+    if number is not None:
+        value, unit = number
+        return {"type": "numerical", "value": value, "unit": unit,
+                "tolerance": numeric_tolerance(expected_answer, value)}
+
+    return {"type": "text", "value": re.sub(r'\s+', ' ', expected_answer).strip().lower()}
+
+
+def compile_answer_key(answer_key_path, output_path=None):
+    """
+    Parse an answer key into a per-problem index and save it next to the key.
+
+    Args:
+        answer_key_path: Path to the answer key text file
+        output_path: Where to write the artifact (defaults to <key>.compiled.json)
+
+    Returns:
+        dict: The compiled answer key
+    """
+    with open(answer_key_path, 'r') as f:
+        text = f.read()
+
+    problems = {}
+    for number, span in split_problems(text).items():
+        expected_answer = expected_answer_for(span)
+        problems[number] = {
+            "text": span,
+            "expected_answer": expected_answer,
+            "normalized": normalize_expected(expected_answer),
+            "hash": text_hash(span),
+        }
+
+    compiled = {
+        "version": COMPILER_VERSION,
+        "source": answer_key_path,
+        "source_hash": text_hash(text),
+        "compiled_at": datetime.datetime.now().isoformat(),
+        "text": text,
+        "problems": problems,
+    }
+
+    output_path = output_path or compiled_path_for(answer_key_path)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(compiled, f, ensure_ascii=False, indent=2)
+    print(f"Compiled answer key with {len(problems)} problems to {output_path}")
+
+    return compiled
+
+
+def load_answer_key(answer_key_path, output_path=None):
+    """
+    Load the compiled answer key, recompiling it if the key file changed.
+
+    Returns:
+        dict: The compiled answer key
+    """
+    output_path = output_path or compiled_path_for(answer_key_path)
+
+    with open(answer_key_path, 'r') as f:
+        source_hash = text_hash(f.read())
+
+    if os.path.exists(output_path):
+        try:
+            with open(output_path, 'r', encoding='utf-8') as f:
+                compiled = json.load(f)
+            if compiled.get("version") == COMPILER_VERSION and compiled.get("source_hash") == source_hash:
+                return compiled
+            print(f"Answer key {answer_key_path} changed, recompiling...")
+        except (OSError, ValueError) as e:
+            print(f"Could not read compiled answer key {output_path}: {e}")
+
+    return compile_answer_key(answer_key_path, output_path)
+
+
+def answer_key_entry(compiled, problem_number):
+    """
+    The compiled entry for a problem, or None if the key does not cover it.
+    """
+    if not compiled:
+        return None
+    return compiled["problems"].get(normalize_problem_number(problem_number))
+
+
+def attach_key_entry(problem_data, entry):
+    """
+    Copy a compiled key entry onto a parsed problem, replacing whatever the parser extracted.
+    """
+    problem_data["answer_key"] = entry["text"]
+    problem_data["expectedAnswer"] = entry["expected_answer"]
+    problem_data["answer_key_hash"] = entry["hash"]
+    problem_data["normalized"] = entry["normalized"]
+
+
+def apply_answer_key(problems, compiled):
+    """
+    Fill in expectedAnswer for parsed problems from the compiled key.
+
+    Answers already present (e.g. from assessment_parser) are left alone;
+    they only get the key's normalized form when they match the key.
+
+    Returns:
+        int: Number of problems updated
+    """
+    updated = 0
+    for problem_id, problem_data in problems.items():
+        entry = answer_key_entry(compiled, problem_id)
+        if not entry:
+            continue
+        if not problem_data.get("expectedAnswer"):
+            problem_data["expectedAnswer"] = entry["expected_answer"]
+            problem_data.setdefault("answer_key", entry["text"])
+            updated += 1
+        if final_answer(problem_data["expectedAnswer"]) == entry["expected_answer"]:
+            problem_data["normalized"] = entry["normalized"]
+    return updated
+
+
+if __name__ == "__main__":
+    fire.Fire({
+        "compile": compile_answer_key,
+        "load": load_answer_key
+    })
@@ -1,20 +1,68 @@
 import json
 import re
-import anthropic
 import os
 import datetime
+import threading
 from dotenv import load_dotenv
+from problem_splitter import split_problems, problem_slice
+from answer_key import load_answer_key, answer_key_entry, attach_key_entry
+from instrumentation import span, traced_run, record_usage
+from provider_clients import anthropic_client
 
 # Load environment variables from .env file
 load_dotenv()
 
+CLAUDE_MODEL = "claude-3-7-sonnet-20250219"
+BATCH_CHUNK_SIZE = 15
+BATCH_MAX_TOKENS = 16000
+
+class TokenUsage:
+    """Running total of Claude API calls and tokens for one assessment."""
+    
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.lock = threading.Lock()
+    
+    def record(self, response):
+        usage = getattr(response, "usage", None)
+        with self.lock:
+            self.calls += 1
+            if usage is not None:
+                self.input_tokens += getattr(usage, "input_tokens", 0) or 0
+                self.output_tokens += getattr(usage, "output_tokens", 0) or 0
+    
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens
+        }
+
 def get_anthropic_client():
     api_key = os.environ.get("ANTHROPIC_API_KEY")
     if not api_key:
         raise ValueError("No Anthropic API key found in environment variables")
-    return anthropic.Anthropic(api_key=api_key)
+    return anthropic_client(api_key, os.environ.get("ANTHROPIC_BASE_URL"))
+
+def create_message(client, span_name, prompt, usage=None, **kwargs):
+    """
+    Send one user prompt to Claude, counting tokens in `usage` and the trace.
+    """
+    with span(span_name, model=CLAUDE_MODEL, bytes_sent=len(prompt.encode("utf-8"))) as call:
+        response = client.messages.create(
+            model=CLAUDE_MODEL,
+            temperature=0,
+            messages=[{"role": "user", "content": [{"type": "text", "text": prompt}]}],
+            **kwargs
+        )
+        record_usage(call, response, CLAUDE_MODEL)
+    if usage is not None:
+        usage.record(response)
+    return response
 
-def get_problem_numbers(questions_text, student_answers_text, answer_key_text, client=None):
+def get_problem_numbers(questions_text, student_answers_text, answer_key_text, client=None, usage=None):
     if client is None:
         client = get_anthropic_client()
     
@@ -34,12 +82,13 @@ def get_problem_numbers(questions_text, student_answers_text, answer_key_text, c
     """
     
     try:
-        response = client.messages.create(
-            model="claude-3-7-sonnet-20250219",
+        response = create_message(
+            client,
+            "anthropic.problem_numbers",
+            prompt,
+            usage,
             max_tokens=1000,
-            temperature=0,
-            system="You extract problem numbers from educational content. Return only a JSON array of problem numbers.",
-            messages=[{"role": "user", "content": [{"type": "text", "text": prompt}]}]
+            system="You extract problem numbers from educational content. Return only a JSON array of problem numbers."
         )
         
         content = response.content[0].text
@@ -55,7 +104,7 @@ def get_problem_numbers(questions_text, student_answers_text, answer_key_text, c
         print(f"Error extracting problem numbers: {e}")
         return []
 
-def generate_problem_json(problem_number, questions_text, student_answers_text, answer_key_text, client=None):
+def generate_problem_json(problem_number, questions_text, student_answers_text, answer_key_text, client=None, usage=None):
     if client is None:
         client = get_anthropic_client()
     
@@ -84,12 +133,13 @@ def generate_problem_json(problem_number, questions_text, student_answers_text,
     """
     
     try:
-        response = client.messages.create(
-            model="claude-3-7-sonnet-20250219",
+        response = create_message(
+            client,
+            "anthropic.extract",
+            prompt,
+            usage,
             max_tokens=2000,
-            temperature=0,
-            system="You extract problem information from educational content. Return a JSON object with problem, student_answer, and answer_key fields.",
-            messages=[{"role": "user", "content": [{"type": "text", "text": prompt}]}]
+            system="You extract problem information from educational content. Return a JSON object with problem, student_answer, and answer_key fields."
         )
         
         content = response.content[0].text
@@ -105,35 +155,204 @@ def generate_problem_json(problem_number, questions_text, student_answers_text,
         print(f"Error generating JSON for problem {problem_number}: {e}")
         return {"problem": "", "student_answer": "", "answer_key": ""}
 
-def process_assessment(questions_text, student_answers_text, answer_key_text, output_file=None, specific_problems=None):
-    client = get_anthropic_client()
+def is_valid_problem(problem_data):
+    return (
+        isinstance(problem_data, dict)
+        and all(isinstance(problem_data.get(field), str) for field in ("problem", "student_answer", "answer_key"))
+        and problem_data["problem"].strip() != ""
+    )
+
+def generate_problems_json(problem_numbers, questions_text, student_answers_text, answer_key_text, client=None, usage=None):
+    """
+    Extract several problems with a single Claude call.
+    
+    Returns:
+        dict: Problem number -> problem data, for the problems that parsed correctly
+    """
+    if client is None:
+        client = get_anthropic_client()
+    
+    numbers_json = json.dumps(problem_numbers, ensure_ascii=False)
+    prompt = f"""
+    QUESTIONS:
+    {questions_text}
+    
+    STUDENT ANSWERS:
+    {student_answers_text}
+    
+    ANSWER KEY:
+    {answer_key_text}
+    
+    For EACH of these problems: {numbers_json}
+    return an object with these fields:
+    1. "problem": The complete problem statement (including all parts)
+    2. "student_answer": The student's complete answer (or empty string if not found)
+    3. "answer_key": The complete answer from the answer key, including work (or empty string if not found)
+    
+    Return a single JSON object keyed by problem number. Example format:
+    {{
+      "1.1": {{
+        "problem": "Full problem text goes here...",
+        "student_answer": "Student's answer goes here...",
+        "answer_key": "Answer key solution goes here..."
+      }}
+    }}
+    EXTRACT INFO FOR ALL OF THESE PROBLEMS: {numbers_json}.
+    """
     
-    if specific_problems is None:
+    try:
+        response = create_message(
+            client,
+            "anthropic.extract_batch",
+            prompt,
+            usage,
+            max_tokens=BATCH_MAX_TOKENS,
+            system="You extract problem information from educational content. Return a JSON object mapping each problem number to its problem, student_answer, and answer_key fields."
+        )
+        
+        content = response.content[0].text
+        json_match = re.search(r'({[\s\S]*})', content)
+        if not json_match:
+            raise ValueError(f"Could not extract problem data for problems {', '.join(problem_numbers)}")
+        
+        batch_data = json.loads(json_match.group(1))
+        return {
+            number: batch_data[number]
+            for number in problem_numbers
+            if is_valid_problem(batch_data.get(number))
+        }
+        
+    except Exception as e:
+        print(f"Error generating JSON for problems {', '.join(problem_numbers)}: {e}")
+        return {}
+
+def sliced_texts(problem_numbers, full_text, slices):
+    """
+    The spans of a document covering the given problems, or the full text if any is missing.
+    """
+    if not slices:
+        return full_text
+    text_spans = [problem_slice(slices, number, None) for number in problem_numbers]
+    if any(text_span is None for text_span in text_spans):
+        return full_text
+    return "\n\n".join(text_spans)
+
+def process_assessment(questions_text, student_answers_text, answer_key_text, output_file=None, specific_problems=None,
+                       batch=True, chunk_size=BATCH_CHUNK_SIZE, client=None, local_split=True, compiled_key=None):
+    """
+    Extract every problem's statement, student answer and answer key.
+    
+    Args:
+        batch: Extract up to chunk_size problems per Claude call, retrying
+            one problem at a time only for those that failed to parse
+        chunk_size: Problems per batched call
+        client: Anthropic client (created from the environment if omitted)
+        local_split: Find problem numbers with problem_splitter and send
+            Claude only the slices of each document for the problems in
+            the request (falling back to the full text when a problem
+            cannot be located)
+        compiled_key: Answer key from answer_key.load_answer_key. Problems it
+            covers take their answer key from the index instead of having
+            Claude copy it out of the key text.
+    """
+    if client is None:
+        client = get_anthropic_client()
+    usage = TokenUsage()
+    
+    if compiled_key is not None and answer_key_text is None:
+        answer_key_text = compiled_key["text"]
+    
+    if local_split:
+        question_slices = split_problems(questions_text)
+        student_slices = question_slices if student_answers_text is questions_text else split_problems(student_answers_text)
+        if compiled_key is not None:
+            answer_key_slices = {number: entry["text"] for number, entry in compiled_key["problems"].items()}
+        else:
+            answer_key_slices = split_problems(answer_key_text)
+    else:
+        question_slices = student_slices = answer_key_slices = {}
+    
+    if specific_problems is None and question_slices:
+        problem_numbers = list(question_slices)
+        print(f"Found {len(problem_numbers)} problems locally: {', '.join(problem_numbers)}")
+    elif specific_problems is None:
         print("Extracting problem numbers...")
-        problem_numbers = get_problem_numbers(questions_text, student_answers_text, answer_key_text, client)
+        problem_numbers = get_problem_numbers(questions_text, student_answers_text, answer_key_text, client, usage)
         print(f"Found {len(problem_numbers)} problems: {', '.join(problem_numbers)}")
     else:
         problem_numbers = specific_problems
         print(f"Processing {len(problem_numbers)} specified problems: {', '.join(problem_numbers)}")
     
+    full_chars = len(questions_text) + len(student_answers_text) + len(answer_key_text)
+    sent_chars = 0
+    
+    def texts_for(numbers):
+        nonlocal sent_chars
+        if all(answer_key_entry(compiled_key, number) for number in numbers):
+            # Filled in from the compiled key afterwards
+            key_text = ""
+        else:
+            key_text = sliced_texts(numbers, answer_key_text, answer_key_slices)
+        texts = (
+            sliced_texts(numbers, questions_text, question_slices),
+            sliced_texts(numbers, student_answers_text, student_slices),
+            key_text
+        )
+        sent_chars += sum(len(text) for text in texts)
+        return texts
+    
     all_problems = {}
     
-    for i, problem_number in enumerate(problem_numbers):
-        print(f"Processing problem {problem_number} ({i+1}/{len(problem_numbers)})...")
+    if batch and problem_numbers:
+        chunk_size = max(1, int(chunk_size))
+        for start in range(0, len(problem_numbers), chunk_size):
+            chunk = problem_numbers[start:start + chunk_size]
+            print(f"Processing problems {', '.join(chunk)} in one request...")
+            all_problems.update(generate_problems_json(
+                chunk,
+                *texts_for(chunk),
+                client,
+                usage
+            ))
+    
+    remaining = [number for number in problem_numbers if number not in all_problems]
+    if batch and remaining:
+        print(f"Falling back to per-problem extraction for {len(remaining)} problems: {', '.join(remaining)}")
+    
+    for i, problem_number in enumerate(remaining):
+        print(f"Processing problem {problem_number} ({i+1}/{len(remaining)})...")
         problem_data = generate_problem_json(
             problem_number, 
-            questions_text, 
-            student_answers_text, 
-            answer_key_text,
-            client
+            *texts_for([problem_number]),
+            client,
+            usage
         )
         all_problems[problem_number] = problem_data
     
+    # Keep the problems in the order they were listed
+    all_problems = {number: all_problems[number] for number in problem_numbers}
+    
+    for number, problem_data in all_problems.items():
+        entry = answer_key_entry(compiled_key, number)
+        if entry:
+            attach_key_entry(problem_data, entry)
+    
+    print(f"Claude usage: {usage.calls} calls, {usage.input_tokens} input tokens, {usage.output_tokens} output tokens")
+    if usage.calls:
+        # Without batching or slicing every problem resends all three documents
+        baseline_chars = full_chars * len(problem_numbers)
+        print(f"  Document text sent: {sent_chars:,} chars "
+              f"(one full-document call per problem would send {baseline_chars:,} chars)")
+    
     output_data = {
         "metadata": {
             "total_problems": len(problem_numbers),
             "problem_numbers": problem_numbers,
-            "timestamp": datetime.datetime.now().isoformat()
+            "timestamp": datetime.datetime.now().isoformat(),
+            "extraction_mode": "batch" if batch else "per_problem",
+            "local_split": bool(question_slices),
+            "answer_key_hash": compiled_key["source_hash"] if compiled_key else None,
+            "token_usage": usage.as_dict()
         },
         "problems": all_problems
     }
@@ -145,29 +364,32 @@ def process_assessment(questions_text, student_answers_text, answer_key_text, ou
     
     return output_data
 
-def parse_pdf_to_assessment(pdf_path, answer_key_path, save_intermediate=False):
+def parse_pdf_to_assessment(pdf_path, answer_key_path, save_intermediate=False, workers=1):
     try:
         from pdf_to_text import pdf_to_text
         
         # Extract text from PDF
         questions_text = pdf_to_text(pdf_path, save_segments=save_intermediate, 
-                                    save_text=save_intermediate)
+                                    save_text=save_intermediate, workers=workers)
         
         # Use the same text for student answers in this test case
         student_answers_text = questions_text
         
-        # Load answer key
-        with open(answer_key_path, 'r') as f:
-            answer_key_text = f.read()
+        # Load the compiled answer key (recompiled only when the key file changed)
+        compiled_key = load_answer_key(answer_key_path)
         
         # Process the assessment
         output_file = "assessment_analysis.json" if save_intermediate else None
-        return process_assessment(
-            questions_text,
-            student_answers_text,
-            answer_key_text,
-            output_file
-        )
+        with span("process_assessment") as extraction:
+            assessment_data = process_assessment(
+                questions_text,
+                student_answers_text,
+                compiled_key["text"],
+                output_file,
+                compiled_key=compiled_key
+            )
+            extraction.set(problems=assessment_data["metadata"]["total_problems"])
+        return assessment_data
         
     except Exception as e:
         print(f"Error in PDF to assessment parsing: {e}")
@@ -178,7 +400,8 @@ if __name__ == "__main__":
     import fire
     
     def parse_assessment(questions_file, answer_key_file, output_file="assessment_analysis.json", 
-                         student_answers_file=None):
+                         student_answers_file=None, batch=True, chunk_size=BATCH_CHUNK_SIZE, local_split=True,
+                         trace_file=None):
         """
         Parse problems from text files and generate assessment analysis.
         
@@ -187,6 +410,10 @@ if __name__ == "__main__":
             answer_key_file: Path to the answer key file
             output_file: Path to save the output JSON
             student_answers_file: Path to student answers file (if different from questions)
+            batch: Extract several problems per Claude call (--nobatch for one call per problem)
+            chunk_size: Problems per batched call
+            local_split: Send Claude only each problem's slice of the documents (--nolocal_split to disable)
+            trace_file: Record Claude call timings and tokens to this file (.jsonl or OTLP .json) and print a summary
         """
         try:
             # Check if the required files exist
@@ -217,16 +444,20 @@ if __name__ == "__main__":
             with open(student_answers_file, 'r') as f:
                 student_answers_text = f.read()
             
-            with open(answer_key_file, 'r') as f:
-                answer_key_text = f.read()
+            compiled_key = load_answer_key(answer_key_file)
             
             # Process the assessment
-            results = process_assessment(
-                questions_text,
-                student_answers_text,
-                answer_key_text,
-                output_file
-            )
+            with traced_run("process_assessment", trace_file):
+                results = process_assessment(
+                    questions_text,
+                    student_answers_text,
+                    compiled_key["text"],
+                    output_file,
+                    compiled_key=compiled_key,
+                    batch=batch,
+                    chunk_size=chunk_size,
+                    local_split=local_split
+                )
             
             print("Assessment parsing completed successfully!")
             return results
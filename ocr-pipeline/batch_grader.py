@@ -0,0 +1,181 @@
+import glob
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import fire
+from dotenv import load_dotenv
+from pdf_to_text import pdf_to_text, get_openai_client, MAX_WORKERS
+from ocr_cache import OCRCache, DEFAULT_CACHE_PATH
+from assessment_parser import process_assessment, get_anthropic_client
+from answer_key import load_answer_key
+from grader import grade_assessment_data, configure_gemini, check_environment, GRADING_WORKERS
+
+# Load environment variables from .env file
+load_dotenv()
+
+OUTPUT_DIR = "batch_results"
+
+
+def find_submissions(submissions):
+    """
+    PDF paths from a directory, a glob pattern, or a list of paths.
+    """
+    if isinstance(submissions, (list, tuple)):
+        return sorted(submissions)
+    if os.path.isdir(submissions):
+        return sorted(glob.glob(os.path.join(submissions, "*.pdf")))
+    return sorted(glob.glob(submissions))
+
+
+def submission_names(paths):
+    """
+    A unique name per submission: its path relative to the submissions' common
+    directory, without the extension. Same-named PDFs in different directories
+    keep separate results instead of overwriting each other.
+    """
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    names = []
+    for path in paths:
+        name = os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0]
+        unique, copy = name, 2
+        while unique in names:
+            unique = f"{name}-{copy}"
+            copy += 1
+        names.append(unique)
+    return names
+
+
+def summarize(results, elapsed):
+    scores = [r["overall_score"] for r in results if r.get("overall_score") is not None]
+
+    problem_scores = {}
+    fast_path = llm = 0
+    for result in results:
+        for problem_id, problem in result.get("problems", {}).items():
+            problem_scores.setdefault(problem_id, []).append(problem.get("grade_percentage", 0))
+        stats = result.get("grading_stats", {})
+        fast_path += stats.get("fast_path", 0)
+        llm += stats.get("llm", 0)
+
+    return {
+        "submissions": len(results),
+        "graded": len(scores),
+        "failed": [r["submission"] for r in results if r.get("error")],
+        "mean_score": statistics.mean(scores) if scores else None,
+        "median_score": statistics.median(scores) if scores else None,
+        "min_score": min(scores) if scores else None,
+        "max_score": max(scores) if scores else None,
+        "students": {r["submission"]: r.get("overall_score") for r in results},
+        "problem_averages": {
+            problem_id: sum(values) / len(values) for problem_id, values in problem_scores.items()
+        },
+        "grading_stats": {"fast_path": fast_path, "llm": llm},
+        "elapsed_seconds": elapsed,
+        "submissions_per_minute": 60 * len(results) / elapsed if elapsed > 0 else None,
+    }
+
+
+def grade_batch(submissions, answer_key_path, output_dir=OUTPUT_DIR, parallel_submissions=2,
+                max_workers=MAX_WORKERS, grading_workers=GRADING_WORKERS, workers=1,
+                use_cache=True, cache_path=DEFAULT_CACHE_PATH):
+    """
+    Grade many student PDFs against one answer key.
+
+    The answer key is compiled once (see answer_key.py), and the OpenAI,
+    Anthropic and Gemini clients and the OCR cache are shared across all
+    submissions. Writes one <submission>.json per student plus
+    class_summary.json to output_dir; submissions from subdirectories keep
+    their relative path there.
+
+    Args:
+        submissions: Directory of PDFs, glob pattern, or list of paths
+        answer_key_path: Path to the answer key text file
+        output_dir: Where to write per-student results and the class summary
+        parallel_submissions: Number of submissions processed at the same time
+        max_workers: Concurrent OCR requests per submission
+        grading_workers: Concurrent grading requests per submission
+        workers: Parallel pdftoppm processes per submission
+        use_cache: Share the OCR result cache (--nouse_cache to bypass)
+        cache_path: SQLite file backing the OCR cache
+    """
+    if not check_environment():
+        return None
+
+    paths = find_submissions(submissions)
+    if not paths:
+        print(f"No PDF submissions found in {submissions}")
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+    answer_key = load_answer_key(answer_key_path)
+    # None lets process_assessment discover problem numbers per submission
+    problem_numbers = list(answer_key["problems"]) or None
+    print(f"Grading {len(paths)} submissions against {answer_key_path} "
+          f"({len(answer_key['problems'])} problems in key)")
+
+    openai_client = get_openai_client()
+    anthropic_client = get_anthropic_client()
+    gemini_model = configure_gemini()
+    cache = OCRCache(cache_path) if use_cache else None
+    progress_lock = threading.Lock()
+    completed = 0
+
+    def grade_submission(pdf_path, name):
+        nonlocal completed
+        try:
+            student_text = pdf_to_text(pdf_path, max_workers=max_workers, workers=workers,
+                                       use_cache=use_cache, client=openai_client, cache=cache)
+            assessment = process_assessment(
+                student_text,
+                student_text,
+                answer_key["text"],
+                specific_problems=problem_numbers,
+                client=anthropic_client,
+                compiled_key=answer_key
+            )
+            result = grade_assessment_data(assessment, max_workers=grading_workers, model=gemini_model,
+                                           answer_key=answer_key)
+        except Exception as e:
+            print(f"Error grading {pdf_path}: {e}")
+            result = {"error": str(e), "overall_score": None}
+
+        result["submission"] = name
+        result_file = os.path.join(output_dir, f"{name}.json")
+        os.makedirs(os.path.dirname(result_file), exist_ok=True)
+        with open(result_file, 'w') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+        with progress_lock:
+            completed += 1
+            print(f"[{completed}/{len(paths)}] {name}: "
+                  + (f"{result['overall_score']:.2f}%" if result.get("overall_score") is not None else "failed"))
+        return result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, parallel_submissions)) as pool:
+        results = list(pool.map(grade_submission, paths, submission_names(paths)))
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results, elapsed)
+    if cache is not None:
+        summary["ocr_cache"] = cache.stats()
+        cache.close()
+
+    summary_file = os.path.join(output_dir, "class_summary.json")
+    with open(summary_file, 'w') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"\nGraded {summary['graded']}/{summary['submissions']} submissions in {elapsed:.1f}s "
+          f"({summary['submissions_per_minute']:.2f} submissions/minute)")
+    if summary["mean_score"] is not None:
+        print(f"Class mean {summary['mean_score']:.2f}%, median {summary['median_score']:.2f}%")
+    print(f"Per-student results and class summary saved to {output_dir}/")
+
+    return summary
+
+
+if __name__ == "__main__":
+    fire.Fire(grade_batch)
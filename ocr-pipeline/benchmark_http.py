@@ -0,0 +1,134 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+from requests.adapters import HTTPAdapter
+import fire
+from openai import OpenAI
+from provider_clients import openai_client, POOL_SIZE
+
+STUB_API_KEY = "stub"
+
+
+class StubAPIHandler(BaseHTTPRequestHandler):
+    """
+    Answers every POST with a minimal chat completion after a fixed delay.
+
+    Each new connection first waits `handshake_latency`, standing in for the
+    TCP and TLS round trips a real API connection costs.
+    """
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+        time.sleep(self.server.handshake_latency)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.response_latency)
+        body = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4o",
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": "stub text"}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(handshake_latency, response_latency):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPIHandler)
+    server.daemon_threads = True
+    server.handshake_latency = handshake_latency
+    server.response_latency = response_latency
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def chat_payload():
+    return {
+        "model": "gpt-4o",
+        "messages": [{"role": "user", "content": [{"type": "text", "text": "Do OCR on this image."}]}],
+        "max_tokens": 10,
+    }
+
+
+def request_fns(base_url, pool_size):
+    """One request function per client setup, oldest first."""
+    url = f"{base_url}/chat/completions"
+    headers = {"Authorization": f"Bearer {STUB_API_KEY}"}
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+
+    def new_openai_client():
+        with OpenAI(api_key=STUB_API_KEY, base_url=base_url) as client:
+            return client.chat.completions.create(**chat_payload())
+
+    def shared_openai_client():
+        return openai_client(STUB_API_KEY, base_url).chat.completions.create(**chat_payload())
+
+    return {
+        "requests.post": lambda: requests.post(url, headers=headers, json=chat_payload()).json(),
+        "requests.Session": lambda: session.post(url, headers=headers, json=chat_payload()).json(),
+        "OpenAI per call": new_openai_client,
+        "OpenAI shared": shared_openai_client,
+    }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def benchmark(requests_count=64, concurrency=8, handshake_latency=0.05, response_latency=0.02,
+              pool_size=POOL_SIZE, only=None):
+    """
+    Compare per-request connections with pooled keep-alive clients against a local stub API.
+
+    Args:
+        requests_count: Requests sent per client setup
+        concurrency: Requests in flight at once
+        handshake_latency: Simulated seconds to open a connection (TCP + TLS to a remote API)
+        response_latency: Simulated seconds the API takes per request
+        pool_size: Keep-alive connections kept by the pooled requests.Session
+        only: Client setup name or list of names to run
+    """
+    server = start_stub_server(handshake_latency, response_latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    fns = request_fns(base_url, pool_size)
+    names = [only] if isinstance(only, str) else list(only or fns)
+
+    print(f"{requests_count} requests, {concurrency} concurrent, {handshake_latency * 1000:.0f}ms per new "
+          f"connection, {response_latency * 1000:.0f}ms per response")
+    print(f"{'client':<18}{'wall':>8}{'mean':>9}{'p50':>9}{'p95':>9}{'connections':>13}")
+    for name in names:
+        server.connections = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            latencies = list(executor.map(lambda _: timed(fns[name]), range(requests_count)))
+        elapsed = time.perf_counter() - start
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{name:<18}{elapsed:>7.2f}s{statistics.mean(latencies) * 1000:>7.1f}ms"
+              f"{statistics.median(latencies) * 1000:>7.1f}ms{p95 * 1000:>7.1f}ms{server.connections:>13}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark)
@@ -0,0 +1,53 @@
+import glob
+import hashlib
+import time
+from PIL import Image
+import fire
+from pdf_to_text import extract_text_from_images
+from stub_clients import StubOpenAIClient
+from benchmark_segmentation import EXAMPLES_GLOB
+
+
+def fingerprint_responder(call_number, messages):
+    """Reply with a digest of the image so results can be compared across runs."""
+    image_url = messages[0]["content"][1]["image_url"]["url"]
+    return hashlib.sha1(image_url.encode()).hexdigest()[:12]
+
+
+def benchmark(pattern=EXAMPLES_GLOB, latency=0.2, workers=(1, 2, 4, 8, 16)):
+    """
+    Measure OCR wall time against a stub client that simulates API latency.
+
+    Args:
+        pattern: Glob of page images to OCR
+        latency: Simulated seconds per OCR request
+        workers: max_workers values to compare
+    """
+    images = [Image.open(path) for path in sorted(glob.glob(pattern))]
+    if not images:
+        print(f"No images found for {pattern}")
+        return
+
+    if isinstance(workers, int):
+        workers = (workers,)
+
+    rows = []
+    for max_workers in workers:
+        client = StubOpenAIClient(latency=latency, responder=fingerprint_responder)
+        start = time.perf_counter()
+        pages = extract_text_from_images(images, client, max_workers=max_workers)
+        elapsed = time.perf_counter() - start
+
+        rows.append((max_workers, client.calls, client.peak_in_flight, elapsed, pages))
+
+    print(f"\n{len(images)} pages, {latency * 1000:.0f}ms simulated latency per request")
+    print(f"{'workers':>8}{'requests':>10}{'peak':>6}{'wall time':>12}{'speedup':>9}  ordered")
+    baseline, reference_pages = rows[0][3], rows[0][4]
+    for max_workers, calls, peak, elapsed, pages in rows:
+        # Reassembled text must match the first run regardless of completion order
+        ordered = pages == reference_pages
+        print(f"{max_workers:>8}{calls:>10}{peak:>6}{elapsed:>11.2f}s{baseline / elapsed:>8.1f}x  {'yes' if ordered else 'NO'}")
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark)
@@ -0,0 +1,85 @@
+import difflib
+import glob
+import os
+import re
+import time
+from PIL import Image
+import fire
+from segmentation import segment_image
+from payload_encoder import encode_payload, PAYLOAD_POLICIES, SOURCE_DPI
+from pdf_to_text import extract_text_from_images, get_openai_client
+from benchmark_segmentation import EXAMPLES_GLOB
+from benchmark_problem_splitter import EXAMPLES_DIR
+
+REFERENCE_FILE = os.path.join(EXAMPLES_DIR, "ocr_student.md")
+
+
+def words(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def similarity(text, reference):
+    """Word-level similarity (0-1) of OCR output to the reference transcript, ignoring markup."""
+    return difflib.SequenceMatcher(None, words(text), words(reference), autojunk=False).ratio()
+
+
+def benchmark(pattern=EXAMPLES_GLOB, policies=None, scale=1.0, segment_mode="greedy", live=False,
+              reference_file=REFERENCE_FILE):
+    """
+    Report bytes uploaded per page for each payload policy and, with --live,
+    OCR accuracy against the reference transcript.
+
+    Args:
+        pattern: Glob of page images
+        policies: Policy name or list of names (default: all of PAYLOAD_POLICIES)
+        scale: Upscale factor applied to each page; the screenshots are ~150 DPI, so 2.0 approximates 300 DPI
+        segment_mode: Page segmentation strategy used to cut the segments that are encoded
+        live: OCR the pages with each policy through the OpenAI API (needs OPENAI_API_KEY)
+        reference_file: Transcript the OCR output is compared with
+    """
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        print(f"No images found for {pattern}")
+        return
+    names = [policies] if isinstance(policies, str) else list(policies or PAYLOAD_POLICIES)
+
+    images = []
+    for path in paths:
+        image = Image.open(path).convert("RGB")
+        if scale != 1.0:
+            image = image.resize((int(image.width * scale), int(image.height * scale)))
+        images.append(image)
+    source_dpi = SOURCE_DPI * scale
+    segments = [segment for image in images for segment in segment_image(image, mode=segment_mode)[0]]
+
+    if live:
+        client = get_openai_client()
+        with open(reference_file, 'r') as f:
+            reference = f.read()
+
+    print(f"{len(images)} pages, {len(segments)} segments at ~{source_dpi:.0f} DPI")
+    print(f"{'policy':<16}{'bytes/page':>12}{'vs png':>8}{'Mpx/page':>10}{'encode':>10}  formats"
+          + (f"{'accuracy':>12}" if live else ""))
+    baseline = None
+    for name in names:
+        start = time.perf_counter()
+        encoded = [encode_payload(segment, name, source_dpi) for segment in segments]
+        elapsed = time.perf_counter() - start
+
+        size = sum(len(data) for _, data, _ in encoded)
+        pixels = sum(width * height for _, _, (width, height) in encoded)
+        formats = sorted({image_format for image_format, _, _ in encoded})
+        if baseline is None:
+            baseline = size
+        row = (f"{name:<16}{size / len(images) / 1024:>10.1f}KB{size / baseline:>7.0%} "
+               f"{pixels / len(images) / 1e6:>9.2f}{elapsed * 1000:>8.0f}ms  {'/'.join(formats):<16}")
+
+        if live:
+            pages = extract_text_from_images(images, client, segment_mode=segment_mode, payload=name,
+                                             source_dpi=source_dpi)
+            row += f"{similarity(chr(10).join(pages), reference):>8.1%}"
+        print(row)
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark)
@@ -0,0 +1,129 @@
+import glob
+import json
+import os
+import re
+import tempfile
+import time
+from PIL import Image
+import fire
+from segmentation import segment_image
+from pdf_to_text import extract_text_from_images, encode_segment
+from assessment_parser import process_assessment
+from answer_key import load_answer_key
+from grader import grade_assessment_data
+from pipeline import run_pipeline
+from problem_splitter import split_problems
+from fast_grader import final_answer
+from stub_clients import StubOpenAIClient, StubAnthropicClient, StubGeminiModel
+from benchmark_segmentation import EXAMPLES_GLOB
+from benchmark_problem_splitter import EXAMPLES_DIR
+
+
+def transcript_responder(images, transcript):
+    """
+    Answer OCR requests with consecutive lines of a real transcript.
+
+    The transcript is spread over the segments of all pages in reading
+    order, so the reassembled text contains real problem headers.
+    """
+    segments = [segment for image in images for segment in segment_image(image)[0]]
+    lines = transcript.splitlines()
+    per_segment = -(-len(lines) // len(segments))
+    texts = {
+        encode_segment(segment): "\n".join(lines[i * per_segment:(i + 1) * per_segment])
+        for i, segment in enumerate(segments)
+    }
+
+    def responder(call_number, messages):
+        return texts.get(messages[0]["content"][1]["image_url"]["url"], "")
+    return responder
+
+
+def extraction_responder(call_number, prompt):
+    """Echo each requested problem back from the QUESTIONS section of the prompt."""
+    questions = prompt.split("QUESTIONS:", 1)[-1].split("STUDENT ANSWERS:", 1)[0]
+    slices = split_problems(questions)
+
+    def problem(number):
+        text = slices.get(number, "")
+        return {"problem": text, "student_answer": final_answer(text), "answer_key": ""}
+
+    batch = re.search(r'For EACH of these problems: (\[.*?\])', prompt)
+    if batch:
+        return json.dumps({number: problem(number) for number in json.loads(batch.group(1))})
+    single = re.search(r'EXTRACT INFO FOR PROBLEM ([\d.]+)\.', prompt)
+    if single:
+        return json.dumps(problem(single.group(1)))
+    return json.dumps(list(slices))
+
+
+def benchmark(pattern=EXAMPLES_GLOB, transcript_file=os.path.join(EXAMPLES_DIR, "ocr_student.md"),
+              answer_key_file=os.path.join(EXAMPLES_DIR, "CSC871_Midterm_with_answers.md"),
+              ocr_latency=0.5, extract_latency=1.0, grade_latency=1.0, max_workers=8, extract_workers=4,
+              grading_workers=8, fast_path=False):
+    """
+    Compare phased grading (OCR, then extraction, then grading) with the
+    pipelined stages in pipeline.py, using stub clients.
+
+    Args:
+        pattern: Glob of page images
+        transcript_file: Text the stub OCR returns, spread across the segments
+        answer_key_file: Answer key compiled for both runs
+        ocr_latency, extract_latency, grade_latency: Simulated seconds per request
+        fast_path: Grade numerical and multiple-choice answers locally (off so every problem reaches the grading stage)
+    """
+    # The stubs have no quota; don't let the real per-provider limits pace them
+    for provider in ("OPENAI", "ANTHROPIC", "GEMINI"):
+        os.environ.setdefault(f"{provider}_RPM", "100000")
+
+    images = [Image.open(path).convert("RGB") for path in sorted(glob.glob(pattern))]
+    if not images:
+        print(f"No images found for {pattern}")
+        return
+    with open(transcript_file, 'r') as f:
+        responder = transcript_responder(images, f.read())
+    # Compiled outside the examples directory and loaded into memory, so the scratch copy can go right away
+    with tempfile.TemporaryDirectory() as workdir:
+        compiled_key = load_answer_key(answer_key_file, os.path.join(workdir, "answer_key.compiled.json"))
+
+    def clients():
+        return (StubOpenAIClient(ocr_latency, responder),
+                StubAnthropicClient(extract_latency, extraction_responder),
+                StubGeminiModel(grade_latency))
+
+    openai_client, anthropic_client, gemini_model = clients()
+    start = time.perf_counter()
+    pages = extract_text_from_images(images, openai_client, max_workers=max_workers)
+    text = "\n\n".join(pages)
+    assessment = process_assessment(text, text, compiled_key["text"], compiled_key=compiled_key,
+                                    client=anthropic_client)
+    phased_first_grade = time.perf_counter() - start
+    phased = grade_assessment_data(assessment, max_workers=grading_workers, model=gemini_model,
+                                   fast_path=fast_path)
+    phased_elapsed = time.perf_counter() - start
+    phased_calls = (openai_client.calls, anthropic_client.calls, gemini_model.calls)
+
+    openai_client, anthropic_client, gemini_model = clients()
+    start = time.perf_counter()
+    pipelined = run_pipeline(images, compiled_key, openai_client, anthropic_client, gemini_model,
+                             max_workers=max_workers, extract_workers=extract_workers,
+                             grading_workers=grading_workers, fast_path=fast_path)
+    pipelined_elapsed = time.perf_counter() - start
+    pipelined_calls = (openai_client.calls, anthropic_client.calls, gemini_model.calls)
+
+    print(f"\n{len(images)} pages, latency per request: OCR {ocr_latency}s, extraction {extract_latency}s, "
+          f"grading {grade_latency}s")
+    print(f"{'mode':<10}{'problems':>9}{'score':>8}{'first grade':>13}{'wall time':>11}{'OCR/Claude/Gemini calls':>25}")
+    rows = [
+        ("phased", phased, phased_first_grade, phased_elapsed, phased_calls),
+        ("pipelined", pipelined, pipelined["metadata"]["pipeline"]["first_grade_seconds"], pipelined_elapsed,
+         pipelined_calls),
+    ]
+    for mode, result, first_grade, elapsed, calls in rows:
+        print(f"{mode:<10}{len(result['problems']):>9}{result['overall_score']:>7.1f}%{first_grade:>12.2f}s"
+              f"{elapsed:>10.2f}s{'/'.join(map(str, calls)):>25}")
+    print(f"Speedup: {phased_elapsed / pipelined_elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark)
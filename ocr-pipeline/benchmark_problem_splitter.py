@@ -0,0 +1,54 @@
+import os
+import time
+import fire
+from problem_splitter import split_problems
+from assessment_parser import sliced_texts
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), "..", "docs", "examples")
+
+
+def benchmark(questions_file=os.path.join(EXAMPLES_DIR, "CSC871_Midterm_answer_field.md"),
+              student_answers_file=os.path.join(EXAMPLES_DIR, "ocr_student.md"),
+              answer_key_file=os.path.join(EXAMPLES_DIR, "CSC871_Midterm_with_answers.md")):
+    """
+    Compare per-problem prompt sizes with and without local problem slicing.
+
+    Token counts are estimated at 4 characters per token.
+    """
+    documents = []
+    for path in (questions_file, student_answers_file, answer_key_file):
+        with open(path, 'r') as f:
+            documents.append(f.read())
+
+    start = time.perf_counter()
+    slices = [split_problems(text) for text in documents]
+    elapsed = time.perf_counter() - start
+
+    problem_numbers = list(slices[0])
+    print(f"Split 3 documents in {elapsed * 1000:.2f}ms")
+    for path, doc_slices in zip((questions_file, student_answers_file, answer_key_file), slices):
+        print(f"  {os.path.basename(path)}: {len(doc_slices)} problems found")
+
+    full_chars = sum(len(text) for text in documents)
+    missing = 0
+
+    print(f"\n{'problem':>8}{'full prompt':>14}{'sliced':>10}{'ratio':>8}")
+    total_sliced = 0
+    for number in problem_numbers:
+        texts = [sliced_texts([number], text, doc_slices) for text, doc_slices in zip(documents, slices)]
+        missing += sum(text is full for text, full in zip(texts, documents))
+        sliced_chars = sum(len(text) for text in texts)
+        total_sliced += sliced_chars
+        print(f"{number:>8}{full_chars:>14,}{sliced_chars:>10,}{full_chars / sliced_chars:>7.1f}x")
+
+    total_full = full_chars * len(problem_numbers)
+    print(f"\nPer-problem extraction of {len(problem_numbers)} problems:")
+    print(f"  full documents: {total_full:,} chars (~{total_full // 4:,} tokens)")
+    print(f"  sliced:         {total_sliced:,} chars (~{total_sliced // 4:,} tokens)")
+    print(f"  reduction:      {total_full / total_sliced:.1f}x")
+    if missing:
+        print(f"  {missing} document slice(s) not found, full text used instead")
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark)
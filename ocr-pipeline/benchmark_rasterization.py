@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+from PIL import Image, ImageDraw
+import fire
+from pdf_to_image import pdf_to_images
+
+
+def make_synthetic_pdf(path, pages=24, page_size=(1275, 1650)):
+    """
+    Write a multi-page PDF of text-like scanned pages (letter size at 150 DPI).
+    """
+    images = []
+    for page_num in range(pages):
+        image = Image.new("RGB", page_size, "white")
+        draw = ImageDraw.Draw(image)
+        draw.text((100, 60), f"Synthetic exam page {page_num + 1}", fill="black")
+        for line in range(60):
+            y = 120 + line * 24
+            draw.text((100, y), f"{line + 1}. " + "lorem ipsum dolor sit amet " * 6, fill="black")
+        images.append(image)
+
+    images[0].save(path, "PDF", resolution=150, save_all=True, append_images=images[1:])
+    return path
+
+
+def benchmark(pages=24, dpi=300, workers=(1, 2, 4, 8), pdf_path=None):
+    """
+    Time pdf_to_images on a locally generated PDF for several worker counts.
+
+    Args:
+        pages: Number of pages in the synthetic PDF
+        dpi: Rasterization resolution
+        workers: Worker counts to compare
+        pdf_path: Benchmark an existing PDF instead of generating one
+    """
+    if isinstance(workers, int):
+        workers = (workers,)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if pdf_path is None:
+            pdf_path = make_synthetic_pdf(os.path.join(tmp_dir, "synthetic.pdf"), pages)
+            print(f"Generated {pages}-page synthetic PDF")
+
+        print(f"{'workers':>8}{'pages':>7}{'wall time':>12}{'pages/s':>9}{'speedup':>9}")
+        baseline = None
+        for worker_count in workers:
+            start = time.perf_counter()
+            images = pdf_to_images(pdf_path, dpi=dpi, workers=worker_count)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{worker_count:>8}{len(images):>7}{elapsed:>11.2f}s{len(images) / elapsed:>9.1f}{baseline / elapsed:>8.1f}x")
+            del images
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark)
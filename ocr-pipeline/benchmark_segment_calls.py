@@ -0,0 +1,66 @@
+import glob
+import math
+import os
+from PIL import Image
+import fire
+from segmentation import segment_image, SEGMENT_MODES, MAX_PIXELS, MAX_LONG_SIDE, MAX_SHORT_SIDE
+from benchmark_segmentation import EXAMPLES_GLOB
+
+# GPT-4o high-detail image pricing: a base cost plus a cost per 512px tile
+BASE_TOKENS = 85
+TILE_TOKENS = 170
+TILE_SIZE = 512
+
+
+def image_tokens(width, height):
+    """Estimated GPT-4o input tokens for one high-detail image."""
+    scale = min(1.0, MAX_LONG_SIDE / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, MAX_SHORT_SIDE / min(width, height))
+    width, height = width * scale, height * scale
+    return BASE_TOKENS + TILE_TOKENS * math.ceil(width / TILE_SIZE) * math.ceil(height / TILE_SIZE)
+
+
+def benchmark(pattern=EXAMPLES_GLOB, scale=1.0, max_pixels=MAX_PIXELS):
+    """
+    Report OCR requests, pixels and estimated image tokens per page for each segmentation mode.
+
+    Args:
+        pattern: Glob of page images to segment
+        scale: Upscale factor applied to each page (2.0 approximates 300 DPI)
+        max_pixels: Pixel budget per segment in adaptive mode
+    """
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        print(f"No images found for {pattern}")
+        return
+
+    totals = {mode: [0, 0, 0] for mode in SEGMENT_MODES}
+    header = "".join(f"{mode:>18}" for mode in SEGMENT_MODES)
+    print(f"{'page':<22}{'size':>12}{header}")
+    print(f"{'':<34}" + "".join(f"{'calls/Mpx/tokens':>18}" for _ in SEGMENT_MODES))
+    for path in paths:
+        image = Image.open(path).convert("RGB")
+        if scale != 1.0:
+            image = image.resize((int(image.width * scale), int(image.height * scale)))
+
+        row = f"{os.path.basename(path):<22}{image.width}x{image.height:<6}".ljust(34)
+        for mode in SEGMENT_MODES:
+            segments, _ = segment_image(image, mode=mode, max_pixels=max_pixels)
+            pixels = sum(segment.width * segment.height for segment in segments)
+            tokens = sum(image_tokens(segment.width, segment.height) for segment in segments)
+            for i, value in enumerate((len(segments), pixels, tokens)):
+                totals[mode][i] += value
+            row += f"{f'{len(segments)}/{pixels / 1e6:.2f}/{tokens}':>18}"
+        print(row)
+
+    print(f"\nTotals over {len(paths)} pages:")
+    for mode, (calls, pixels, tokens) in totals.items():
+        print(f"  {mode:<10}{calls:>5} calls ({calls / len(paths):.1f}/page){pixels / 1e6:>8.2f} Mpx{tokens:>8} tokens")
+    greedy_calls = totals["greedy"][0]
+    print(f"Adaptive sends {totals['adaptive'][0]} requests instead of {greedy_calls} "
+          f"({1 - totals['adaptive'][0] / greedy_calls:.0%} fewer)")
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark)
@@ -0,0 +1,117 @@
+import glob
+import os
+import time
+import numpy as np
+from PIL import Image
+import fire
+from segmentation import (
+    segment_image, TARGET_HEIGHT, MIN_HEIGHT, HEIGHT_WEIGHT, STD_WEIGHT
+)
+
+EXAMPLES_GLOB = os.path.join(os.path.dirname(__file__), "..", "docs", "examples", "screenshot-page*.png")
+
+
+def segment_image_reference(image, target_height=TARGET_HEIGHT, min_height=MIN_HEIGHT):
+    """The original row-by-row segmentation loop, kept as the benchmark baseline."""
+    img_array = np.array(image.convert('L'))
+    height, width = img_array.shape
+
+    row_std_devs = np.array([np.std(img_array[i, :]) for i in range(height)])
+
+    window_size = 5
+    kernel = np.ones(window_size) / window_size
+    smoothed_std_devs = np.convolve(row_std_devs, kernel, mode='same')
+
+    segments = []
+    current_start = 0
+
+    while current_start < height - min_height:
+        remaining_height = height - current_start
+
+        if remaining_height <= target_height:
+            segments.append((current_start, height))
+            break
+
+        possible_end = current_start + min_height
+        max_end = min(current_start + target_height * 2, height)
+
+        costs = np.zeros(max_end - possible_end)
+
+        for i in range(possible_end, max_end):
+            segment_height = i - current_start
+            height_cost = HEIGHT_WEIGHT * abs(segment_height - target_height)
+            std_cost = STD_WEIGHT * (smoothed_std_devs[i] ** 2)
+            costs[i - possible_end] = height_cost + std_cost
+
+        min_cost_idx = np.argmin(costs)
+        cut_point = possible_end + min_cost_idx
+
+        segments.append((current_start, cut_point))
+        current_start = cut_point
+
+    image_segments = []
+    for start, end in segments:
+        segment = image.crop((0, start, width, end))
+        image_segments.append(segment)
+
+    return image_segments, segments
+
+
+def time_call(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark(pattern=EXAMPLES_GLOB, scale=2.0, repeat=3):
+    """
+    Compare the reference segmentation loop with the vectorized engine.
+
+    Args:
+        pattern: Glob of page images to segment
+        scale: Upscale factor applied to each page (the screenshots are ~150 DPI, 2.0 approximates 300 DPI)
+        repeat: Number of timing runs per page (best is reported)
+    """
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        print(f"No images found for {pattern}")
+        return
+
+    total_ref = total_greedy = total_dp = 0.0
+    mismatches = 0
+
+    print(f"{'page':<22}{'size':>12}{'reference':>12}{'greedy':>10}{'dp':>10}{'segs':>7}{'dp segs':>9}  match")
+    for path in paths:
+        image = Image.open(path)
+        if scale != 1.0:
+            image = image.resize((int(image.width * scale), int(image.height * scale)))
+
+        t_ref, (_, ref_cuts) = time_call(lambda: segment_image_reference(image), repeat)
+        t_greedy, (_, greedy_cuts) = time_call(lambda: segment_image(image), repeat)
+        t_dp, (_, dp_cuts) = time_call(lambda: segment_image(image, mode="dp"), repeat)
+
+        match = [(int(s), int(e)) for s, e in ref_cuts] == greedy_cuts
+        mismatches += not match
+
+        total_ref += t_ref
+        total_greedy += t_greedy
+        total_dp += t_dp
+
+        size = f"{image.width}x{image.height}"
+        print(f"{os.path.basename(path):<22}{size:>12}{t_ref * 1000:>10.1f}ms{t_greedy * 1000:>8.1f}ms"
+              f"{t_dp * 1000:>8.1f}ms{len(greedy_cuts):>7}{len(dp_cuts):>9}  {'yes' if match else 'NO'}")
+
+    print(f"\nTotal: reference {total_ref * 1000:.1f}ms, greedy {total_greedy * 1000:.1f}ms, dp {total_dp * 1000:.1f}ms")
+    print(f"Greedy speedup: {total_ref / total_greedy:.1f}x")
+    if mismatches:
+        print(f"WARNING: {mismatches} page(s) produced different cut points than the reference")
+    else:
+        print("Greedy cut points identical to reference on all pages")
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark)
@@ -0,0 +1,292 @@
+import datetime
+import glob
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from PIL import Image
+import fire
+from pdf_to_text import extract_text_from_images, get_openai_client
+from ocr_cache import OCRCache
+from assessment_parser import process_assessment, get_anthropic_client
+from answer_key import load_answer_key
+from grader import grade_assessment_data, configure_gemini
+from pipeline import run_pipeline
+from fast_grader import fast_grade
+from stub_clients import (StubOpenAIClient, StubAnthropicClient, StubGeminiModel, Recording,
+                          RecordingOpenAIClient, RecordingAnthropicClient, RecordingGeminiModel)
+from benchmark_segmentation import EXAMPLES_GLOB
+from benchmark_problem_splitter import EXAMPLES_DIR
+from benchmark_pipeline import transcript_responder, extraction_responder
+
+RECORDING_PATH = "benchmark_recordings.json"
+TRANSCRIPT_FILE = os.path.join(EXAMPLES_DIR, "ocr_student.md")
+ANSWER_KEY_FILE = os.path.join(EXAMPLES_DIR, "CSC871_Midterm_with_answers.md")
+REGRESSION_THRESHOLD = 0.2
+
+# The stubs have no quota; don't let the real per-provider limits pace them
+for provider in ("OPENAI", "ANTHROPIC", "GEMINI"):
+    os.environ.setdefault(f"{provider}_RPM", "100000")
+
+
+def grading_responder(call_number, prompt):
+    """Deterministic stand-in for Gemini: rule-based grade when possible, otherwise full marks."""
+    student = prompt.split("STUDENT ANSWER:", 1)[-1].split("CORRECT ANSWER:", 1)[0].strip()
+    expected = prompt.split("CORRECT ANSWER:", 1)[-1].split("Grade the student's answer", 1)[0].strip()
+    result = fast_grade({"student_answer": student, "answer_key": expected}) or (100, "")
+    return json.dumps({"percentage": result[0], "feedback": result[1]})
+
+
+class Fixture:
+    """The docs/examples inputs shared by every benchmark, plus a scratch directory removed by close()."""
+
+    def __init__(self, pattern=EXAMPLES_GLOB):
+        self.images = [Image.open(path).convert("RGB") for path in sorted(glob.glob(pattern))]
+        if not self.images:
+            raise FileNotFoundError(f"No images found for {pattern}")
+        with open(TRANSCRIPT_FILE, 'r') as f:
+            self.transcript = f.read()
+        self.scratch = tempfile.TemporaryDirectory(prefix="ocr-benchmarks-")
+        self.workdir = self.scratch.name
+        # Compile next to the run's scratch files rather than into docs/examples
+        self.compiled_key = load_answer_key(ANSWER_KEY_FILE, os.path.join(self.workdir, "answer_key.compiled.json"))
+
+    def close(self):
+        self.scratch.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def record_responses(fixture, recording, openai_client, anthropic_client, gemini_model):
+    """Run every benchmarked path once, saving each provider response into `recording`."""
+    openai_client = RecordingOpenAIClient(openai_client, recording)
+    anthropic_client = RecordingAnthropicClient(anthropic_client, recording)
+    gemini_model = RecordingGeminiModel(gemini_model, recording)
+
+    text = "\n\n".join(extract_text_from_images(fixture.images, openai_client))
+    key_text = fixture.compiled_key["text"]
+    for batch in (True, False):
+        assessment = process_assessment(text, text, key_text, compiled_key=fixture.compiled_key,
+                                        client=anthropic_client, batch=batch)
+    grade_assessment_data(assessment, model=gemini_model, fast_path=False)
+    run_pipeline(fixture.images, fixture.compiled_key, openai_client, anthropic_client, gemini_model,
+                 fast_path=False)
+    return recording
+
+
+def synthetic_recording(fixture):
+    """
+    A recording built from the docs/examples transcripts instead of live API calls.
+
+    OCR replies are consecutive lines of ocr_student.md, extraction echoes
+    each problem's slice, and grading is rule-based where possible.
+    """
+    recording = Recording()
+    return record_responses(
+        fixture,
+        recording,
+        StubOpenAIClient(0, transcript_responder(fixture.images, fixture.transcript)),
+        StubAnthropicClient(0, extraction_responder),
+        StubGeminiModel(0, grading_responder)
+    )
+
+
+def record(output=RECORDING_PATH, live=False):
+    """
+    Save provider responses for the benchmark inputs.
+
+    Args:
+        output: Recording file to write
+        live: Call the real OpenAI, Anthropic and Gemini APIs (needs API keys);
+              otherwise build a synthetic recording from docs/examples
+    """
+    with Fixture() as fixture:
+        if live:
+            recording = record_responses(fixture, Recording(), get_openai_client(), get_anthropic_client(),
+                                         configure_gemini())
+        else:
+            recording = synthetic_recording(fixture)
+    recording.save(output)
+
+
+class Context:
+    """Fixture, recording and precomputed intermediate results for one suite run."""
+
+    def __init__(self, fixture, recording, latency):
+        self.fixture = fixture
+        self.recording = recording
+        self.latency = latency
+        fallbacks = {
+            "openai": transcript_responder(fixture.images, fixture.transcript),
+            "anthropic": extraction_responder,
+            "gemini": grading_responder,
+        }
+        self.responders = {provider: recording.responder(provider, fallback) for provider, fallback in fallbacks.items()}
+
+        # Inputs for the later stages, produced without simulated latency
+        openai_client, anthropic_client, _ = self.clients(latency=0)
+        self.text = "\n\n".join(extract_text_from_images(fixture.images, openai_client))
+        self.assessment = process_assessment(self.text, self.text, fixture.compiled_key["text"],
+                                             compiled_key=fixture.compiled_key, client=anthropic_client)
+
+        self.cache_path = os.path.join(fixture.workdir, "ocr_cache.sqlite")
+        with OCRCache(self.cache_path) as cache:
+            extract_text_from_images(fixture.images, openai_client, cache=cache)
+
+    def clients(self, latency=None):
+        latency = self.latency if latency is None else latency
+        return (StubOpenAIClient(latency, self.responders["openai"]),
+                StubAnthropicClient(latency, self.responders["anthropic"]),
+                StubGeminiModel(latency, self.responders["gemini"]))
+
+    def fresh_assessment(self):
+        return json.loads(json.dumps(self.assessment))
+
+
+def time_ocr_serial(ctx, clients):
+    extract_text_from_images(ctx.fixture.images, clients[0], max_workers=1)
+
+
+def time_ocr_concurrent(ctx, clients):
+    extract_text_from_images(ctx.fixture.images, clients[0], max_workers=8)
+
+
+def time_ocr_cache_warm(ctx, clients):
+    with OCRCache(ctx.cache_path) as cache:
+        extract_text_from_images(ctx.fixture.images, clients[0], cache=cache)
+
+
+def time_extract_batched(ctx, clients):
+    process_assessment(ctx.text, ctx.text, ctx.fixture.compiled_key["text"], compiled_key=ctx.fixture.compiled_key,
+                       client=clients[1], batch=True)
+
+
+def time_extract_per_problem(ctx, clients):
+    process_assessment(ctx.text, ctx.text, ctx.fixture.compiled_key["text"], compiled_key=ctx.fixture.compiled_key,
+                       client=clients[1], batch=False)
+
+
+def time_grade_llm(ctx, clients):
+    grade_assessment_data(ctx.fresh_assessment(), model=clients[2], fast_path=False)
+
+
+def time_grade_fast_path(ctx, clients):
+    grade_assessment_data(ctx.fresh_assessment(), model=clients[2], fast_path=True)
+
+
+def time_pipeline(ctx, clients):
+    run_pipeline(ctx.fixture.images, ctx.fixture.compiled_key, *clients, fast_path=False)
+
+
+BENCHMARKS = {
+    name[len("time_"):]: fn for name, fn in list(globals().items()) if name.startswith("time_") and callable(fn)
+}
+
+
+def run_benchmark(ctx, fn, repeat):
+    times = []
+    for _ in range(repeat):
+        clients = ctx.clients()
+        start = time.perf_counter()
+        fn(ctx, clients)
+        times.append(time.perf_counter() - start)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "max": max(times),
+        "repeat": repeat,
+        "calls": {"openai": clients[0].calls, "anthropic": clients[1].calls, "gemini": clients[2].calls},
+    }
+
+
+def compare(results, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """Print benchmarks whose median got slower than the baseline by more than `threshold`."""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    print(f"\nCompared with {baseline_path}:")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["median"] / baseline[name]["median"]
+        flag = "REGRESSION" if ratio > 1 + threshold else ("faster" if ratio < 1 - threshold else "")
+        print(f"  {name:<22}{baseline[name]['median']:>9.3f}s -> {result['median']:>7.3f}s  {ratio:>5.2f}x  {flag}")
+        if flag == "REGRESSION":
+            regressions.append(name)
+    return regressions
+
+
+def run(only=None, latency=0.1, repeat=3, recording=RECORDING_PATH, save=None, baseline=None,
+        threshold=REGRESSION_THRESHOLD):
+    """
+    Run the offline benchmark suite against recorded provider responses.
+
+    Args:
+        only: Benchmark name or list of names (default: all of them)
+        latency: Simulated seconds per API request
+        repeat: Runs per benchmark; min/median/max are reported
+        recording: Recording file to replay (a synthetic one is built if it does not exist)
+        save: Write the results to this JSON file (e.g. to use as a baseline later)
+        baseline: Results file from an earlier run to compare against
+        threshold: Relative slowdown of the median reported as a regression
+    """
+    with Fixture() as fixture:
+        if os.path.exists(recording):
+            replay = Recording.load(recording)
+            print(f"Replaying {recording}")
+        else:
+            print(f"No recording at {recording}, using a synthetic one built from docs/examples")
+            replay = synthetic_recording(fixture)
+
+        names = [only] if isinstance(only, str) else list(only or BENCHMARKS)
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            print(f"Unknown benchmarks: {', '.join(unknown)}. Available: {', '.join(BENCHMARKS)}")
+            return
+
+        ctx = Context(fixture, replay, latency)
+        replay.hits = replay.misses = 0
+
+        results = {}
+        for name in names:
+            print(f"\n=== {name} ===")
+            results[name] = run_benchmark(ctx, BENCHMARKS[name], repeat)
+
+        print(f"\n{len(fixture.images)} pages, {latency * 1000:.0f}ms simulated latency per request, {repeat} runs each")
+        print(f"{'benchmark':<22}{'min':>9}{'median':>9}{'max':>9}{'OCR/Claude/Gemini calls':>26}")
+        for name, result in results.items():
+            calls = "/".join(str(result["calls"][provider]) for provider in Recording.PROVIDERS)
+            print(f"{name:<22}{result['min']:>8.3f}s{result['median']:>8.3f}s{result['max']:>8.3f}s{calls:>26}")
+        print(f"Replayed {replay.hits} recorded responses, {replay.misses} requests not in the recording")
+
+        report = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "machine": platform.node(),
+            "python": platform.python_version(),
+            "latency": latency,
+            "recording": recording if os.path.exists(recording) else None,
+            "results": results,
+        }
+        if save:
+            with open(save, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Results saved to {save}")
+        if baseline:
+            regressions = compare(results, baseline, threshold)
+            print(f"{len(regressions)} regression(s)" + (f": {', '.join(regressions)}" if regressions else ""))
+
+
+if __name__ == "__main__":
+    fire.Fire({
+        "run": run,
+        "record": record,
+        "list": lambda: list(BENCHMARKS)
+    })
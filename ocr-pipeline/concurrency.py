@@ -0,0 +1,170 @@
+import functools
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import bind_span, mark_retry
+
+# Default requests-per-minute budget per provider (paid tier 1 quotas).
+# Override with e.g. OPENAI_RPM=1000 in the environment; free-tier Gemini keys need GEMINI_RPM=5.
+PROVIDER_RATE_LIMITS = {
+    "openai": 500,
+    "anthropic": 50,
+    "gemini": 1000,
+}
+
+RATE_LIMIT_RETRIES = 5
+RATE_LIMIT_BACKOFF = 2.0
+
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+
+class RateLimiter:
+    """
+    Token bucket limiting how many requests may start per minute.
+
+    Shared by every thread talking to the same provider so that raising the
+    worker count never pushes us over the provider's quota.
+    """
+
+    def __init__(self, requests_per_minute, provider=None):
+        self.capacity = max(1, int(requests_per_minute))
+        self.rate = requests_per_minute / 60.0
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.provider = provider
+        self.warned = False
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                warn = not self.warned
+                self.warned = True
+            if warn:
+                # From here on the limiter, not max_workers, decides how fast requests go out
+                hint = f" (raise {self.provider.upper()}_RPM if your quota allows)" if self.provider else ""
+                print(f"  Rate limit of {self.rate * 60:g} requests/minute reached; pacing requests{hint}")
+            time.sleep(wait)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider):
+    """Return the process-wide rate limiter for a provider ("openai", "anthropic", "gemini")."""
+    with _rate_limiters_lock:
+        if provider not in _rate_limiters:
+            rpm = os.environ.get(f"{provider.upper()}_RPM", PROVIDER_RATE_LIMITS.get(provider, 60))
+            _rate_limiters[provider] = RateLimiter(float(rpm), provider)
+        return _rate_limiters[provider]
+
+
+def is_rate_limit_error(error):
+    """True for HTTP 429 errors from any of the provider SDKs."""
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    return "rate limit" in str(error).lower()
+
+
+def retry_after_seconds(error, attempt):
+    """Use the provider's Retry-After header when present, otherwise back off exponentially."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return RATE_LIMIT_BACKOFF * (2 ** attempt)
+
+
+def call_with_rate_limit(fn, rate_limiter, *args, **kwargs):
+    """Call fn once a rate limit token is available, retrying on 429 responses."""
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == RATE_LIMIT_RETRIES or not is_rate_limit_error(e):
+                raise
+            delay = retry_after_seconds(e, attempt)
+            print(f"  Rate limited, retrying in {delay:.1f}s...")
+            time.sleep(delay)
+            mark_retry()
+
+
+def call_with_retries(fn, *args, retries=2, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY,
+                      rate_limiter=None, **kwargs):
+    """
+    Call fn, retrying failures with exponential backoff and full jitter.
+
+    Every attempt takes its own rate limit token, and 429s are handled by
+    call_with_rate_limit alone, so `retries` only counts other failures
+    (timeouts, 5xx, malformed responses). A 429 that outlasts its retries
+    is raised rather than retried again.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return call_with_rate_limit(fn, rate_limiter, *args, **kwargs)
+        except Exception as e:
+            if attempt == retries or is_rate_limit_error(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            print(f"  Attempt {attempt + 1} failed ({e}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+            mark_retry()
+
+
+class BoundedExecutor:
+    """
+    Thread pool whose submit() blocks while max_in_flight tasks are pending.
+
+    Blocking the producer keeps memory bounded when pages are fed in lazily:
+    we never hold more than max_in_flight segments waiting for the API.
+
+    With a rate_limiter, tasks run through call_with_rate_limit; without
+    one they run as given, so tasks that do their own retrying (e.g.
+    call_with_retries) are not wrapped in a second retry loop.
+    """
+
+    def __init__(self, max_workers, max_in_flight=None, rate_limiter=None):
+        self.max_workers = max(1, int(max_workers))
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self.rate_limiter = rate_limiter
+        self.pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.slots = threading.BoundedSemaphore(self.max_in_flight)
+
+    def submit(self, fn, *args, **kwargs):
+        self.slots.acquire()
+        try:
+            # Spans opened by the task nest under the submitter's current span
+            task = bind_span(functools.partial(fn, *args, **kwargs))
+            if self.rate_limiter is not None:
+                future = self.pool.submit(call_with_rate_limit, task, self.rate_limiter)
+            else:
+                future = self.pool.submit(task)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=exc_type is None, cancel_futures=exc_type is not None)
+        return False
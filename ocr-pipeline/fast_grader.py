@@ -0,0 +1,163 @@
+import math
+import re
+
+RELATIVE_TOLERANCE = 1e-6
+
+CHOICE_LETTERS = "ABCDEFGH"
+# "B", "(B)", "B.", "B. a=4, b=1", "Option B", "[B]"
+SINGLE_CHOICE = re.compile(r'^(?:[Oo]ption\s+|[Cc]hoice\s+)?[\(\[]?([A-H])(?:[\)\]]?$|[\)\]]?[\.\):]\s*)')
+# "A, B", "A and B", "A & C", "A,B,D"
+MULTI_CHOICE = re.compile(r'^[\(\[]?[A-H][\)\]]?(?:\s*(?:,|and|&|/)\s*[\(\[]?[A-H][\)\]]?)+$')
+# "6", "-18", "1,500", "4.67", "7/4", "50%", "5 cm"
+NUMBER = re.compile(r'^([+-]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?|[+-]?\.\d+)(?:\s*/\s*(\d+(?:\.\d+)?))?\s*(%|[A-Za-z]+)?$')
+
+ANSWER_LABEL = re.compile(r'^\s*(?:[-*]\s*)?\**\s*(?:your\s+|final\s+|student\s+)?answer\s*\**\s*:\s*\**', re.IGNORECASE)
+
+
+def final_answer(text):
+    """
+    The answer itself, without working or markdown.
+
+    Uses the last "Answer: ..." line when there is one, otherwise the whole text.
+    """
+    if not text:
+        return ""
+
+    lines = [line for line in str(text).splitlines() if line.strip()]
+    labelled = [ANSWER_LABEL.sub("", line) for line in lines if ANSWER_LABEL.match(line)]
+    answer = labelled[-1] if labelled else "\n".join(lines)
+
+    answer = answer.replace("**", "").replace("`", "").replace("−", "-")
+    return answer.strip().rstrip(".").strip()
+
+
+def parse_choices(answer):
+    """
+    Letters selected in a multiple-choice answer, or None if it is not one.
+    """
+    if len(answer) == 1 and answer.upper() in CHOICE_LETTERS:
+        return frozenset(answer.upper())
+
+    if MULTI_CHOICE.match(answer):
+        return frozenset(re.findall(r'[A-H]', answer))
+
+    match = SINGLE_CHOICE.match(answer)
+    return frozenset(match.group(1)) if match else None
+
+
+def parse_number(answer):
+    """
+    (value, unit) for a numeric answer, or None if it is not a single number.
+    """
+    match = NUMBER.match(answer.strip())
+    if not match:
+        return None
+
+    value = float(match.group(1).replace(",", ""))
+    if match.group(2):
+        denominator = float(match.group(2))
+        if denominator == 0:
+            return None
+        value /= denominator
+    unit = (match.group(3) or "").lower()
+    if unit == "%":
+        value /= 100
+        unit = ""
+    return value, unit
+
+
+def numeric_tolerance(expected_text, expected_value):
+    """
+    Accept anything that rounds to the expected answer at the precision it was written with.
+    """
+    digits = re.search(r'\.(\d+)', expected_text)
+    half_last_place = 0.5 * 10 ** -len(digits.group(1)) if digits else 0.0
+    return max(RELATIVE_TOLERANCE * abs(expected_value), half_last_place, 1e-9)
+
+
+def grade_choices(expected, selected):
+    if selected == expected:
+        return 100, ""
+    if selected < expected:
+        # Partial selections may earn partial credit; leave that to the rubric-aware LLM
+        return None
+    return 0, f"Selected {', '.join(sorted(selected))}; the correct answer is {', '.join(sorted(expected))}."
+
+
+def grade_number(tolerance, expected, answer, has_working):
+    expected_value, expected_unit = expected
+    value, unit = answer
+    if expected_unit and unit and expected_unit != unit:
+        return None
+
+    if math.isclose(value, expected_value, rel_tol=0, abs_tol=tolerance):
+        return 100, ""
+    if has_working:
+        # Wrong final number but with working shown: partial credit is a judgement call
+        return None
+    return 0, f"Answered {value:g}; the correct answer is {expected_value:g}."
+
+
+def parse_expected(problem_data, answer_type):
+    """
+    (choices, (value, unit), tolerance) parsed from the problem's expected answer; unparsed parts are None.
+    """
+    expected_text = final_answer(problem_data.get("expectedAnswer") or problem_data.get("answer_key", ""))
+    if not expected_text:
+        return None, None, None
+
+    expected_choices = parse_choices(expected_text) if answer_type in (None, "multiple-choice") else None
+    expected_number = parse_number(expected_text) if answer_type in (None, "numerical") else None
+    tolerance = numeric_tolerance(expected_text, expected_number[0]) if expected_number else None
+    return expected_choices, expected_number, tolerance
+
+
+def expected_from_normalized(normalized, answer_type):
+    """
+    The same as parse_expected, read from an answer key's compiled "normalized" entry.
+    """
+    if answer_type not in (None, normalized["type"]):
+        return None, None, None
+    if normalized["type"] == "multiple-choice":
+        return frozenset(normalized["choices"]), None, None
+    if normalized["type"] == "numerical":
+        return None, (normalized["value"], normalized["unit"]), normalized["tolerance"]
+    return None, None, None
+
+
+def fast_grade(problem_data):
+    """
+    Grade numerical and multiple-choice answers without calling an LLM.
+
+    Uses problem_data["answerType"] ("numerical" / "multiple-choice") when
+    present and otherwise infers the type from the expected answer. The
+    answer key's precompiled problem_data["normalized"] is used when present,
+    so the expected answer is parsed once per key rather than per submission.
+
+    Returns:
+        tuple: (percentage, feedback), or None when the answer needs the LLM
+    """
+    answer_type = problem_data.get("answerType") or problem_data.get("answer_type")
+    student_text = problem_data.get("student_answer", "")
+    answer_text = final_answer(student_text)
+
+    normalized = problem_data.get("normalized")
+    if normalized:
+        expected_choices, expected_number, tolerance = expected_from_normalized(normalized, answer_type)
+    else:
+        expected_choices, expected_number, tolerance = parse_expected(problem_data, answer_type)
+    if expected_choices is None and expected_number is None:
+        return None
+
+    if not answer_text:
+        return 0, "No answer provided."
+
+    if expected_choices is not None:
+        selected = parse_choices(answer_text)
+        return grade_choices(expected_choices, selected) if selected is not None else None
+
+    number = parse_number(answer_text)
+    if number is None:
+        return None
+    has_working = len([line for line in str(student_text).splitlines() if line.strip()]) > 1
+    return grade_number(tolerance, expected_number, number, has_working)
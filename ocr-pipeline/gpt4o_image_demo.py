@@ -1,6 +1,6 @@
 import os
 import base64
-from openai import OpenAI
+from provider_clients import openai_client
 import convert_pdf
 
 # Function to encode image to base64
@@ -32,8 +32,8 @@ def analyze_image_with_openai(pil_image, prompt="Describe this image in detail")
     # Remove temp file
     os.remove(temp_image_path)
     
-    # Initialize OpenAI client
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    # Shared client: later images reuse its open connection
+    client = openai_client(os.environ.get("OPENAI_API_KEY"), os.environ.get("OPENAI_BASE_URL"))
     
     # Create payload with image
     response = client.chat.completions.create(
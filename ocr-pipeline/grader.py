@@ -5,26 +5,35 @@ import google.generativeai as genai
 import fire
 from dotenv import load_dotenv
 from pprint import pprint
+from concurrency import BoundedExecutor, call_with_retries, get_rate_limiter
+from fast_grader import fast_grade
+from answer_key import load_answer_key, apply_answer_key
+from instrumentation import span, traced_run, record_usage
 
 # Load environment variables from .env file
 load_dotenv()
 
+GEMINI_MODEL = 'gemini-2.5-pro-exp-03-25'
+GRADING_WORKERS = 8
+GRADING_TIMEOUT = 120
+GRADING_RETRIES = 2
+
 def configure_gemini():
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
         raise ValueError("No Gemini API key found in environment variables")
     genai.configure(api_key=api_key)
-    return genai.GenerativeModel('gemini-2.5-pro-exp-03-25')
+    return genai.GenerativeModel(GEMINI_MODEL)
 
-def grade_problem(problem_data, model=None):
-    if model is None:
-        model = configure_gemini()
-    
+class GradingParseError(ValueError):
+    pass
+
+def build_grading_prompt(problem_data):
     problem = problem_data.get("problem", "")
     student_answer = problem_data.get("student_answer", "")
     answer_key = problem_data.get("answer_key", "")
     
-    prompt = f"""
+    return f"""
     PROBLEM:
     {problem}
     
@@ -44,41 +53,113 @@ def grade_problem(problem_data, model=None):
       "feedback": "brief explanation if points deducted, otherwise empty string"
     }}
     """
-    
-    try:
-        response = model.generate_content(prompt)
+
+def request_grade(problem_data, model, timeout=None):
+    """
+    Ask Gemini for a grade, raising on API errors and unparseable replies.
+    """
+    prompt = build_grading_prompt(problem_data)
+    request_options = {"timeout": timeout} if timeout else None
+    with span("gemini.grade", bytes_sent=len(prompt.encode("utf-8"))) as call:
+        response = model.generate_content(prompt, request_options=request_options)
+        record_usage(call, response, GEMINI_MODEL)
         content = response.text
         
         json_match = re.search(r'({[\s\S]*})', content)
-        if json_match:
-            json_str = json_match.group(1)
-            result = json.loads(json_str)
-            return result.get("percentage", 0), result.get("feedback", "")
-        else:
-            return 0, "Error: Could not parse grading response"
-            
+        if not json_match:
+            raise GradingParseError("Could not parse grading response")
+        
+        result = json.loads(json_match.group(1))
+    return result.get("percentage", 0), result.get("feedback", "")
+
+def grading_error(error):
+    if isinstance(error, GradingParseError):
+        return 0, "Error: Could not parse grading response"
+    return 0, f"Error grading problem: {str(error)}"
+
+def grade_problem(problem_data, model=None, timeout=None):
+    if model is None:
+        model = configure_gemini()
+    
+    try:
+        return request_grade(problem_data, model, timeout)
     except Exception as e:
-        return 0, f"Error grading problem: {str(e)}"
+        return grading_error(e)
 
-def grade_assessment_data(assessment_data, save_output=False, output_file="graded_assessment.json"):
-    model = configure_gemini()
+def grade_assessment_data(assessment_data, save_output=False, output_file="graded_assessment.json",
+                          max_workers=GRADING_WORKERS, timeout=GRADING_TIMEOUT, retries=GRADING_RETRIES, model=None,
+                          fast_path=True, answer_key=None):
+    """
+    Grade every problem, running up to max_workers Gemini requests at once.
+    
+    With fast_path, numerical and multiple-choice answers that can be
+    decided by fast_grader are graded locally and never reach Gemini.
+    A compiled answer_key (answer_key.load_answer_key) supplies expected
+    answers for problems that do not carry one.
     
+    Each request is cut off after `timeout` seconds and retried up to
+    `retries` times with jittered exponential backoff. Results are written
+    back in problem order no matter which request finishes first.
+    """
     problems = assessment_data.get("problems", {})
     total_problems = len(problems)
     
     print(f"Grading {total_problems} problems...")
     
-    total_score = 0
+    if answer_key is not None:
+        apply_answer_key(problems, answer_key)
     
-    for i, (problem_id, problem_data) in enumerate(problems.items()):
-        print(f"Grading problem {problem_id} ({i+1}/{total_problems})...")
-        
-        percentage, feedback = grade_problem(problem_data, model)
+    local_grades = {}
+    if fast_path:
+        with span("rules.grade", problems=total_problems) as rules:
+            for problem_id, problem_data in problems.items():
+                result = fast_grade(problem_data)
+                if result is not None:
+                    local_grades[problem_id] = result
+            rules.set(graded=len(local_grades))
+    
+    if model is None and len(local_grades) < total_problems:
+        model = configure_gemini()
+    
+    rate_limiter = get_rate_limiter("gemini")
+    futures = {}
+    
+    with BoundedExecutor(max_workers) as executor:
+        for i, (problem_id, problem_data) in enumerate(problems.items()):
+            if problem_id in local_grades:
+                print(f"Graded problem {problem_id} ({i+1}/{total_problems}) locally")
+                continue
+            print(f"Grading problem {problem_id} ({i+1}/{total_problems})...")
+            futures[problem_id] = executor.submit(
+                call_with_retries, request_grade, problem_data, model, timeout,
+                retries=retries, rate_limiter=rate_limiter
+            )
         
-        problem_data["grade_percentage"] = percentage
-        problem_data["feedback"] = feedback
+        total_score = 0
         
-        total_score += percentage
+        for problem_id, problem_data in problems.items():
+            if problem_id in local_grades:
+                percentage, feedback = local_grades[problem_id]
+                problem_data["graded_by"] = "rules"
+            else:
+                try:
+                    percentage, feedback = futures[problem_id].result()
+                except Exception as e:
+                    percentage, feedback = grading_error(e)
+                problem_data["graded_by"] = "llm"
+            
+            problem_data["grade_percentage"] = percentage
+            problem_data["feedback"] = feedback
+            
+            total_score += percentage
+    
+    assessment_data["grading_stats"] = {
+        "fast_path": len(local_grades),
+        "llm": total_problems - len(local_grades)
+    }
+    if total_problems > 0:
+        print(f"Fast path: {len(local_grades)}/{total_problems} problems "
+              f"({100 * len(local_grades) / total_problems:.0f}%) graded without an LLM call")
     
     if total_problems > 0:
         assessment_data["overall_score"] = total_score / total_problems
@@ -98,34 +179,47 @@ def grade_assessment_data(assessment_data, save_output=False, output_file="grade
     
     return assessment_data
 
-def grade_assessment_file(assessment_file, output_file="graded_assessment.json"):
+def grade_assessment_file(assessment_file, output_file="graded_assessment.json", max_workers=GRADING_WORKERS,
+                          fast_path=True, answer_key_path=None, trace_file=None):
     with open(assessment_file, 'r') as f:
         assessment_data = json.load(f)
     
-    return grade_assessment_data(assessment_data, True, output_file)
+    answer_key = load_answer_key(answer_key_path) if answer_key_path else None
+    with traced_run("grade_assessment", trace_file):
+        return grade_assessment_data(assessment_data, True, output_file, max_workers, fast_path=fast_path,
+                                     answer_key=answer_key)
 
-def grade_pdf(pdf_path, answer_key_path, save_intermediate=False, output_file="graded_assessment.json"):
+def grade_pdf(pdf_path, answer_key_path, save_intermediate=False, output_file="graded_assessment.json", workers=1,
+              pipelined=False, trace_file=None):
+    if pipelined:
+        from pipeline import grade_pdf_pipelined
+        return grade_pdf_pipelined(pdf_path, answer_key_path, output_file if save_intermediate else None,
+                                   workers=workers, trace_file=trace_file)
+    
     from assessment_parser import parse_pdf_to_assessment
     
     print(f"Processing PDF assessment: {pdf_path}")
     print(f"Using answer key: {answer_key_path}")
     
-    assessment_data = parse_pdf_to_assessment(
-        pdf_path, 
-        answer_key_path, 
-        save_intermediate
-    )
-    
-    if assessment_data:
-        output = output_file if save_intermediate else None
-        return grade_assessment_data(
-            assessment_data, 
-            save_intermediate, 
-            output
+    with traced_run("grade_pdf", trace_file, pdf=pdf_path):
+        assessment_data = parse_pdf_to_assessment(
+            pdf_path, 
+            answer_key_path, 
+            save_intermediate,
+            workers
         )
-    else:
-        print("Error: Failed to parse assessment from PDF")
-        return None
+        
+        if assessment_data:
+            output = output_file if save_intermediate else None
+            with span("grade_assessment"):
+                return grade_assessment_data(
+                    assessment_data, 
+                    save_intermediate, 
+                    output
+                )
+        else:
+            print("Error: Failed to parse assessment from PDF")
+            return None
 
 def check_environment():
     required_keys = {
@@ -149,7 +243,8 @@ def check_environment():
     
     return True
 
-def process_pdf_assessment(pdf_path, answer_key_path, save_intermediate=False, output_file="graded_assessment.json"):
+def process_pdf_assessment(pdf_path, answer_key_path, save_intermediate=False, output_file="graded_assessment.json",
+                           workers=1, pipelined=False, trace_file=None):
     """
     Complete end-to-end pipeline: PDF → Text → Assessment Analysis → Grading
     
@@ -158,6 +253,10 @@ def process_pdf_assessment(pdf_path, answer_key_path, save_intermediate=False, o
         answer_key_path: Path to the answer key text file
         save_intermediate: Whether to save intermediate results to files
         output_file: Where to save the final graded assessment JSON
+        workers: Number of parallel pdftoppm processes used to rasterize the PDF
+        pipelined: Overlap OCR, extraction and grading (see pipeline.py) instead of running them one after another
+        trace_file: Record per-stage and per-call timings, bytes, tokens and retries to this file
+            (.jsonl for JSON lines, .json for OpenTelemetry OTLP/JSON) and print a summary table
         
     Returns:
         dict: Graded assessment results
@@ -165,7 +264,7 @@ def process_pdf_assessment(pdf_path, answer_key_path, save_intermediate=False, o
     if not check_environment():
         return None
         
-    return grade_pdf(pdf_path, answer_key_path, save_intermediate, output_file)
+    return grade_pdf(pdf_path, answer_key_path, save_intermediate, output_file, workers, pipelined, trace_file)
 
 if __name__ == "__main__":
     fire.Fire({
@@ -0,0 +1,414 @@
+import contextlib
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+import fire
+
+# USD per million tokens (input, output); update when provider pricing changes
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "claude-3-7-sonnet-20250219": (3.00, 15.00),
+    "gemini-2.5-pro-exp-03-25": (1.25, 10.00),
+}
+
+# Spans with these names are external API calls; they are costed in the summary
+EXTERNAL_CALLS = ("openai.ocr", "anthropic.problem_numbers", "anthropic.extract", "anthropic.extract_batch",
+                  "gemini.grade")
+# Span counters for OCR requests that were answered without calling the API
+SKIPPED_CALLS = {"cache_hits": "cached", "blank_skipped": "blank", "duplicates_reused": "duplicate"}
+
+
+class Span:
+    """
+    One timed operation: wall and CPU time plus free-form attributes.
+
+    Attributes recorded by the pipeline include bytes_sent, image_width,
+    image_height, model, input_tokens, output_tokens, retry and the
+    SKIPPED_CALLS counters.
+    """
+
+    def __init__(self, tracer, name, parent, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else tracer.trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.error = None
+        self.start_time = time.time()
+        self.start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        self.wall_seconds = None
+        self.cpu_seconds = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key, amount=1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def end(self, error=None):
+        self.wall_seconds = time.perf_counter() - self.start
+        self.cpu_seconds = time.thread_time() - self.cpu_start
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+        self.tracer.finish(self)
+
+    def as_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class NullSpan:
+    """Stands in for a Span while tracing is off so callers never need to check."""
+
+    def set(self, **attributes):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """
+    Collects spans for one run and writes them to a trace file.
+
+    `.jsonl` files get one span per line as soon as it ends; any other
+    extension gets an OpenTelemetry (OTLP/JSON) document written by close().
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.jsonl = open(path, 'a') if path and path.endswith(".jsonl") else None
+
+    def current(self):
+        stack = getattr(self.local, "stack", None)
+        return stack[-1] if stack else None
+
+    def start(self, name, parent=None, **attributes):
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        new_span = Span(self, name, parent or self.current(), attributes)
+        if getattr(self.local, "retry", False):
+            new_span.set(retry=True)
+            self.local.retry = False
+        self.local.stack.append(new_span)
+        return new_span
+
+    def finish(self, ended):
+        stack = getattr(self.local, "stack", [])
+        if ended in stack:
+            stack.remove(ended)
+        with self.lock:
+            self.spans.append(ended)
+            if self.jsonl:
+                self.jsonl.write(json.dumps(ended.as_dict(), default=str) + "\n")
+                self.jsonl.flush()
+
+    def close(self):
+        with self.lock:
+            if self.jsonl:
+                self.jsonl.close()
+                self.jsonl = None
+            elif self.path:
+                with open(self.path, 'w') as f:
+                    json.dump(to_otlp([s.as_dict() for s in self.spans]), f, indent=2, default=str)
+
+
+_tracer = None
+
+
+def start_trace(path=None):
+    """
+    Start recording spans for a run.
+
+    Args:
+        path: Trace file (.jsonl for JSON lines, e.g. .json for OTLP/JSON);
+              spans are only kept in memory for the summary if omitted
+    """
+    global _tracer
+    _tracer = Tracer(path)
+    return _tracer
+
+
+def finish_trace(print_table=True):
+    """Write the trace file, print the summary table and stop recording."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    tracer.close()
+    spans = [s.as_dict() for s in tracer.spans]
+    if print_table:
+        print_summary(spans)
+        if tracer.path:
+            print(f"Trace written to {tracer.path}")
+    return spans
+
+
+@contextlib.contextmanager
+def span(name, parent=None, **attributes):
+    """
+    Time a block as a span: `with span("gemini.grade", problem=n) as s: s.set(...)`.
+
+    Yields NULL_SPAN, and records nothing, while no trace is running.
+    """
+    tracer = _tracer
+    if tracer is None:
+        yield NULL_SPAN
+        return
+
+    current = tracer.start(name, parent, **attributes)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(e)
+        raise
+    current.end()
+
+
+@contextlib.contextmanager
+def traced_run(name, trace_file=None, **attributes):
+    """
+    Root span for a command line run.
+
+    Starts a trace when trace_file (or the TRACE_FILE environment variable)
+    is set and no trace is running yet, and finishes it afterwards with a
+    summary table. Nested runs just add a span to the running trace.
+    """
+    trace_file = trace_file or os.environ.get("TRACE_FILE")
+    owns_trace = _tracer is None and bool(trace_file)
+    if owns_trace:
+        start_trace(trace_file)
+    try:
+        with span(name, **attributes) as root:
+            yield root
+    finally:
+        if owns_trace:
+            finish_trace()
+
+
+def current_span():
+    """The innermost open span on this thread, or NULL_SPAN outside a traced run."""
+    current = _tracer.current() if _tracer is not None else None
+    return current or NULL_SPAN
+
+
+def mark_retry():
+    """Tag the next span started on this thread as a retry of a failed call."""
+    if _tracer is not None:
+        _tracer.local.retry = True
+
+
+def bind_span(fn, parent=None):
+    """
+    Run fn on another thread as a child of `parent` (default: the current span).
+    """
+    if _tracer is None:
+        return fn
+    parent = parent or _tracer.current()
+    if parent is None:
+        return fn
+    tracer = _tracer
+
+    @functools.wraps(fn)
+    def bound(*args, **kwargs):
+        if not hasattr(tracer.local, "stack"):
+            tracer.local.stack = []
+        tracer.local.stack.append(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            tracer.local.stack.remove(parent)
+    return bound
+
+
+def record_usage(target, response, model=None):
+    """Copy token counts from an OpenAI, Anthropic or Gemini response onto a span."""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        input_tokens = getattr(usage, "input_tokens", None) or getattr(usage, "prompt_tokens", None)
+        output_tokens = getattr(usage, "output_tokens", None) or getattr(usage, "completion_tokens", None)
+    else:
+        usage = getattr(response, "usage_metadata", None)
+        input_tokens = getattr(usage, "prompt_token_count", None)
+        output_tokens = getattr(usage, "candidates_token_count", None)
+    if isinstance(input_tokens, int):
+        target.set(input_tokens=input_tokens)
+    if isinstance(output_tokens, int):
+        target.set(output_tokens=output_tokens)
+    if model:
+        target.set(model=model)
+
+
+def span_cost(attributes):
+    prices = MODEL_PRICES.get(attributes.get("model"))
+    if not prices:
+        return 0.0
+    return (attributes.get("input_tokens", 0) * prices[0] + attributes.get("output_tokens", 0) * prices[1]) / 1e6
+
+
+def summarize_spans(spans):
+    """
+    Aggregate spans by name.
+
+    Returns:
+        dict: Span name -> count, errors, retries, wall/CPU seconds, bytes, tokens, estimated cost
+              and skipped calls
+    """
+    rows = {}
+    for s in spans:
+        attributes = s.get("attributes", {})
+        row = rows.setdefault(s["name"], {
+            "count": 0, "errors": 0, "retries": 0, "wall_seconds": 0.0, "max_wall_seconds": 0.0,
+            "cpu_seconds": 0.0, "bytes_sent": 0, "pixels": 0, "input_tokens": 0, "output_tokens": 0,
+            "cost_usd": 0.0, **{counter: 0 for counter in SKIPPED_CALLS},
+        })
+        row["count"] += 1
+        row["errors"] += s.get("status") == "error"
+        row["retries"] += bool(attributes.get("retry"))
+        row["wall_seconds"] += s.get("wall_seconds") or 0.0
+        row["max_wall_seconds"] = max(row["max_wall_seconds"], s.get("wall_seconds") or 0.0)
+        row["cpu_seconds"] += s.get("cpu_seconds") or 0.0
+        row["bytes_sent"] += attributes.get("bytes_sent", 0)
+        row["pixels"] += attributes.get("image_width", 0) * attributes.get("image_height", 0)
+        row["input_tokens"] += attributes.get("input_tokens", 0)
+        row["output_tokens"] += attributes.get("output_tokens", 0)
+        row["cost_usd"] += span_cost(attributes)
+        for counter in SKIPPED_CALLS:
+            row[counter] += attributes.get(counter, 0)
+    return rows
+
+
+def print_summary(spans):
+    rows = summarize_spans(spans)
+    if not rows:
+        print("No spans recorded")
+        return
+
+    print(f"\n{'span':<26}{'count':>6}{'err':>5}{'retry':>6}{'wall':>10}{'max':>9}{'cpu':>9}"
+          f"{'sent':>10}{'tokens in':>11}{'tokens out':>11}{'cost':>9}")
+    for name, row in sorted(rows.items(), key=lambda item: -item[1]["wall_seconds"]):
+        print(f"{name:<26}{row['count']:>6}{row['errors']:>5}{row['retries']:>6}{row['wall_seconds']:>9.2f}s"
+              f"{row['max_wall_seconds']:>8.2f}s{row['cpu_seconds']:>8.2f}s{format_bytes(row['bytes_sent']):>10}"
+              f"{row['input_tokens']:>11,}{row['output_tokens']:>11,}{'$' + format(row['cost_usd'], '.4f'):>9}")
+
+    external = [row for name, row in rows.items() if name in EXTERNAL_CALLS]
+    print(f"External calls: {sum(row['count'] for row in external)}, "
+          f"estimated cost ${sum(row['cost_usd'] for row in external):.4f}")
+    skipped = {label: sum(row[counter] for row in rows.values()) for counter, label in SKIPPED_CALLS.items()}
+    if any(skipped.values()):
+        print(f"Calls skipped: {sum(skipped.values())} "
+              f"({', '.join(f'{count} {label}' for label, count in skipped.items())})")
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def from_otlp_value(value):
+    if "intValue" in value:
+        return int(value["intValue"])
+    for key in ("boolValue", "doubleValue", "stringValue"):
+        if key in value:
+            return value[key]
+    return None
+
+
+def to_otlp(spans):
+    """Spans as an OTLP/JSON ExportTraceServiceRequest, loadable by Jaeger and other OpenTelemetry tools."""
+    otlp_spans = []
+    for s in spans:
+        start_ns = int(s["start_time"] * 1e9)
+        attributes = dict(s["attributes"], cpu_seconds=s["cpu_seconds"])
+        otlp_span = {
+            "traceId": s["trace_id"],
+            "spanId": s["span_id"],
+            "name": s["name"],
+            "kind": 3 if s["name"] in EXTERNAL_CALLS else 1,
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int((s["wall_seconds"] or 0) * 1e9)),
+            "attributes": [{"key": key, "value": otlp_value(value)} for key, value in attributes.items()],
+            "status": {"code": 2, "message": s["error"]} if s["status"] == "error" else {"code": 1},
+        }
+        if s["parent_id"]:
+            otlp_span["parentSpanId"] = s["parent_id"]
+        otlp_spans.append(otlp_span)
+
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "ocr-pipeline"}}]},
+        "scopeSpans": [{"scope": {"name": "instrumentation"}, "spans": otlp_spans}],
+    }]}
+
+
+def load_trace(path):
+    """Read spans back from a .jsonl or OTLP/JSON trace file."""
+    with open(path, 'r') as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        document = json.load(f)
+
+    spans = []
+    for resource in document.get("resourceSpans", []):
+        for scope in resource.get("scopeSpans", []):
+            for s in scope.get("spans", []):
+                attributes = {a["key"]: from_otlp_value(a["value"]) for a in s.get("attributes", [])}
+                start_ns = int(s["startTimeUnixNano"])
+                spans.append({
+                    "trace_id": s["traceId"],
+                    "span_id": s["spanId"],
+                    "parent_id": s.get("parentSpanId"),
+                    "name": s["name"],
+                    "start_time": start_ns / 1e9,
+                    "wall_seconds": (int(s["endTimeUnixNano"]) - start_ns) / 1e9,
+                    "cpu_seconds": attributes.pop("cpu_seconds", 0.0),
+                    "status": "error" if s.get("status", {}).get("code") == 2 else "ok",
+                    "error": s.get("status", {}).get("message"),
+                    "attributes": attributes,
+                })
+    return spans
+
+
+def summary(trace_file):
+    """Print the per-span summary table for a saved trace file."""
+    print_summary(load_trace(trace_file))
+
+
+if __name__ == "__main__":
+    fire.Fire(summary)
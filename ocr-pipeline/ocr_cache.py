@@ -0,0 +1,132 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from payload_encoder import DEFAULT_PAYLOAD, SOURCE_DPI, resolve_policy
+
+DEFAULT_CACHE_PATH = os.environ.get("OCR_CACHE_PATH", ".ocr_cache.sqlite")
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+
+def segment_cache_key(segment, prompt, model, payload=DEFAULT_PAYLOAD, source_dpi=SOURCE_DPI):
+    """
+    Content address for an OCR result: the segment's decoded pixels plus the prompt and model.
+
+    Hashing pixels rather than the encoded PNG keeps the key stable across
+    PIL versions and encoder settings. Payload policies other than the
+    default send the model a different image, so they are part of the key,
+    and so is source_dpi for policies that resample by it.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{segment.mode}:{segment.width}x{segment.height}\0".encode())
+    digest.update(segment.tobytes())
+    digest.update(f"\0{model}\0{prompt}".encode())
+    if payload != DEFAULT_PAYLOAD:
+        digest.update(f"\0{payload}".encode())
+    if resolve_policy(payload)["dpi"]:
+        digest.update(f"\0{source_dpi}dpi".encode())
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Persistent SQLite cache of OCR text with size-bounded LRU eviction.
+
+    Safe to share between the OCR worker threads. Usable as a context
+    manager that closes the database on exit.
+
+    Args:
+        path: SQLite database file
+        max_bytes: Evict least recently used entries once stored text exceeds this size
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_results ("
+            " key TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON ocr_results (last_access)")
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT text FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE ocr_results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, text):
+        # A None completion (e.g. a refused or truncated request) is not worth replaying
+        if text is None:
+            return
+        size = len(text.encode("utf-8"))
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, text, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, text, size, time.time())
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self.conn.execute("SELECT key, size FROM ocr_results ORDER BY last_access").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM ocr_results WHERE key = ?", stale)
+        self.evictions += len(stale)
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM ocr_results")
+            self.conn.commit()
+            self.conn.execute("VACUUM")
+
+    def stats(self):
+        with self.lock:
+            entries, total = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_results"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
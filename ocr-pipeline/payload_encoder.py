@@ -0,0 +1,109 @@
+import base64
+import io
+import numpy as np
+from PIL import Image
+
+# Resolution pages are rasterized at unless the caller says otherwise
+SOURCE_DPI = 150
+JPEG_QUALITY = 85
+WEBP_QUALITY = 85
+
+MIME_TYPES = {"PNG": "image/png", "WEBP": "image/webp", "JPEG": "image/jpeg"}
+
+# How a segment is turned into the image sent with an OCR request:
+#   color: "RGB" keeps the scan as is, "L" grayscale, "1" black and white (Otsu threshold)
+#   dpi: downsample segments rendered above this resolution (None keeps them)
+#   formats: the segment is encoded in each and the smallest is sent
+PAYLOAD_POLICIES = {
+    "png": {"color": "RGB", "dpi": None, "formats": ("PNG",)},
+    "gray": {"color": "L", "dpi": None, "formats": ("PNG", "WEBP", "JPEG")},
+    "gray-100dpi": {"color": "L", "dpi": 100, "formats": ("PNG", "WEBP", "JPEG")},
+    "binary": {"color": "1", "dpi": None, "formats": ("PNG", "WEBP")},
+    "binary-100dpi": {"color": "1", "dpi": 100, "formats": ("PNG", "WEBP")},
+}
+# Lossless full-color PNG, as the pipeline always sent
+DEFAULT_PAYLOAD = "png"
+
+
+def resolve_policy(policy):
+    """A policy dict from its name in PAYLOAD_POLICIES, or the dict itself."""
+    if isinstance(policy, dict):
+        return policy
+    if policy not in PAYLOAD_POLICIES:
+        raise ValueError(f"Unknown payload policy '{policy}', expected one of {tuple(PAYLOAD_POLICIES)}")
+    return PAYLOAD_POLICIES[policy]
+
+
+def otsu_threshold(gray_array):
+    """Gray level that best separates ink from paper (maximizes between-class variance)."""
+    histogram = np.bincount(gray_array.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight = np.cumsum(histogram)
+    mean = np.cumsum(histogram * levels)
+    total_weight, total_mean = weight[-1], mean[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = (total_mean * weight - mean * total_weight) ** 2 / (weight * (total_weight - weight))
+    return int(np.argmax(np.nan_to_num(between)))
+
+
+def binarize(gray):
+    gray_array = np.asarray(gray)
+    return Image.fromarray(gray_array > otsu_threshold(gray_array)).convert('1')
+
+
+def prepare_segment(segment, policy=DEFAULT_PAYLOAD, source_dpi=SOURCE_DPI):
+    """
+    Apply a policy's color reduction and downsampling to a segment.
+
+    Downsampling happens in grayscale before thresholding, so strokes stay
+    connected instead of being decimated.
+    """
+    policy = resolve_policy(policy)
+    image = segment
+    if policy["color"] != "RGB":
+        image = image.convert('L')
+    elif image.mode != "RGB":
+        image = image.convert('RGB')
+
+    if policy["dpi"] and source_dpi and source_dpi > policy["dpi"]:
+        scale = policy["dpi"] / source_dpi
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS)
+
+    if policy["color"] == "1":
+        image = binarize(image)
+    return image
+
+
+def encode_as(image, image_format):
+    buffered = io.BytesIO()
+    if image_format == "PNG":
+        image.save(buffered, format="PNG", optimize=image.mode == "1")
+    elif image_format == "WEBP":
+        image.save(buffered, format="WEBP", lossless=image.mode == "1", quality=WEBP_QUALITY)
+    else:
+        image.convert('L' if image.mode in ("1", "L") else 'RGB').save(buffered, format="JPEG", quality=JPEG_QUALITY)
+    return buffered.getvalue()
+
+
+def encode_payload(segment, policy=DEFAULT_PAYLOAD, source_dpi=SOURCE_DPI):
+    """
+    Encode a segment for a vision request.
+
+    Args:
+        segment: PIL image of the segment
+        policy: Name in PAYLOAD_POLICIES or a dict with color, dpi and formats
+        source_dpi: Resolution the segment was rasterized at
+
+    Returns:
+        tuple: (image format, encoded bytes, prepared image size)
+    """
+    policy = resolve_policy(policy)
+    image = prepare_segment(segment, policy, source_dpi)
+    encoded = {image_format: encode_as(image, image_format) for image_format in policy["formats"]}
+    image_format = min(encoded, key=lambda name: len(encoded[name]))
+    return image_format, encoded[image_format], image.size
+
+
+def to_data_url(image_format, data):
+    return f"data:{MIME_TYPES[image_format]};base64,{base64.b64encode(data).decode('utf-8')}"
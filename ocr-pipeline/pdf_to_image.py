@@ -1,19 +1,96 @@
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import span
 import os
 
 
-def pdf_to_images(pdf_path, dpi=300):
+def pdf_to_images(pdf_path, dpi=300, workers=1):
     """
     Convert a PDF to an array of PIL Images
     
     Args:
         pdf_path (str): Path to the PDF file
         dpi (int): DPI for image resolution (higher = better quality)
+        workers (int): Number of pdftoppm processes rasterizing page ranges in parallel
         
     Returns:
         list: Array of PIL Image objects
     """
-    return convert_from_path(pdf_path, dpi=dpi)
+    if workers <= 1:
+        return convert_from_path(pdf_path, dpi=dpi)
+    
+    return rasterize_pages(pdf_path, dpi, 1, get_page_count(pdf_path), workers)
+
+def split_page_range(first_page, last_page, parts):
+    """
+    Split an inclusive page range into at most `parts` contiguous (first, last) ranges
+    """
+    page_count = last_page - first_page + 1
+    parts = max(1, min(parts, page_count))
+    base, extra = divmod(page_count, parts)
+    
+    ranges = []
+    start = first_page
+    for i in range(parts):
+        end = start + base + (1 if i < extra else 0) - 1
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+def rasterize_pages(pdf_path, dpi, first_page, last_page, workers=1):
+    """
+    Rasterize an inclusive page range, spreading it over `workers` pdftoppm processes
+    
+    Each worker thread drives its own pdftoppm subprocess on a contiguous
+    slice of the range, so the rendering runs in parallel processes while
+    the decoded pages come back in this process without pickling. Pages are
+    returned in document order.
+    """
+    ranges = split_page_range(first_page, last_page, workers)
+    if len(ranges) == 1:
+        return convert_from_path(pdf_path, dpi=dpi, first_page=first_page, last_page=last_page)
+    
+    with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+        chunks = pool.map(
+            lambda page_range: convert_from_path(pdf_path, dpi=dpi, first_page=page_range[0], last_page=page_range[1]),
+            ranges
+        )
+        return [page for chunk in chunks for page in chunk]
+
+def get_page_count(pdf_path):
+    """
+    Number of pages in a PDF, read from its metadata without rasterizing anything
+    """
+    return pdfinfo_from_path(pdf_path)["Pages"]
+
+def iter_pdf_pages(pdf_path, dpi=300, window_size=1, page_count=None, workers=1):
+    """
+    Lazily rasterize a PDF, yielding one PIL Image per page
+    
+    Only `window_size` pages are converted (and held in memory) at a time,
+    using pdf2image's first_page/last_page range, so peak memory depends on
+    the window rather than on the length of the document.
+    
+    Args:
+        pdf_path (str): Path to the PDF file
+        dpi (int): DPI for image resolution (higher = better quality)
+        window_size (int): Number of pages to rasterize at a time (at least `workers`)
+        page_count (int): Total pages, if already known
+        workers (int): Number of pdftoppm processes rasterizing each window in parallel
+        
+    Yields:
+        PIL.Image: Each page in order
+    """
+    if page_count is None:
+        page_count = get_page_count(pdf_path)
+    window_size = max(1, int(window_size), int(workers))
+    
+    for first_page in range(1, page_count + 1, window_size):
+        last_page = min(first_page + window_size - 1, page_count)
+        with span("rasterize", first_page=first_page, last_page=last_page, dpi=dpi, workers=workers):
+            window = rasterize_pages(pdf_path, dpi, first_page, last_page, workers)
+        while window:
+            yield window.pop(0)
 
 # Optional utility function for saving images - not part of core functionality
 def save_images(images, output_dir="pdf_images", format="PNG", prefix="page"):
@@ -1,66 +1,27 @@
 import os
-import base64
-import io
-import numpy as np
 from PIL import Image
-from openai import OpenAI
-from pdf_to_image import pdf_to_images
+from provider_clients import openai_client
+from pdf_to_image import iter_pdf_pages, get_page_count
+from segmentation import segment_image
+from concurrency import BoundedExecutor, get_rate_limiter
+from ocr_cache import OCRCache, segment_cache_key, DEFAULT_CACHE_PATH
+from segment_filter import SegmentFilter, BLANK, DUPLICATE
+from payload_encoder import encode_payload, to_data_url, DEFAULT_PAYLOAD, SOURCE_DPI
+from concurrent.futures import Future
+from instrumentation import span, traced_run, record_usage
 import fire
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Default settings
-TARGET_HEIGHT = 400
-MIN_HEIGHT = 200
-HEIGHT_WEIGHT = 1.0
-STD_WEIGHT = 5.0
 IMAGE_DIR = "pdf_images"
+OCR_MODEL = "gpt-4o"
+MAX_WORKERS = 8
 
-def segment_image(image, target_height=TARGET_HEIGHT, min_height=MIN_HEIGHT):
-    img_array = np.array(image.convert('L'))
-    height, width = img_array.shape
-    
-    row_std_devs = np.array([np.std(img_array[i, :]) for i in range(height)])
-    
-    window_size = 5
-    kernel = np.ones(window_size) / window_size
-    smoothed_std_devs = np.convolve(row_std_devs, kernel, mode='same')
-    
-    segments = []
-    current_start = 0
-    
-    while current_start < height - min_height:
-        remaining_height = height - current_start
-        
-        if remaining_height <= target_height:
-            segments.append((current_start, height))
-            break
-        
-        possible_end = current_start + min_height
-        max_end = min(current_start + target_height * 2, height)
-        
-        costs = np.zeros(max_end - possible_end)
-        
-        for i in range(possible_end, max_end):
-            segment_height = i - current_start
-            height_cost = HEIGHT_WEIGHT * abs(segment_height - target_height)
-            std_cost = STD_WEIGHT * (smoothed_std_devs[i] ** 2)
-            costs[i - possible_end] = height_cost + std_cost
-        
-        min_cost_idx = np.argmin(costs)
-        cut_point = possible_end + min_cost_idx
-        
-        segments.append((current_start, cut_point))
-        current_start = cut_point
-    
-    image_segments = []
-    for start, end in segments:
-        segment = image.crop((0, start, width, end))
-        image_segments.append(segment)
-    
-    return image_segments, segments
+OCR_PROMPT = """
+    Do OCR on this image. OUTPUT NOTHING ELSE. Use Unicode math symbols if applicable. DO NOT USE LATEX. If no text, return empty string.
+    """
 
 def save_segments(image_segments, page_num, output_dir=IMAGE_DIR):
     segments_dir = os.path.join(output_dir, f"segments_p{page_num}")
@@ -80,65 +41,152 @@ def get_openai_client():
     if not api_key:
         raise ValueError("No OpenAI API key found in environment variables")
     
-    return OpenAI(api_key=api_key)
+    return openai_client(api_key, os.environ.get("OPENAI_BASE_URL"))
 
-def extract_text_from_images(images, client=None, save_segments_to_disk=False):
-    if client is None:
-        client = get_openai_client()
+def encode_segment(segment, payload=DEFAULT_PAYLOAD, source_dpi=SOURCE_DPI):
+    image_format, data, _ = encode_payload(segment, payload, source_dpi)
+    return to_data_url(image_format, data)
+
+def ocr_segment(segment, client, prompt=OCR_PROMPT, model=OCR_MODEL, payload=DEFAULT_PAYLOAD, source_dpi=SOURCE_DPI):
+    with span("openai.ocr", model=model, image_width=segment.width, image_height=segment.height) as call:
+        image_format, data, (width, height) = encode_payload(segment, payload, source_dpi)
+        image_url = to_data_url(image_format, data)
+        call.set(bytes_sent=len(image_url) + len(prompt), payload_format=image_format, payload_bytes=len(data),
+                 payload_width=width, payload_height=height)
+        
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": image_url
+                            }
+                        }
+                    ]
+                }
+            ],
+            max_tokens=1500
+        )
+        
+        record_usage(call, response, model)
+        text = response.choices[0].message.content
+        call.set(bytes_received=len(text or ""))
     
-    prompt = """
-    Do OCR on this image. OUTPUT NOTHING ELSE. Use Unicode math symbols if applicable. DO NOT USE LATEX. If no text, return empty string.
+    return text
+
+def report_segment_done(page_num, segment_num):
+    def callback(future):
+        if future.exception() is None:
+            print(f"  ✓ Page {page_num} segment {segment_num} processed")
+        else:
+            print(f"  ✗ Page {page_num} segment {segment_num} failed: {future.exception()}")
+    return callback
+
+def completed_future(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+def store_in_cache(cache, key):
+    def callback(future):
+        if future.exception() is None:
+            cache.put(key, future.result())
+    return callback
+
+def extract_text_from_images(images, client=None, save_segments_to_disk=False, segment_mode="greedy",
+                             max_workers=MAX_WORKERS, max_in_flight=None, prompt=OCR_PROMPT, cache=None,
+                             segment_filter=None, payload=DEFAULT_PAYLOAD, source_dpi=SOURCE_DPI):
     """
+    OCR every segment of every page, keeping up to max_workers requests in flight.
     
-    all_text = []
+    Pages are segmented as they arrive from `images` (a list or any iterable),
+    and submitting blocks once max_in_flight segments are pending, so lazily
+    produced pages are only pulled as fast as the API drains them.
     
-    for i, image in enumerate(images):
-        print(f"Processing page {i+1}...")
-        
-        image_segments, segment_coords = segment_image(image)
-        print(f"  Created {len(image_segments)} segments")
-        
-        if save_segments_to_disk:
-            save_segments(image_segments, i+1)
-        
-        page_segments_text = []
-        for j, segment in enumerate(image_segments):
-            print(f"  Processing segment {j+1}/{len(image_segments)}...")
+    When an OCRCache is given, segments whose pixels were OCR'd before with
+    the same prompt and model are answered from it without an API call.
+    
+    When a SegmentFilter is given, blank segments are answered with an empty
+    string and exact copies of an earlier segment reuse its request.
+    
+    `payload` picks how segments are encoded (see payload_encoder.PAYLOAD_POLICIES);
+    source_dpi is the resolution the pages were rasterized at.
+    
+    Returns:
+        list: One string per page, segment text joined in reading order
+    """
+    if client is None:
+        client = get_openai_client()
+    
+    page_futures = []
+    
+    with BoundedExecutor(max_workers, max_in_flight, get_rate_limiter("openai")) as executor:
+        for i, image in enumerate(images):
+            print(f"Processing page {i+1}...")
             
-            buffered = io.BytesIO()
-            segment.save(buffered, format="PNG")
-            base64_image = base64.b64encode(buffered.getvalue()).decode("utf-8")
+            with span("segment", page=i+1, image_width=image.width, image_height=image.height) as segment_span:
+                image_segments, segment_coords = segment_image(image, mode=segment_mode)
+                segment_span.set(segments=len(image_segments))
+            print(f"  Created {len(image_segments)} segments")
             
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=1500
-            )
+            if save_segments_to_disk:
+                save_segments(image_segments, i+1)
             
-            segment_text = response.choices[0].message.content
-            page_segments_text.append(segment_text)
-            print(f"  ✓ Segment {j+1} processed")
+            # Skipped calls are counted on this span, which stays open while they are decided
+            with span("ocr.submit", page=i+1, segments=len(image_segments)) as page_span:
+                futures = []
+                for j, segment in enumerate(image_segments):
+                    fingerprint = None
+                    if segment_filter is not None:
+                        status, earlier = segment_filter.check(segment)
+                        if status == BLANK:
+                            page_span.add("blank_skipped")
+                            futures.append(completed_future(""))
+                            continue
+                        if status == DUPLICATE:
+                            print(f"  ✓ Page {i+1} segment {j+1} reuses an identical earlier segment")
+                            page_span.add("duplicates_reused")
+                            futures.append(earlier)
+                            continue
+                        fingerprint = earlier
+                    
+                    if cache is not None:
+                        key = segment_cache_key(segment, prompt, OCR_MODEL, payload, source_dpi)
+                        cached_text = cache.get(key)
+                        if cached_text is not None:
+                            print(f"  ✓ Page {i+1} segment {j+1} loaded from cache")
+                            page_span.add("cache_hits")
+                            future = completed_future(cached_text)
+                            if segment_filter is not None:
+                                segment_filter.remember(fingerprint, future)
+                            futures.append(future)
+                            continue
+                    
+                    future = executor.submit(ocr_segment, segment, client, prompt, OCR_MODEL, payload, source_dpi)
+                    if cache is not None:
+                        future.add_done_callback(store_in_cache(cache, key))
+                    future.add_done_callback(report_segment_done(i+1, j+1))
+                    if segment_filter is not None:
+                        segment_filter.remember(fingerprint, future)
+                    futures.append(future)
+            page_futures.append(futures)
         
-        page_text = "\n".join(page_segments_text)
-        all_text.append(page_text)
-        print(f"✓ Page {i+1} processed with {len(image_segments)} segments")
+        all_text = []
+        for i, futures in enumerate(page_futures):
+            page_text = "\n".join(future.result() for future in futures)
+            all_text.append(page_text)
+            print(f"✓ Page {i+1} processed with {len(futures)} segments")
     
     return all_text
 
-def pdf_to_text(pdf_path, save_segments=False, save_text=False, output_file=None, dpi=150):
+def pdf_to_text(pdf_path, save_segments=False, save_text=False, output_file=None, dpi=150, segment_mode="greedy",
+                max_workers=MAX_WORKERS, page_window=1, workers=1, use_cache=True, clear_cache=False, cache_path=DEFAULT_CACHE_PATH,
+                client=None, cache=None, skip_blank=True, dedupe=True, payload=DEFAULT_PAYLOAD, trace_file=None):
     """
     Convert PDF to text using GPT-4o's vision capabilities.
     
@@ -148,16 +196,59 @@ def pdf_to_text(pdf_path, save_segments=False, save_text=False, output_file=None
         save_text: Whether to save the extracted text to a file
         output_file: Path to save the text file (defaults to PDF path with .txt extension)
         dpi: Resolution for PDF to image conversion
+        segment_mode: Page segmentation strategy ("greedy", "dp" or "adaptive")
+        max_workers: Maximum number of concurrent OCR requests
+        page_window: Number of pages rasterized at a time (bounds peak memory)
+        workers: Number of parallel pdftoppm processes used for rasterization
+        use_cache: Reuse OCR results for segments seen before (--nouse_cache to bypass)
+        clear_cache: Empty the OCR cache before processing
+        cache_path: SQLite file backing the OCR cache
+        client: OpenAI client to reuse (created from the environment if omitted)
+        cache: Open OCRCache to reuse across calls; left open for the caller
+        skip_blank: Don't send segments without text to the API (--noskip_blank to send them)
+        dedupe: Reuse the OCR result of pixel-identical segments, e.g. headers repeated on every page (--nodedupe to bypass)
+        payload: How segments are encoded for the API, a name from payload_encoder.PAYLOAD_POLICIES
+        trace_file: Record stage and API call timings to this file (.jsonl or OTLP .json) and print a summary
     
     Returns:
         str: The extracted text from the PDF
     """
-    print(f"Converting PDF to images: {pdf_path}")
-    images = pdf_to_images(pdf_path, dpi=dpi)
-    print(f"Found {len(images)} pages - processing")
+    owns_cache = cache is None
+    if owns_cache:
+        cache = OCRCache(cache_path) if use_cache or clear_cache else None
+    if clear_cache:
+        cache.clear()
+        print(f"Cleared OCR cache at {cache_path}")
+        if not use_cache:
+            cache.close()
+            cache = None
     
-    client = get_openai_client()
-    all_text = extract_text_from_images(images, client, save_segments)
+    try:
+        with traced_run("pdf_to_text", trace_file, pdf=pdf_path, dpi=dpi) as run:
+            print(f"Converting PDF to images: {pdf_path}")
+            page_count = get_page_count(pdf_path)
+            images = iter_pdf_pages(pdf_path, dpi=dpi, window_size=page_window, page_count=page_count,
+                                    workers=workers)
+            print(f"Found {page_count} pages - processing")
+            run.set(pages=page_count)
+            
+            if client is None:
+                client = get_openai_client()
+            segment_filter = SegmentFilter(skip_blank, dedupe) if skip_blank or dedupe else None
+            all_text = extract_text_from_images(images, client, save_segments, segment_mode, max_workers, cache=cache,
+                                                segment_filter=segment_filter, payload=payload, source_dpi=dpi)
+            
+            if segment_filter is not None:
+                stats = segment_filter.stats()
+                print(f"Skipped OCR calls: {stats['blank']} blank segments, {stats['duplicates']} duplicates")
+            
+            if cache is not None:
+                stats = cache.stats()
+                print(f"OCR cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+    finally:
+        # Also when OCR or rasterization raised, so the SQLite handle is not leaked
+        if owns_cache and cache is not None:
+            cache.close()
     
     # Join all text with double newlines between pages, no page markers
     formatted_text = "\n\n".join(all_text)
@@ -0,0 +1,526 @@
+import datetime
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import fire
+from dotenv import load_dotenv
+from pdf_to_image import iter_pdf_pages, get_page_count
+from segmentation import segment_image
+from pdf_to_text import ocr_segment, get_openai_client, OCR_PROMPT, OCR_MODEL, MAX_WORKERS
+from ocr_cache import OCRCache, segment_cache_key, DEFAULT_CACHE_PATH
+from segment_filter import SegmentFilter, BLANK, DUPLICATE
+from payload_encoder import DEFAULT_PAYLOAD, SOURCE_DPI
+from concurrency import call_with_rate_limit, call_with_retries, get_rate_limiter
+from problem_splitter import split_problems, problem_slice
+from answer_key import load_answer_key, answer_key_entry, attach_key_entry
+from assessment_parser import (TokenUsage, get_anthropic_client, get_problem_numbers, generate_problem_json,
+                               generate_problems_json, is_valid_problem, BATCH_CHUNK_SIZE)
+from fast_grader import fast_grade
+from instrumentation import span, traced_run, bind_span, current_span
+from grader import (configure_gemini, request_grade, grading_error, GRADING_WORKERS, GRADING_TIMEOUT,
+                    GRADING_RETRIES)
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Items each stage may queue up for the next one before it has to wait
+QUEUE_SIZE = 16
+EXTRACT_WORKERS = 4
+
+STAGE_DONE = object()
+
+
+class StageMetrics:
+    """
+    Throughput and latency of one pipeline stage.
+
+    `waiting_input` is time spent waiting for the previous stage and
+    `blocked_output` is time spent waiting for room in the next stage's
+    queue (backpressure). Neither counts towards `busy`.
+    """
+
+    def __init__(self, name, workers, clock_start):
+        self.name = name
+        self.workers = workers
+        self.clock_start = clock_start
+        self.items = 0
+        self.outputs = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.max_latency = 0.0
+        self.waiting_input = 0.0
+        self.blocked_output = 0.0
+        self.first_output = None
+        self.finished = None
+        self.lock = threading.Lock()
+
+    def as_dict(self):
+        elapsed = (self.finished or time.perf_counter()) - self.clock_start
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "outputs": self.outputs,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy, 3),
+            "mean_latency": round(self.busy / self.items, 3) if self.items else None,
+            "max_latency": round(self.max_latency, 3),
+            "waiting_input_seconds": round(self.waiting_input, 3),
+            "blocked_output_seconds": round(self.blocked_output, 3),
+            "first_output_at": round(self.first_output - self.clock_start, 3) if self.first_output else None,
+            "finished_at": round(elapsed, 3),
+            "items_per_second": round(self.items / elapsed, 3) if elapsed > 0 else None,
+        }
+
+
+class Stage:
+    """
+    A pool of threads taking items from `inbox` and putting results on `outbox`.
+
+    `fn(item)` returns an iterable of outputs (zero, one or many per item).
+    Queues are bounded, so a slow stage makes the ones before it block
+    instead of piling up pages or segments in memory. When the last worker
+    sees STAGE_DONE, `flush()` gets a chance to emit what it held back and
+    STAGE_DONE is passed on.
+    """
+
+    def __init__(self, name, fn, inbox, outbox, workers=1, flush=None, clock_start=None):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.flush = flush
+        self.metrics = StageMetrics(name, workers, clock_start or time.perf_counter())
+        self.active = workers
+        # First exception raised by fn or flush; the stage keeps draining its inbox regardless
+        self.failure = None
+        # Worker threads record their spans under the span that built the pipeline
+        self.threads = [threading.Thread(target=bind_span(self.run), name=f"{name}-{i}", daemon=True)
+                        for i in range(workers)]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def emit(self, output):
+        start = time.perf_counter()
+        self.outbox.put(output)
+        now = time.perf_counter()
+        with self.metrics.lock:
+            self.metrics.blocked_output += now - start
+            self.metrics.outputs += 1
+            if self.metrics.first_output is None:
+                self.metrics.first_output = now
+        return now - start
+
+    def process(self, outputs):
+        """Emit every output, returning the time spent blocked on the next queue."""
+        return sum(self.emit(output) for output in outputs)
+
+    def run(self):
+        metrics = self.metrics
+        while True:
+            start = time.perf_counter()
+            item = self.inbox.get()
+            started = time.perf_counter()
+            with metrics.lock:
+                metrics.waiting_input += started - start
+
+            if item is STAGE_DONE:
+                # Let the other workers of this stage see it too
+                self.inbox.put(STAGE_DONE)
+                break
+
+            blocked = 0.0
+            error = False
+            try:
+                with span(f"pipeline.{self.name}"):
+                    blocked = self.process(self.fn(item))
+            except Exception as e:
+                print(f"Error in {self.name} stage: {e}")
+                error = True
+                with metrics.lock:
+                    self.failure = self.failure or e
+
+            latency = time.perf_counter() - started - blocked
+            with metrics.lock:
+                metrics.items += 1
+                metrics.errors += error
+                metrics.busy += latency
+                metrics.max_latency = max(metrics.max_latency, latency)
+
+        with metrics.lock:
+            self.active -= 1
+            last = self.active == 0
+        if last:
+            if self.flush is not None:
+                try:
+                    self.process(self.flush())
+                except Exception as e:
+                    print(f"Error flushing {self.name} stage: {e}")
+                    self.failure = self.failure or e
+            metrics.finished = time.perf_counter()
+            self.outbox.put(STAGE_DONE)
+
+
+class ProblemAssembler:
+    """
+    Reassembles OCR'd segments into the document and releases finished problems.
+
+    Segments arrive in any order; pages are appended once all their segments
+    are in. A page without segments arrives as a single item with a segment
+    count of 0 and adds an empty page. A problem counts as finished when the next problem's header has
+    been seen, so it can be extracted and graded while later pages are still
+    being OCR'd. Whatever is left is released when the OCR stage is done.
+    
+    Problems finished by the same page are released together (at most
+    chunk_size at a time) so they can share one extraction call.
+    """
+
+    def __init__(self, find_problem_numbers=None, chunk_size=BATCH_CHUNK_SIZE):
+        self.find_problem_numbers = find_problem_numbers
+        self.chunk_size = max(1, int(chunk_size))
+        self.segments = {}
+        self.segment_counts = {}
+        self.page_texts = []
+        self.released = []
+
+    def text(self):
+        # Same layout as pdf_to_text: segments joined by newlines, pages by blank lines
+        return "\n\n".join(self.page_texts)
+
+    def add(self, item):
+        page, segment, segment_count, text = item
+        page_segments = self.segments.setdefault(page, {})
+        if segment_count:
+            page_segments[segment] = text
+        self.segment_counts[page] = segment_count
+
+        advanced = False
+        while len(self.segments.get(len(self.page_texts), ())) == self.segment_counts.get(len(self.page_texts)):
+            page_segments = self.segments.pop(len(self.page_texts))
+            self.page_texts.append("\n".join(page_segments[i] for i in range(len(page_segments))))
+            advanced = True
+
+        return self.release(final=False) if advanced else []
+
+    def release(self, final):
+        text = self.text()
+        slices = split_problems(text)
+        numbers = list(slices)
+        if not final:
+            # The last problem seen may continue on the next page
+            numbers = numbers[:-1]
+
+        ready = [number for number in numbers if number not in self.released]
+        self.released.extend(ready)
+        return self.chunks([(number, slices[number]) for number in ready])
+
+    def chunks(self, problems):
+        return [problems[i:i + self.chunk_size] for i in range(0, len(problems), self.chunk_size)]
+
+    def flush(self):
+        ready = self.release(final=True)
+        if not self.released and self.find_problem_numbers is not None:
+            # No headers the splitter recognizes: let Claude list the problems
+            text = self.text()
+            numbers = [number for number in self.find_problem_numbers(text) if number not in self.released]
+            self.released.extend(numbers)
+            ready = self.chunks([(number, text) for number in numbers])
+        return ready
+
+
+def run_pipeline(images, compiled_key, openai_client=None, anthropic_client=None, gemini_model=None,
+                 segment_mode="greedy", max_workers=MAX_WORKERS, extract_workers=EXTRACT_WORKERS,
+                 grading_workers=GRADING_WORKERS, queue_size=QUEUE_SIZE, cache=None, fast_path=True,
+                 timeout=GRADING_TIMEOUT, retries=GRADING_RETRIES, chunk_size=BATCH_CHUNK_SIZE,
+                 segment_filter=None, payload=DEFAULT_PAYLOAD, source_dpi=SOURCE_DPI):
+    """
+    Grade a document with rasterize, segment, OCR, assemble, extract and grade
+    running as concurrent stages connected by bounded queues.
+
+    Args:
+        images: Iterable of page images, consumed lazily by the rasterize stage
+        compiled_key: Answer key from answer_key.load_answer_key
+        openai_client, anthropic_client, gemini_model: API clients (created from the environment if omitted)
+        segment_mode: Page segmentation strategy ("greedy", "dp" or "adaptive")
+        max_workers: Concurrent OCR requests
+        extract_workers: Concurrent Claude extraction requests
+        grading_workers: Concurrent Gemini grading requests
+        queue_size: Capacity of each queue between stages
+        chunk_size: Most problems sent in one extraction call
+        cache: Open OCRCache to consult before OCR requests
+        segment_filter: SegmentFilter answering blank and repeated segments without a request
+        payload: How segments are encoded for OCR (see payload_encoder.PAYLOAD_POLICIES)
+        source_dpi: Resolution the pages were rasterized at
+        fast_path: Grade numerical and multiple-choice answers locally when possible
+
+    Returns:
+        dict: Graded assessment, with per-stage metrics under metadata.pipeline
+    """
+    if openai_client is None:
+        openai_client = get_openai_client()
+    if anthropic_client is None:
+        anthropic_client = get_anthropic_client()
+    if gemini_model is None:
+        gemini_model = configure_gemini()
+
+    usage = TokenUsage()
+    key_text = compiled_key["text"]
+    key_slices = {number: entry["text"] for number, entry in compiled_key["problems"].items()}
+    openai_limiter = get_rate_limiter("openai")
+    anthropic_limiter = get_rate_limiter("anthropic")
+    gemini_limiter = get_rate_limiter("gemini")
+
+    def rasterize(source):
+        for i, image in enumerate(source):
+            print(f"Rasterized page {i+1}")
+            yield i, image
+
+    def segment(item):
+        page, image = item
+        image_segments, _ = segment_image(image, mode=segment_mode)
+        if not image_segments:
+            # Still tell the assembler the page is done, or no later page could be appended
+            yield page, None, 0, None
+        for j, crop in enumerate(image_segments):
+            yield page, j, len(image_segments), crop
+
+    def read_segment(page, j, crop):
+        key = segment_cache_key(crop, OCR_PROMPT, OCR_MODEL, payload, source_dpi) if cache is not None else None
+        text = cache.get(key) if cache is not None else None
+        if text is not None:
+            current_span().add("cache_hits")
+        else:
+            try:
+                text = call_with_rate_limit(ocr_segment, openai_limiter, crop, openai_client, OCR_PROMPT, OCR_MODEL,
+                                            payload, source_dpi)
+            except Exception as e:
+                # Fails the OCR stage and so the run; grading the problem on a blank answer would look like a real score
+                print(f"  ✗ Page {page+1} segment {j+1} failed: {e}")
+                raise
+            if cache is not None:
+                cache.put(key, text)
+        return text
+
+    def ocr(item):
+        page, j, segment_count, crop = item
+        if segment_count == 0:
+            yield item
+            return
+        if segment_filter is None:
+            yield page, j, segment_count, read_segment(page, j, crop)
+            return
+
+        status, earlier = segment_filter.check(crop)
+        if status == BLANK:
+            current_span().add("blank_skipped")
+            text = ""
+        elif status == DUPLICATE:
+            current_span().add("duplicates_reused")
+            text = earlier.result()
+        else:
+            # Later duplicates wait on this future instead of sending their own request
+            future = Future()
+            segment_filter.remember(earlier, future)
+            try:
+                text = read_segment(page, j, crop)
+            except Exception as e:
+                # Duplicates waiting on this segment fail with it instead of waiting forever
+                future.set_exception(e)
+                raise
+            future.set_result(text)
+        yield page, j, segment_count, text
+
+    def find_problem_numbers(text):
+        return get_problem_numbers(text, text, key_text, anthropic_client, usage)
+
+    assembler = ProblemAssembler(find_problem_numbers, chunk_size)
+
+    def problem_key_text(number):
+        # Covered problems take their answer key from the compiled index afterwards
+        return "" if answer_key_entry(compiled_key, number) else problem_slice(key_slices, number, key_text)
+
+    def extract(problems):
+        numbers = [number for number, _ in problems]
+        extracted = {}
+        if len(problems) > 1:
+            print(f"Extracting problems {', '.join(numbers)} in one request...")
+            text = "\n\n".join(dict.fromkeys(text for _, text in problems))
+            extracted = call_with_rate_limit(generate_problems_json, anthropic_limiter, numbers, text, text,
+                                             "\n\n".join(dict.fromkeys(map(problem_key_text, numbers))),
+                                             anthropic_client, usage)
+
+        for number, text in problems:
+            problem_data = extracted.get(number)
+            if problem_data is None:
+                print(f"Extracting problem {number}...")
+                problem_data = call_with_rate_limit(generate_problem_json, anthropic_limiter, number, text, text,
+                                                    problem_key_text(number), anthropic_client, usage)
+            if not is_valid_problem(problem_data):
+                # Keep it with empty fields, as the phased path does, so it still counts towards the score
+                print(f"  Extraction failed for problem {number}, grading it with empty fields")
+                problem_data = {"problem": "", "student_answer": "", "answer_key": "", "extraction_failed": True}
+            entry = answer_key_entry(compiled_key, number)
+            if entry:
+                attach_key_entry(problem_data, entry)
+            yield number, problem_data
+
+    def grade(item):
+        number, problem_data = item
+        result = fast_grade(problem_data) if fast_path else None
+        if result is not None:
+            problem_data["graded_by"] = "rules"
+        else:
+            try:
+                result = call_with_retries(request_grade, problem_data, gemini_model, timeout,
+                                           retries=retries, rate_limiter=gemini_limiter)
+            except Exception as e:
+                result = grading_error(e)
+            problem_data["graded_by"] = "llm"
+        problem_data["grade_percentage"], problem_data["feedback"] = result
+        print(f"Graded problem {number}: {problem_data['grade_percentage']}% ({problem_data['graded_by']})")
+        yield number, problem_data
+
+    start = time.perf_counter()
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in range(7)]
+    stage_specs = [
+        ("rasterize", rasterize, 1, None),
+        ("segment", segment, 1, None),
+        ("ocr", ocr, max_workers, None),
+        ("assemble", assembler.add, 1, assembler.flush),
+        ("extract", extract, extract_workers, None),
+        ("grade", grade, grading_workers, None),
+    ]
+    stages = [
+        Stage(name, fn, queues[i], queues[i + 1], max(1, int(workers)), flush, start)
+        for i, (name, fn, workers, flush) in enumerate(stage_specs)
+    ]
+    for stage in stages:
+        stage.start()
+
+    queues[0].put(images)
+    queues[0].put(STAGE_DONE)
+
+    graded = {}
+    while (item := queues[-1].get()) is not STAGE_DONE:
+        number, problem_data = item
+        graded[number] = problem_data
+    elapsed = time.perf_counter() - start
+
+    # A failed stage lost pages, segments or problems; don't report a grade for what is left
+    failed = [stage for stage in stages if stage.failure is not None]
+    if failed:
+        raise RuntimeError(f"Pipeline {failed[0].name} stage failed: {failed[0].failure}") from failed[0].failure
+
+    # Document order, regardless of which problem finished grading first
+    problems = {number: graded[number] for number in assembler.released if number in graded}
+    fast_count = sum(problem["graded_by"] == "rules" for problem in problems.values())
+    total_score = sum(problem["grade_percentage"] for problem in problems.values())
+
+    metrics = {stage.name: stage.metrics.as_dict() for stage in stages}
+    print_stage_metrics(metrics, elapsed)
+    print(f"Claude usage: {usage.calls} calls, {usage.input_tokens} input tokens, {usage.output_tokens} output tokens")
+
+    return {
+        "metadata": {
+            "total_problems": len(problems),
+            "problem_numbers": list(problems),
+            "timestamp": datetime.datetime.now().isoformat(),
+            "extraction_mode": "pipelined",
+            "local_split": True,
+            "answer_key_hash": compiled_key["source_hash"],
+            "token_usage": usage.as_dict(),
+            "pipeline": {
+                "elapsed_seconds": round(elapsed, 3),
+                "first_grade_seconds": metrics["grade"]["first_output_at"],
+                "stages": metrics,
+            },
+        },
+        "problems": problems,
+        "grading_stats": {"fast_path": fast_count, "llm": len(problems) - fast_count},
+        "overall_score": total_score / len(problems) if problems else 0,
+    }
+
+
+def print_stage_metrics(metrics, elapsed):
+    print(f"\nPipeline finished in {elapsed:.2f}s")
+    print(f"{'stage':<10}{'workers':>8}{'items':>7}{'out':>6}{'busy':>9}{'mean':>8}{'wait in':>9}{'blocked':>9}{'first out':>11}{'done':>8}{'items/s':>9}")
+    for name, m in metrics.items():
+        mean = f"{m['mean_latency']:.3f}" if m["mean_latency"] is not None else "-"
+        first = f"{m['first_output_at']:.2f}s" if m["first_output_at"] is not None else "-"
+        rate = f"{m['items_per_second']:.1f}" if m["items_per_second"] is not None else "-"
+        print(f"{name:<10}{m['workers']:>8}{m['items']:>7}{m['outputs']:>6}{m['busy_seconds']:>8.2f}s{mean:>8}"
+              f"{m['waiting_input_seconds']:>8.2f}s{m['blocked_output_seconds']:>8.2f}s{first:>11}"
+              f"{m['finished_at']:>7.2f}s{rate:>9}")
+
+
+def grade_pdf_pipelined(pdf_path, answer_key_path, output_file=None, dpi=150, segment_mode="greedy",
+                        max_workers=MAX_WORKERS, extract_workers=EXTRACT_WORKERS, grading_workers=GRADING_WORKERS,
+                        queue_size=QUEUE_SIZE, workers=1, use_cache=True, cache_path=DEFAULT_CACHE_PATH,
+                        fast_path=True, skip_blank=True, dedupe=True, payload=DEFAULT_PAYLOAD, trace_file=None):
+    """
+    Grade a PDF with all stages overlapping instead of one phase after another.
+
+    Grading of the first problems starts while later pages are still being
+    rasterized and OCR'd. Per-stage throughput, latency and backpressure are
+    printed at the end and saved under metadata.pipeline.
+
+    Args:
+        pdf_path: Path to the PDF assessment file
+        answer_key_path: Path to the answer key text file
+        output_file: Where to save the graded assessment JSON (not saved if omitted)
+        dpi: Resolution for PDF to image conversion
+        workers: Number of parallel pdftoppm processes used for rasterization
+        use_cache: Reuse OCR results for segments seen before (--nouse_cache to bypass)
+        skip_blank: Don't send segments without text to the API (--noskip_blank to send them)
+        dedupe: Reuse the OCR result of pixel-identical segments (--nodedupe to bypass)
+        payload: How segments are encoded for OCR, a name from payload_encoder.PAYLOAD_POLICIES
+        trace_file: Record per-stage and per-call spans to this file (.jsonl or OTLP .json) and print a summary
+
+    Returns:
+        dict: Graded assessment results
+    """
+    compiled_key = load_answer_key(answer_key_path)
+    cache = OCRCache(cache_path) if use_cache else None
+    segment_filter = SegmentFilter(skip_blank, dedupe) if skip_blank or dedupe else None
+
+    page_count = get_page_count(pdf_path)
+    print(f"Grading {pdf_path} ({page_count} pages) as a pipeline")
+    images = iter_pdf_pages(pdf_path, dpi=dpi, page_count=page_count, workers=workers)
+
+    try:
+        with traced_run("grade_pdf_pipelined", trace_file, pdf=pdf_path, pages=page_count):
+            assessment_data = run_pipeline(
+                images,
+                compiled_key,
+                segment_mode=segment_mode,
+                max_workers=max_workers,
+                extract_workers=extract_workers,
+                grading_workers=grading_workers,
+                queue_size=queue_size,
+                cache=cache,
+                fast_path=fast_path,
+                segment_filter=segment_filter,
+                payload=payload,
+                source_dpi=dpi
+            )
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if output_file:
+        with open(output_file, 'w') as f:
+            json.dump(assessment_data, f, indent=2)
+        print(f"Results saved to {output_file}")
+
+    if segment_filter is not None:
+        stats = segment_filter.stats()
+        print(f"Skipped OCR calls: {stats['blank']} blank segments, {stats['duplicates']} duplicates")
+    print(f"Grading complete! Overall score: {assessment_data['overall_score']:.2f}%")
+    return assessment_data
+
+
+if __name__ == "__main__":
+    fire.Fire(grade_pdf_pipelined)
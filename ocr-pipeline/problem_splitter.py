@@ -0,0 +1,93 @@
+import re
+
+# "Question 3", "## Question 3 (1 point)", "**Problem 2**", "Q3", "Q 1.2"
+KEYWORD_HEADER = re.compile(r'^\s*(?:#+\s*|\*\*\s*)?(?:question|problem|q)\s*#?\s*(\d+(?:\.\d+)*)\b', re.IGNORECASE)
+# "2.2.1: Three dice...", "1.1 Find...", "### 3.2)"
+DOTTED_HEADER = re.compile(r'^\s*(?:#+\s*|\*\*\s*)?(\d+(?:\.\d+)+)(?:\s*[:.)]|\s+(?=[A-Za-z(]))')
+# "section 2.2." sets the prefix for plain numbered items that follow
+SECTION_HEADER = re.compile(r'^\s*(?:#+\s*|\*\*\s*)?section\s+(\d+(?:\.\d+)*)', re.IGNORECASE)
+# "1. Three dice are tossed..."
+ENUMERATED_ITEM = re.compile(r'^\s*(?:#+\s*|\*\*\s*)?(\d+)[.)]\s+\S')
+
+
+def normalize_problem_number(number):
+    """
+    Canonical form of a problem label: "Q03" -> "3", "Problem 2.1." -> "2.1"
+    """
+    parts = re.findall(r'\d+', str(number))
+    return ".".join(str(int(part)) for part in parts)
+
+
+def find_problem_headers(text):
+    """
+    Locate the line where each problem starts.
+
+    Explicit "Question N"/"Problem N" headers win when the document has any;
+    otherwise dotted numbers ("2.2.1:") are used, and finally plain numbered
+    items, which are prefixed by the most recent "section X.Y" heading and
+    must count up from 1 so numbered lists inside an answer are not mistaken
+    for new problems.
+
+    Returns:
+        list: (problem number, character offset) in document order
+    """
+    lines = text.splitlines(keepends=True)
+    offsets = []
+    position = 0
+    for line in lines:
+        offsets.append(position)
+        position += len(line)
+
+    keyword = [(m.group(1), offsets[i]) for i, line in enumerate(lines) if (m := KEYWORD_HEADER.match(line))]
+    if keyword:
+        return [(normalize_problem_number(number), offset) for number, offset in keyword]
+
+    dotted = [(m.group(1), offsets[i]) for i, line in enumerate(lines) if (m := DOTTED_HEADER.match(line))]
+    if dotted:
+        return [(normalize_problem_number(number), offset) for number, offset in dotted]
+
+    headers = []
+    section = None
+    last_item = 0
+    for i, line in enumerate(lines):
+        section_match = SECTION_HEADER.match(line)
+        if section_match:
+            section = normalize_problem_number(section_match.group(1))
+            last_item = 0
+            continue
+
+        item_match = ENUMERATED_ITEM.match(line)
+        if item_match and int(item_match.group(1)) == last_item + 1:
+            last_item += 1
+            number = f"{section}.{last_item}" if section else str(last_item)
+            headers.append((number, offsets[i]))
+
+    return headers
+
+
+def split_problems(text):
+    """
+    Split a document into per-problem slices.
+
+    Text before the first problem header (titles, instructions) is dropped.
+    If a problem number appears more than once its slices are concatenated.
+
+    Returns:
+        dict: Normalized problem number -> slice of the document, in order
+    """
+    headers = find_problem_headers(text)
+
+    slices = {}
+    for i, (number, start) in enumerate(headers):
+        end = headers[i + 1][1] if i + 1 < len(headers) else len(text)
+        span = text[start:end].strip()
+        slices[number] = f"{slices[number]}\n\n{span}" if number in slices else span
+
+    return slices
+
+
+def problem_slice(slices, problem_number, full_text):
+    """
+    The slice for one problem, or the whole document when the splitter could not find it.
+    """
+    return slices.get(normalize_problem_number(problem_number), full_text)
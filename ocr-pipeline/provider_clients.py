@@ -0,0 +1,44 @@
+import functools
+import importlib.util
+import os
+import anthropic
+import httpx
+from openai import OpenAI
+
+# Keep-alive connections per provider; keep at or above the number of concurrent requests
+POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "32"))
+REQUEST_TIMEOUT = 600.0
+CONNECT_TIMEOUT = 10.0
+
+
+def http2_available():
+    """httpx only speaks HTTP/2 when the optional h2 package is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+@functools.lru_cache(maxsize=None)
+def http_client(provider, pool_size=POOL_SIZE):
+    """
+    The pooled HTTP client shared by every SDK client of one provider.
+
+    Connections stay open between requests, so only the first requests of a
+    run pay for the TCP and TLS handshakes. HTTP/2 is used when available,
+    multiplexing concurrent requests over a few connections.
+    """
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+        http2=http2_available()
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def openai_client(api_key, base_url=None):
+    """One OpenAI client per key and endpoint for the whole process (the SDK client is thread-safe)."""
+    return OpenAI(api_key=api_key, base_url=base_url, http_client=http_client("openai"))
+
+
+@functools.lru_cache(maxsize=None)
+def anthropic_client(api_key, base_url=None):
+    """One Anthropic client per key and endpoint for the whole process."""
+    return anthropic.Anthropic(api_key=api_key, base_url=base_url, http_client=http_client("anthropic"))
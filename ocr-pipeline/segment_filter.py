@@ -0,0 +1,83 @@
+import hashlib
+import threading
+import numpy as np
+from segmentation import row_std_profile
+
+# A segment is blank when no row's smoothed std reaches this; text rows are
+# typically 20+, scanner noise on white paper stays below ~4
+BLANK_SEGMENT_STD = 6.0
+
+BLANK = "blank"
+DUPLICATE = "duplicate"
+
+
+def is_blank(segment, blank_std=BLANK_SEGMENT_STD):
+    """Whether a segment has no row with enough variation to hold text."""
+    profile = row_std_profile(np.asarray(segment.convert('L')))
+    return profile.size == 0 or profile.max() < blank_std
+
+
+def fingerprint(segment):
+    """
+    Digest of a segment's exact pixels, size and mode.
+
+    Only byte-identical segments share a fingerprint. Anything looser risks
+    reusing one student's answer for another ("Your Answer: B" and "Your
+    Answer: 8" differ in a handful of pixels).
+    """
+    digest = hashlib.sha256(f"{segment.mode}:{segment.width}x{segment.height}:".encode())
+    digest.update(segment.tobytes())
+    return digest.hexdigest()
+
+
+class SegmentFilter:
+    """
+    Spots segments that need no OCR request: blank ones, and exact copies
+    of a segment seen earlier in the run (headers, footers and instructions
+    rendered identically on every page), whose result is reused.
+
+    Safe to share between the OCR worker threads.
+
+    Args:
+        skip_blank: Answer blank segments with an empty string
+        dedupe: Reuse the result of an earlier pixel-identical segment
+    """
+
+    def __init__(self, skip_blank=True, dedupe=True):
+        self.skip_blank = skip_blank
+        self.dedupe = dedupe
+        self.blank = 0
+        self.duplicates = 0
+        self.seen = {}
+        self.lock = threading.Lock()
+
+    def check(self, segment):
+        """
+        Returns:
+            tuple: (BLANK, None), (DUPLICATE, result remembered for the earlier
+                   segment), or (None, fingerprint to remember this segment's result under)
+        """
+        if self.skip_blank and is_blank(segment):
+            with self.lock:
+                self.blank += 1
+            return BLANK, None
+        if not self.dedupe:
+            return None, None
+
+        key = fingerprint(segment)
+        with self.lock:
+            result = self.seen.get(key)
+            if result is not None:
+                self.duplicates += 1
+                return DUPLICATE, result
+        return None, key
+
+    def remember(self, key, result):
+        if key is not None:
+            with self.lock:
+                self.seen.setdefault(key, result)
+
+    def stats(self):
+        with self.lock:
+            return {"blank": self.blank, "duplicates": self.duplicates, "skipped": self.blank + self.duplicates}
+
@@ -0,0 +1,298 @@
+import numpy as np
+from PIL import Image
+
+# Default settings
+TARGET_HEIGHT = 400
+MIN_HEIGHT = 200
+HEIGHT_WEIGHT = 1.0
+STD_WEIGHT = 5.0
+SMOOTHING_WINDOW = 5
+
+# Adaptive mode: GPT-4o fits images into 2048x2048 and then shrinks the
+# shorter side to 768px, so taller strips lose detail before it reads them
+MAX_LONG_SIDE = 2048
+MAX_SHORT_SIDE = 768
+# Pixel budget per request; the 768px rule usually binds first
+MAX_PIXELS = MAX_LONG_SIDE * MAX_SHORT_SIDE
+# Share of a segment's rows that may be text: dense pages get shorter segments
+MAX_INK_FRACTION = 0.75
+# A row is blank when its std is within BLANK_STD of the page's quietest rows
+BLANK_STD = 3.0
+# Blank stretches taller than this are collapsed to GAP_ROWS instead of sent
+BLANK_GAP = 60
+GAP_ROWS = 24
+# Ink runs shorter than this are specks, not text
+MIN_INK_HEIGHT = 3
+SEGMENT_PADDING = 6
+
+SEGMENT_MODES = ("greedy", "dp", "adaptive")
+
+
+def row_std_profile(img_array, window_size=SMOOTHING_WINDOW):
+    """
+    Compute the smoothed per-row standard deviation of a grayscale image.
+
+    Rows with low standard deviation are blank (or uniformly filled), which
+    makes them good places to cut a page without slicing through text.
+
+    Args:
+        img_array: 2D uint8 array (height x width)
+        window_size: Size of the moving-average window
+
+    Returns:
+        np.ndarray: Smoothed std-dev per row
+    """
+    # Var = (n * sum(x^2) - sum(x)^2) / n^2, accumulated in exact integer
+    # arithmetic instead of materializing a float64 copy of the page
+    width = img_array.shape[1]
+    sums = img_array.sum(axis=1, dtype=np.int64)
+    sums_sq = np.square(img_array, dtype=np.uint32).sum(axis=1, dtype=np.int64)
+    row_std_devs = np.sqrt((width * sums_sq - sums * sums) / (width * width))
+
+    kernel = np.ones(window_size) / window_size
+    return np.convolve(row_std_devs, kernel, mode='same')
+
+
+def cut_costs(smoothed_std_devs, start, possible_end, max_end, target_height=TARGET_HEIGHT):
+    """
+    Cost of ending a segment that begins at `start` on each row in [possible_end, max_end).
+    """
+    ends = np.arange(possible_end, max_end)
+    height_costs = HEIGHT_WEIGHT * np.abs(ends - start - target_height)
+    std_costs = STD_WEIGHT * (smoothed_std_devs[possible_end:max_end] ** 2)
+    return height_costs + std_costs
+
+
+def greedy_cuts(smoothed_std_devs, target_height=TARGET_HEIGHT, min_height=MIN_HEIGHT):
+    """
+    Pick each cut as the cheapest row in the window after the previous cut.
+
+    This reproduces the original segment_image loop exactly (including
+    dropping a trailing strip shorter than min_height).
+    """
+    height = len(smoothed_std_devs)
+    segments = []
+    current_start = 0
+
+    while current_start < height - min_height:
+        remaining_height = height - current_start
+
+        if remaining_height <= target_height:
+            segments.append((current_start, height))
+            break
+
+        possible_end = current_start + min_height
+        max_end = min(current_start + target_height * 2, height)
+
+        costs = cut_costs(smoothed_std_devs, current_start, possible_end, max_end, target_height)
+        cut_point = possible_end + int(np.argmin(costs))
+
+        segments.append((current_start, cut_point))
+        current_start = cut_point
+
+    return segments
+
+
+def dp_cuts(smoothed_std_devs, target_height=TARGET_HEIGHT, min_height=MIN_HEIGHT):
+    """
+    Choose all cuts at once by minimizing the total cost over the page.
+
+    Every segment is between min_height and 2 * target_height rows tall, except
+    the last one which may be shorter; the page is always covered to the bottom.
+    """
+    height = len(smoothed_std_devs)
+    if height <= target_height:
+        return [(0, height)] if height > 0 else []
+
+    max_height = target_height * 2
+    std_costs = STD_WEIGHT * (smoothed_std_devs ** 2)
+
+    best = np.full(height + 1, np.inf)
+    best[0] = 0.0
+    prev = np.zeros(height + 1, dtype=np.int64)
+
+    # Interior cuts: segment [s, e) pays height cost plus the std cost at row e
+    for end in range(min_height, height):
+        lo = max(0, end - max_height)
+        hi = end - min_height + 1
+        starts = np.arange(lo, hi)
+        totals = best[lo:hi] + HEIGHT_WEIGHT * np.abs(end - starts - target_height)
+        idx = int(np.argmin(totals))
+        best[end] = totals[idx] + std_costs[end]
+        prev[end] = starts[idx]
+
+    # The last segment ends at the bottom edge; only penalize it for being too tall
+    lo = max(0, height - max_height)
+    starts = np.arange(lo, height)
+    totals = best[lo:height] + HEIGHT_WEIGHT * np.maximum(height - starts - target_height, 0)
+    idx = int(np.argmin(totals))
+    prev[height] = starts[idx]
+
+    segments = []
+    end = height
+    while end > 0:
+        start = int(prev[end])
+        segments.append((start, end))
+        end = start
+
+    return segments[::-1]
+
+
+def ink_runs(smoothed_std_devs, blank_std=BLANK_STD):
+    """
+    Row ranges containing ink, separated by blank rows.
+
+    Blank is relative to the page's quietest rows, so a gray background or
+    a vertical rule running down the page doesn't count as text.
+    """
+    baseline = np.percentile(smoothed_std_devs, 5)
+    ink = np.concatenate(([False], smoothed_std_devs > baseline + blank_std, [False]))
+    edges = np.flatnonzero(ink[1:] != ink[:-1])
+    return [(int(start), int(end)) for start, end in zip(edges[::2], edges[1::2])
+            if end - start >= MIN_INK_HEIGHT]
+
+
+def full_detail_rows(width):
+    """Tallest strip of this width the OCR model sees without downsampling."""
+    return int(MAX_SHORT_SIDE * max(1.0, width / MAX_LONG_SIDE))
+
+
+def adaptive_cuts(smoothed_std_devs, width, max_pixels=MAX_PIXELS):
+    """
+    As few segments as the pixel budget allows, sized by how much text they hold.
+
+    Ink runs are packed into a segment until it would exceed the budget
+    (max_pixels, and never taller than the model reads at full detail) or
+    until more than MAX_INK_FRACTION of it is text, so sparse regions merge
+    into tall segments and dense ones are cut sooner. Blank stretches taller
+    than BLANK_GAP count as GAP_ROWS, since stitch_strips collapses them,
+    and a page without ink yields no segments. Runs taller than a segment
+    are split at their quietest row.
+
+    Returns:
+        list: One list of (start, end) row ranges per segment
+    """
+    height = len(smoothed_std_devs)
+    max_rows = max(MIN_INK_HEIGHT, min(max_pixels // max(width, 1), full_detail_rows(width)))
+    max_ink = max(MIN_INK_HEIGHT, int(max_rows * MAX_INK_FRACTION))
+
+    # Padded ink runs, merged where the blank between them is short
+    strips = []
+    for start, end in ink_runs(smoothed_std_devs):
+        start, end = max(0, start - SEGMENT_PADDING), min(height, end + SEGMENT_PADDING)
+        if strips and start - strips[-1][1] <= BLANK_GAP:
+            strips[-1] = (strips[-1][0], end)
+        else:
+            strips.append((start, end))
+
+    pieces = []
+    for start, end in strips:
+        while end - start > max_ink:
+            lo = start + max_ink // 2
+            costs = cut_costs(smoothed_std_devs, start, lo, start + max_ink, max_ink)
+            cut = lo + int(np.argmin(costs))
+            pieces.append((start, cut))
+            start = cut
+        pieces.append((start, end))
+
+    segments = []
+    rows = ink = 0
+    for start, end in pieces:
+        piece_rows = end - start
+        if segments:
+            gap = GAP_ROWS if start > segments[-1][-1][1] else 0
+            if rows + gap + piece_rows <= max_rows and ink + piece_rows <= max_ink:
+                if gap:
+                    segments[-1].append((start, end))
+                else:
+                    segments[-1][-1] = (segments[-1][-1][0], end)
+                rows += gap + piece_rows
+                ink += piece_rows
+                continue
+        segments.append([(start, end)])
+        rows = ink = piece_rows
+
+    # A short leftover costs a whole request; let the previous segment take it
+    # when the height budget allows, even if that makes it denser than usual
+    for i in range(len(segments) - 1, 0, -1):
+        rows, previous_rows = stitched_rows(segments[i]), stitched_rows(segments[i - 1])
+        if min(rows, previous_rows) < MIN_HEIGHT and rows + previous_rows + GAP_ROWS <= max_rows:
+            segments[i - 1] = join_strips(segments[i - 1], segments[i])
+            del segments[i]
+
+    return segments
+
+
+def stitched_rows(strips):
+    return sum(end - start for start, end in strips) + GAP_ROWS * (len(strips) - 1)
+
+
+def join_strips(first, second):
+    if first[-1][1] >= second[0][0]:
+        return first[:-1] + [(first[-1][0], second[0][1])] + second[1:]
+    return first + second
+
+
+def stitch_strips(image, strips):
+    """
+    One image of the given row ranges stacked with GAP_ROWS of background between them.
+    """
+    width = image.width
+    if len(strips) == 1:
+        start, end = strips[0]
+        return image.crop((0, start, width, end))
+
+    # Fill the gaps with the page's background: the median colour of the row after the first strip
+    background_row = np.array(image.crop((0, strips[0][1], width, strips[0][1] + 1)))
+    background = tuple(int(v) for v in np.median(background_row.reshape(width, -1), axis=0))
+    if len(background) == 1:
+        background = background[0]
+
+    height = stitched_rows(strips)
+    stitched = Image.new(image.mode, (width, height), background)
+    top = 0
+    for start, end in strips:
+        stitched.paste(image.crop((0, start, width, end)), (0, top))
+        top += end - start + GAP_ROWS
+    return stitched
+
+
+def segment_image(image, target_height=TARGET_HEIGHT, min_height=MIN_HEIGHT, mode="greedy",
+                  max_pixels=MAX_PIXELS):
+    """
+    Split a page image into horizontal strips along low-ink rows.
+
+    Args:
+        image: PIL Image of the page
+        target_height: Preferred segment height in pixels
+        min_height: Minimum segment height in pixels
+        mode: "greedy" (same cuts as the original loop), "dp" (globally optimal cuts)
+              or "adaptive" (fewest segments within max_pixels, blank regions dropped)
+        max_pixels: Most pixels per segment in adaptive mode
+
+    Returns:
+        tuple: (list of PIL Image segments, list of (start, end) row ranges)
+    """
+    if mode not in SEGMENT_MODES:
+        raise ValueError(f"Unknown segmentation mode '{mode}', expected one of {SEGMENT_MODES}")
+
+    img_array = np.array(image.convert('L'))
+    height, width = img_array.shape
+
+    smoothed_std_devs = row_std_profile(img_array)
+
+    if mode == "adaptive":
+        strips = adaptive_cuts(smoothed_std_devs, width, max_pixels)
+        segments = [(group[0][0], group[-1][1]) for group in strips]
+        return [stitch_strips(image, group) for group in strips], segments
+    elif mode == "dp":
+        segments = dp_cuts(smoothed_std_devs, target_height, min_height)
+    else:
+        segments = greedy_cuts(smoothed_std_devs, target_height, min_height)
+
+    image_segments = []
+    for start, end in segments:
+        segment = image.crop((0, start, width, end))
+        image_segments.append(segment)
+
+    return image_segments, segments
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+
+class StubOpenAIClient:
+    """
+    Offline stand-in for openai.OpenAI that sleeps instead of calling the API.
+
+    Only implements client.chat.completions.create, which is all the OCR path
+    uses. Tracks the call count and the peak number of concurrent calls so
+    benchmarks can check that concurrency limits are respected.
+
+    Args:
+        latency: Seconds each call takes
+        responder: Optional function(call_number, messages) -> str used as the reply text
+    """
+
+    def __init__(self, latency=0.5, responder=None):
+        self.latency = latency
+        self.responder = responder or (lambda n, messages: f"stub text {n}")
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, max_tokens=None, **kwargs):
+        with self.lock:
+            self.calls += 1
+            call_number = self.calls
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            text = self.responder(call_number, messages)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=text))],
+        )
+
+
+class StubAnthropicClient:
+    """
+    Offline stand-in for anthropic.Anthropic implementing client.messages.create.
+
+    Args:
+        latency: Seconds each call takes
+        responder: Optional function(call_number, prompt) -> str used as the reply text
+    """
+
+    def __init__(self, latency=0.5, responder=None):
+        self.latency = latency
+        self.responder = responder or (lambda n, prompt: "{}")
+        self.calls = 0
+        self.lock = threading.Lock()
+        self.messages = SimpleNamespace(create=self._create)
+
+    def _create(self, model, messages, max_tokens=None, **kwargs):
+        with self.lock:
+            self.calls += 1
+            call_number = self.calls
+        time.sleep(self.latency)
+        prompt = messages[0]["content"][0]["text"]
+        text = self.responder(call_number, prompt)
+
+        return SimpleNamespace(
+            model=model,
+            content=[SimpleNamespace(type="text", text=text)],
+            usage=SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=len(text) // 4),
+        )
+
+
+class StubGeminiModel:
+    """
+    Offline stand-in for genai.GenerativeModel implementing generate_content.
+
+    Args:
+        latency: Seconds each call takes
+        responder: Optional function(call_number, prompt) -> str used as the reply text
+    """
+
+    def __init__(self, latency=0.5, responder=None):
+        self.latency = latency
+        self.responder = responder or (lambda n, prompt: '{"percentage": 100, "feedback": ""}')
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, request_options=None, **kwargs):
+        with self.lock:
+            self.calls += 1
+            call_number = self.calls
+        time.sleep(self.latency)
+        return SimpleNamespace(text=self.responder(call_number, prompt))
+
+
+def request_key(*parts):
+    """Stable key for a request: a digest of its prompt and image data."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def openai_request_key(messages):
+    content = messages[0]["content"]
+    return request_key(*(item.get("text") or item["image_url"]["url"] for item in content))
+
+
+class Recording:
+    """
+    Provider responses keyed by request, saved as JSON.
+
+    Recorded once against the real APIs (see the Recording* wrappers) and
+    replayed through the stub clients so benchmarks need no network.
+    """
+
+    PROVIDERS = ("openai", "anthropic", "gemini")
+
+    def __init__(self, responses=None, path=None):
+        self.responses = responses or {provider: {} for provider in self.PROVIDERS}
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls(json.load(f), path)
+
+    def save(self, path=None):
+        path = path or self.path
+        with open(path, 'w') as f:
+            json.dump(self.responses, f, ensure_ascii=False, indent=1)
+        print(f"Saved {sum(len(r) for r in self.responses.values())} recorded responses to {path}")
+
+    def put(self, provider, key, text):
+        with self.lock:
+            self.responses[provider][key] = text
+
+    def get(self, provider, key):
+        text = self.responses[provider].get(key)
+        with self.lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return text
+
+    def responder(self, provider, fallback=None):
+        """
+        Stub client responder replaying this recording.
+
+        Requests that were never recorded (e.g. after a prompt change) go to
+        `fallback` and are counted as misses.
+        """
+        def replay(call_number, request):
+            key = openai_request_key(request) if provider == "openai" else request_key(request)
+            text = self.get(provider, key)
+            if text is None:
+                if fallback is None:
+                    raise KeyError(f"No recorded {provider} response for request {key}")
+                text = fallback(call_number, request)
+            return text
+        return replay
+
+
+class RecordingOpenAIClient:
+    """Wraps a real OpenAI client, saving every chat completion into a Recording."""
+
+    def __init__(self, client, recording):
+        self.client = client
+        self.recording = recording
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages, **kwargs):
+        response = self.client.chat.completions.create(messages=messages, **kwargs)
+        self.recording.put("openai", openai_request_key(messages), response.choices[0].message.content)
+        return response
+
+
+class RecordingAnthropicClient:
+    """Wraps a real Anthropic client, saving every message into a Recording."""
+
+    def __init__(self, client, recording):
+        self.client = client
+        self.recording = recording
+        self.messages = SimpleNamespace(create=self._create)
+
+    def _create(self, messages, **kwargs):
+        response = self.client.messages.create(messages=messages, **kwargs)
+        self.recording.put("anthropic", request_key(messages[0]["content"][0]["text"]), response.content[0].text)
+        return response
+
+
+class RecordingGeminiModel:
+    """Wraps a real Gemini model, saving every generate_content reply into a Recording."""
+
+    def __init__(self, model, recording):
+        self.model = model
+        self.recording = recording
+
+    def generate_content(self, prompt, **kwargs):
+        response = self.model.generate_content(prompt, **kwargs)
+        self.recording.put("gemini", request_key(prompt), response.text)
+        return response
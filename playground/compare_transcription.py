@@ -0,0 +1,92 @@
+import argparse
+import json
+import re
+import time
+from ocr_poc import ExamPage, analyze_document_structure, transcribe_page, TRANSCRIBE_MODES
+
+def load_expected_answers(transcript_path):
+    """Student answers per question id from a transcript like examples/ocr_student.md"""
+    with open(transcript_path, 'r') as f:
+        text = f.read()
+
+    expected = {}
+    for block in re.split(r'\*\*Question ', text)[1:]:
+        number = re.match(r'(\d+)', block)
+        answer = re.search(r'Your Answer:\s*(.+?)\*\*', block)
+        if number and answer:
+            expected[number.group(1)] = answer.group(1).strip()
+    return expected
+
+def normalize_answer(answer):
+    """Compare answers ignoring case, spacing and separators ("A, B" == "ab")"""
+    return re.sub(r'[^0-9a-z.\-]', '', str(answer or '').lower())
+
+def compare_modes(image_path, questions, expected, modes=TRANSCRIBE_MODES):
+    """Transcribe the page's answers with each mode; report requests, time and accuracy"""
+    page = ExamPage(image_path)
+    answer_regions = page.answer_regions(questions)
+
+    results = {}
+    for mode in modes:
+        print(f"\n=== {mode} ===")
+        start = time.perf_counter()
+        transcriptions, requests_made = transcribe_page(answer_regions, questions, mode)
+        elapsed = time.perf_counter() - start
+
+        answers = {str(question['id']): answer for question, answer in zip(questions, transcriptions)}
+        scored = [qid for qid in answers if qid in expected]
+        correct = [qid for qid in scored if normalize_answer(answers[qid]) == normalize_answer(expected[qid])]
+        results[mode] = {
+            "requests": requests_made,
+            "seconds": elapsed,
+            "correct": len(correct),
+            "scored": len(scored),
+            "answers": answers
+        }
+
+    print(f"\n{len(questions)} answer boxes on {image_path}")
+    print(f"{'mode':<8}{'requests':>10}{'time':>9}{'answers/s':>11}{'accuracy':>14}")
+    for mode, result in results.items():
+        accuracy = f"{result['correct']}/{result['scored']}" if result['scored'] else "-"
+        rate = len(questions) / result['seconds'] if result['seconds'] else 0
+        print(f"{mode:<8}{result['requests']:>10}{result['seconds']:>8.2f}s{rate:>11.2f}{accuracy:>14}")
+
+    # Where the batched modes disagree with the per-crop path
+    if "single" in results:
+        for mode, result in results.items():
+            differing = [qid for qid, answer in result['answers'].items()
+                         if normalize_answer(answer) != normalize_answer(results['single']['answers'][qid])]
+            if mode != "single" and differing:
+                print(f"{mode} differs from single on questions {', '.join(differing)}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-crop, batched and tiled answer transcription')
+    parser.add_argument('--image', type=str, default='examples/screenshot-page2.png', help='Exam page image')
+    parser.add_argument('--analysis_file', type=str,
+                        help='Document structure JSON from test_ocr_functions.py --function analyze (analyzed now if omitted)')
+    parser.add_argument('--expected', type=str, default='examples/ocr_student.md',
+                        help='Transcript with "Your Answer:" lines to score against')
+    parser.add_argument('--modes', type=str, nargs='+', choices=TRANSCRIBE_MODES, default=list(TRANSCRIBE_MODES))
+    parser.add_argument('--output', type=str, help='Save the comparison as JSON')
+    args = parser.parse_args()
+
+    if args.analysis_file:
+        with open(args.analysis_file, 'r') as f:
+            document_structure = json.load(f)
+    else:
+        document_structure = analyze_document_structure(ExamPage(args.image))
+    if not document_structure:
+        print("Failed to analyze document structure")
+        return
+
+    results = compare_modes(args.image, document_structure['questions'], load_expected_answers(args.expected),
+                            args.modes)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ from PIL import Image
 import numpy as np
 import io
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -16,8 +17,74 @@ api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise ValueError("OPENAI_API_KEY not found in environment variables")
 
+# Point at a proxy or local stub server with OPENAI_BASE_URL
+api_base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+# Keep-alive connections kept open for reuse between requests
+pool_size = int(os.getenv("HTTP_POOL_SIZE", "8"))
+
+def create_session(pool_size=pool_size):
+    """Session that keeps connections to the API open, so each call skips the TCP/TLS handshake"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    })
+    return session
+
+session = create_session()
+
+# Different prompts for different question types
+TRANSCRIBE_PROMPTS = {
+    "numerical": "Transcribe ONLY the handwritten digits in this image. Do not interpret or correct the answer, even if it seems wrong. Return exactly what is written, digit by digit.",
+    "multiple-choice": "Identify which option is circled or marked by the student. Return only the letter or number of the selected option.",
+    "text": "Transcribe the handwritten text in this image exactly as written. Preserve any errors or notations."
+}
+DEFAULT_TRANSCRIBE_PROMPT = "Transcribe the handwritten text in this image exactly as written."
+
+# How process_exam_page transcribes answers: one request per question, all
+# crops as separate images in one request, or crops tiled into composites
+TRANSCRIBE_MODES = ("single", "batch", "tiled")
+
+# Tiled composites stay within GPT-4o's 2048px limit so tiles are not shrunk
+TILED_MAX_WIDTH = 1536
+TILED_MAX_HEIGHT = 2048
+TILE_PADDING = 16
+TILE_LABEL_HEIGHT = 30
+
+class ExamPage:
+    """An exam page read from disk and decoded once, shared by every stage that needs its pixels"""
+    
+    def __init__(self, image_path):
+        self.path = image_path
+        with open(image_path, "rb") as image_file:
+            self.data = image_file.read()
+        self.image = cv2.imdecode(np.frombuffer(self.data, np.uint8), cv2.IMREAD_COLOR)
+        self.height, self.width = self.image.shape[:2]
+    
+    def encoded(self):
+        """The original file as base64, without re-encoding the pixels"""
+        return base64.b64encode(self.data).decode('utf-8')
+    
+    def region(self, box):
+        """View of a (x1,y1,x2,y2) box given in percentages; shares memory with the page"""
+        x1, y1, x2, y2 = box
+        x1 = int(self.width * x1 / 100)
+        y1 = int(self.height * y1 / 100)
+        x2 = int(self.width * x2 / 100)
+        y2 = int(self.height * y2 / 100)
+        return self.image[y1:y2, x1:x2]
+    
+    def answer_regions(self, questions):
+        """Answer box view for each question, in order"""
+        return [self.region(question["answer_box"]) for question in questions]
+
 def encode_image(image_path):
     """Encode an image to base64 for API submission"""
+    if isinstance(image_path, ExamPage):
+        return image_path.encoded()
     if isinstance(image_path, str):
         # Load from file path
         with open(image_path, "rb") as image_file:
@@ -27,35 +94,30 @@ def encode_image(image_path):
         _, buffer = cv2.imencode('.png', image_path)
         return base64.b64encode(buffer).decode('utf-8')
 
-def call_gpt_vision(prompt, image, model="gpt-4o"):
-    """Call GPT-4 Vision API with prompt and image"""
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-    
+def image_content_for(image):
+    """Message content part for an image URL or base64 PNG"""
     if isinstance(image, str) and image.startswith("http"):
         # It's a URL
-        image_content = {"type": "image_url", "image_url": {"url": image}}
-    else:
-        # It's base64 encoded
-        image_content = {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image}"}}
+        return {"type": "image_url", "image_url": {"url": image}}
+    # It's base64 encoded
+    return {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image}"}}
+
+def call_gpt_vision(prompt, image, model="gpt-4o"):
+    """Call GPT-4 Vision API with prompt and image (or a list of images sent in one request)"""
+    images = image if isinstance(image, list) else [image]
     
     payload = {
         "model": model,
         "messages": [
             {
                 "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt},
-                    image_content
-                ]
+                "content": [{"type": "text", "text": prompt}] + [image_content_for(item) for item in images]
             }
         ],
         "max_tokens": 2000
     }
     
-    response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
+    response = session.post(f"{api_base_url}/chat/completions", json=payload)
     return response.json()
 
 def analyze_document_structure(image_path):
@@ -108,33 +170,16 @@ def analyze_document_structure(image_path):
 
 def extract_answer_region(image_path, question):
     """Extract the handwritten answer region based on coordinates"""
-    img = cv2.imread(image_path)
-    height, width = img.shape[:2]
-    
-    # Get coordinates and convert from percentages to pixels
-    x1, y1, x2, y2 = question["answer_box"]
-    x1 = int(width * x1 / 100)
-    y1 = int(height * y1 / 100)
-    x2 = int(width * x2 / 100)
-    y2 = int(height * y2 / 100)
-    
-    # Extract region
-    answer_region = img[y1:y2, x1:x2]
-    return answer_region
+    # Pass an ExamPage to avoid decoding the file again for every question
+    page = image_path if isinstance(image_path, ExamPage) else ExamPage(image_path)
+    return page.region(question["answer_box"])
 
 def transcribe_answer(answer_image, question_type):
     """Stage 2: Transcribe the handwritten answer"""
     encoded_image = encode_image(answer_image)
     
-    # Different prompts for different question types
-    prompts = {
-        "numerical": "Transcribe ONLY the handwritten digits in this image. Do not interpret or correct the answer, even if it seems wrong. Return exactly what is written, digit by digit.",
-        "multiple-choice": "Identify which option is circled or marked by the student. Return only the letter or number of the selected option.",
-        "text": "Transcribe the handwritten text in this image exactly as written. Preserve any errors or notations."
-    }
-    
     # Use appropriate prompt or default to generic
-    prompt = prompts.get(question_type, "Transcribe the handwritten text in this image exactly as written.")
+    prompt = TRANSCRIBE_PROMPTS.get(question_type, DEFAULT_TRANSCRIBE_PROMPT)
     
     response = call_gpt_vision(prompt, encoded_image)
     
@@ -146,37 +191,190 @@ def transcribe_answer(answer_image, question_type):
         print(response)
         return None
 
-def process_exam_page(image_path):
-    """Process a single exam page end-to-end"""
+def transcribe_answers(answer_images, questions):
+    """Stage 2 for a whole page: transcribe every answer region in one request
+    
+    Returns a dict of question id -> transcription; questions missing from the
+    response are left out so the caller can transcribe them one at a time.
+    """
+    instructions = "\n".join(
+        f"Image {i+1} is the answer to question {question['id']}: "
+        f"{TRANSCRIBE_PROMPTS.get(question['type'], DEFAULT_TRANSCRIBE_PROMPT)}"
+        for i, question in enumerate(questions)
+    )
+    prompt = f"""
+    Each of the following {len(questions)} images is the handwritten answer region of one exam question, in order.
+    {instructions}
+    
+    Format your response as JSON mapping each question id to its transcription:
+    {{"<question id>": "<transcription>", ...}}
+    """
+    
+    response = call_gpt_vision(prompt, [encode_image(image) for image in answer_images])
+    
+    try:
+        content = response['choices'][0]['message']['content']
+        json_start = content.find('{')
+        json_end = content.rfind('}') + 1
+        answers = json.loads(content[json_start:json_end])
+        return {str(question_id): str(answer).strip() for question_id, answer in answers.items()}
+    except Exception as e:
+        print(f"Error extracting batch transcription: {e}")
+        print(response)
+        return {}
+
+def tile_label(question):
+    return f"Q{question['id']}"
+
+def tile_regions(answer_images, labels, max_width=TILED_MAX_WIDTH, max_height=TILED_MAX_HEIGHT):
+    """Pack answer crops into labeled composite images
+    
+    Tiles are placed left to right in rows, each with its label printed above
+    it and a border around it; a new composite is started when one is full.
+    
+    Returns a list of (composite image, labels of the tiles in it)
+    """
+    # Lay out cells (label band + crop) on shelves first, then draw
+    composites = []
+    placements, row_x, row_y, row_height = [], TILE_PADDING, TILE_PADDING, 0
+    for image, label in zip(answer_images, labels):
+        height, width = image.shape[:2]
+        crop_width = max_width - 2 * TILE_PADDING - 2
+        crop_height = max_height - 2 * TILE_PADDING - TILE_LABEL_HEIGHT - 2
+        scale = min(crop_width / width, crop_height / height)
+        if scale < 1:
+            size = (max(1, int(width * scale)), max(1, int(height * scale)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            height, width = image.shape[:2]
+        cell_width = width + 2
+        cell_height = TILE_LABEL_HEIGHT + height + 2
+        
+        if row_x + cell_width + TILE_PADDING > max_width:
+            row_x, row_y, row_height = TILE_PADDING, row_y + row_height + TILE_PADDING, 0
+        if placements and row_y + cell_height + TILE_PADDING > max_height:
+            composites.append(placements)
+            placements, row_x, row_y, row_height = [], TILE_PADDING, TILE_PADDING, 0
+        
+        placements.append((image, label, row_x, row_y))
+        row_x += cell_width + TILE_PADDING
+        row_height = max(row_height, cell_height)
+    if placements:
+        composites.append(placements)
+    
+    results = []
+    for placements in composites:
+        width = max(x + image.shape[1] + 2 for image, _, x, _ in placements) + TILE_PADDING
+        height = max(y + TILE_LABEL_HEIGHT + image.shape[0] + 2 for image, _, _, y in placements) + TILE_PADDING
+        composite = np.full((height, width, 3), 255, dtype=np.uint8)
+        for image, label, x, y in placements:
+            cv2.putText(composite, label, (x, y + TILE_LABEL_HEIGHT - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+            top = y + TILE_LABEL_HEIGHT
+            crop = image if image.ndim == 3 else cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+            composite[top + 1:top + 1 + crop.shape[0], x + 1:x + 1 + crop.shape[1]] = crop
+            cv2.rectangle(composite, (x, top), (x + crop.shape[1] + 1, top + crop.shape[0] + 1), (0, 0, 255), 1)
+        results.append((composite, [label for _, label, _, _ in placements]))
+    return results
+
+def transcribe_tiled(composites, questions):
+    """Stage 2 for a whole page: transcribe the composites built by tile_regions, one request each
+    
+    Returns a dict of question id -> transcription like transcribe_answers.
+    """
+    by_label = {tile_label(question): question for question in questions}
+    answers = {}
+    for composite, labels in composites:
+        instructions = "\n".join(
+            f"{label}: {TRANSCRIBE_PROMPTS.get(by_label[label]['type'], DEFAULT_TRANSCRIBE_PROMPT)}"
+            for label in labels
+        )
+        prompt = f"""
+        This image contains {len(labels)} boxed handwritten answers from an exam, each with its label printed in red above the box.
+        Read each box on its own; never use text from one box for another.
+        {instructions}
+        
+        Format your response as JSON mapping each label to its transcription:
+        {{"{labels[0]}": "<transcription>", ...}}
+        """
+        
+        response = call_gpt_vision(prompt, encode_image(composite))
+        
+        try:
+            content = response['choices'][0]['message']['content']
+            json_start = content.find('{')
+            json_end = content.rfind('}') + 1
+            for label, answer in json.loads(content[json_start:json_end]).items():
+                if label in by_label:
+                    answers[str(by_label[label]['id'])] = str(answer).strip()
+        except Exception as e:
+            print(f"Error extracting tiled transcription: {e}")
+            print(response)
+    return answers
+
+def transcribe_page(answer_images, questions, mode="batch"):
+    """Transcribe every answer of a page; questions the batched modes miss are transcribed one by one
+    
+    Returns a tuple (list of transcriptions in question order, number of requests made)
+    """
+    if mode not in TRANSCRIBE_MODES:
+        raise ValueError(f"Unknown transcription mode '{mode}', expected one of {TRANSCRIBE_MODES}")
+    
+    answers, requests_made = {}, 0
+    if mode == "batch" and questions:
+        print(f"Transcribing {len(questions)} answers in one request...")
+        answers = transcribe_answers(answer_images, questions)
+        requests_made += 1
+    elif mode == "tiled" and questions:
+        composites = tile_regions(answer_images, [tile_label(question) for question in questions])
+        print(f"Transcribing {len(questions)} answers tiled into {len(composites)} image(s)...")
+        answers = transcribe_tiled(composites, questions)
+        requests_made += len(composites)
+    
+    transcriptions = []
+    for question, answer_region in zip(questions, answer_images):
+        answer_text = answers.get(str(question['id']))
+        if answer_text is None:
+            print(f"Processing Question {question['id']} ({question['type']})...")
+            answer_text = transcribe_answer(answer_region, question['type'])
+            requests_made += 1
+        transcriptions.append(answer_text)
+    return transcriptions, requests_made
+
+def process_exam_page(image_path, mode="batch"):
+    """Process a single exam page end-to-end
+    
+    The page is read and decoded once; answer regions are views into it.
+    `mode` is one of TRANSCRIBE_MODES: "single" sends one request per
+    question, "batch" all crops in one request, "tiled" one composite image.
+    """
     print(f"Processing image: {image_path}")
+    page = ExamPage(image_path)
     
     # Stage 1: Analyze document structure
     print("Stage 1: Analyzing document structure...")
-    document_structure = analyze_document_structure(image_path)
+    document_structure = analyze_document_structure(page)
     
     if not document_structure:
         print("Failed to analyze document structure")
         return
     
-    print(f"Found {len(document_structure['questions'])} questions")
+    questions = document_structure['questions']
+    print(f"Found {len(questions)} questions")
     
-    # Stage 2: Process each answer
-    results = []
-    for question in document_structure['questions']:
-        print(f"Processing Question {question['id']} ({question['type']})...")
-        
-        # Extract answer region
-        answer_region = extract_answer_region(image_path, question)
-        
+    # Extract answer regions (views into the decoded page, no copies)
+    answer_regions = page.answer_regions(questions)
+    for question, answer_region in zip(questions, answer_regions):
         # Save the extracted region for debugging
         debug_path = f"debug_q{question['id']}.png"
         cv2.imwrite(debug_path, answer_region)
         print(f"Saved answer region to {debug_path}")
-        
-        # Transcribe answer
-        answer_text = transcribe_answer(answer_region, question['type'])
-        print(f"Transcribed answer: {answer_text}")
-        
+    
+    # Stage 2: Transcribe the answers
+    transcriptions, requests_made = transcribe_page(answer_regions, questions, mode)
+    print(f"Transcribed {len(questions)} answers with {requests_made} request(s)")
+    
+    results = []
+    for question, answer_text in zip(questions, transcriptions):
+        print(f"Question {question['id']} transcribed answer: {answer_text}")
         results.append({
             "question_id": question['id'],
             "question_type": question['type'],
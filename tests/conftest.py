@@ -0,0 +1,12 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Neither the OCR pipeline scripts nor the backend app are installed packages
+for directory in ("ocr-pipeline", "backend"):
+    sys.path.insert(0, os.path.join(ROOT, directory))
+
+# The stub clients have no quota; don't let the real per-provider limits pace them
+for provider in ("OPENAI", "ANTHROPIC", "GEMINI"):
+    os.environ.setdefault(f"{provider}_RPM", "100000")
@@ -0,0 +1,81 @@
+import mongomock
+import pytest
+from app import create_app
+from app.models import database
+from app.services.response_cache import assignment_cache
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # A fresh in-memory database seeded with the sample assignments for every test
+    monkeypatch.setattr(database, "_client", mongomock.MongoClient())
+    assignment_cache.clear()
+    return create_app().test_client()
+
+
+def test_listing_pages_through_every_assignment(client):
+    first = client.get("/api/assignments?limit=1").get_json()
+    assert [assignment["id"] for assignment in first["assignments"]] == ["123"]
+    second = client.get(f"/api/assignments?limit=1&cursor={first['nextCursor']}").get_json()
+    assert [assignment["id"] for assignment in second["assignments"]] == ["456"]
+    assert second["nextCursor"] is None
+
+
+def test_listing_returns_only_the_requested_fields(client):
+    page = client.get("/api/assignments?fields=id,questions").get_json()
+    assert page["assignments"][0] == {"id": "123", "questions": 15}
+
+
+@pytest.mark.parametrize("query", ["fields=id,rubric", "cursor=not+base64!", "limit=many"])
+def test_listing_rejects_bad_parameters(client, query):
+    assert client.get(f"/api/assignments?{query}").status_code == 400
+
+
+@pytest.mark.parametrize("url", ["/api/assignments?limit=1", "/api/assignments/123"])
+def test_matching_etag_gets_304(client, url):
+    etag = client.get(url).headers["ETag"]
+    for if_none_match in (etag, f"W/{etag}"):
+        response = client.get(url, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+    assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_edit_changes_both_etags(client):
+    listing_etag = client.get("/api/assignments").headers["ETag"]
+    detail_etag = client.get("/api/assignments/123").headers["ETag"]
+
+    response = client.patch("/api/assignments/123", json={"title": "Midterm (revised)"})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != detail_etag
+
+    listing = client.get("/api/assignments", headers={"If-None-Match": listing_etag})
+    assert listing.status_code == 200
+    assert listing.get_json()["assignments"][0]["title"] == "Midterm (revised)"
+    detail = client.get("/api/assignments/123", headers={"If-None-Match": detail_etag})
+    assert detail.status_code == 200
+    assert detail.get_json()["title"] == "Midterm (revised)"
+
+
+def test_unknown_assignment_is_404(client):
+    assert client.get("/api/assignments/999").status_code == 404
+    assert client.patch("/api/assignments/999", json={"title": "x"}).status_code == 404
+
+
+@pytest.mark.parametrize("body", [
+    {"questions": [1, 2]},
+    {"questions": [{"text": "no id"}]},
+    {"questions": [{"id": "q1"}, {"id": "q1"}]},
+    {"questions": [{"id": "q1", "points": "2"}]},
+    {"title": 5},
+    {"totalPoints": True},
+    {"rubric": {}},
+])
+def test_malformed_edits_are_rejected_before_storing(client, body):
+    before = client.get("/api/assignments/123").get_json()
+    assert client.patch("/api/assignments/123", json=body).status_code == 400
+    assert client.get("/api/assignments/123").get_json() == before
+
+
+def test_put_requires_every_editable_field(client):
+    assert client.put("/api/assignments/123", json={"title": "Only a title"}).status_code == 400
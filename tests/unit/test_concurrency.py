@@ -0,0 +1,52 @@
+import time
+import pytest
+from concurrency import BoundedExecutor, RATE_LIMIT_RETRIES
+from grader import grade_assessment_data, GRADING_RETRIES
+from stub_clients import StubGeminiModel
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def failing_model(error):
+    def responder(call_number, prompt):
+        raise error
+    return StubGeminiModel(0, responder)
+
+
+def grade_one(model):
+    assessment = {"problems": {"1": {"problem": "Explain", "student_answer": "Because", "answer_key": "So"}}}
+    return grade_assessment_data(assessment, model=model, fast_path=False)["problems"]["1"]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+
+
+def test_persistent_rate_limit_stops_after_rate_limit_retries():
+    model = failing_model(RateLimited("rate limit exceeded"))
+    problem = grade_one(model)
+    assert model.calls == RATE_LIMIT_RETRIES + 1
+    assert problem["grade_percentage"] == 0
+
+
+def test_other_failures_use_the_grading_retries():
+    model = failing_model(TimeoutError("deadline exceeded"))
+    grade_one(model)
+    assert model.calls == GRADING_RETRIES + 1
+
+
+def test_executor_without_rate_limiter_runs_tasks_once():
+    calls = []
+
+    def task():
+        calls.append(1)
+        raise RateLimited("rate limit exceeded")
+
+    with BoundedExecutor(1) as executor:
+        future = executor.submit(task)
+        with pytest.raises(RateLimited):
+            future.result()
+    assert len(calls) == 1
@@ -0,0 +1,81 @@
+import sqlite3
+import pytest
+from PIL import Image, ImageDraw
+import pdf_to_text
+from ocr_cache import OCRCache, segment_cache_key
+
+
+def segment(text="Your Answer: B"):
+    image = Image.new("RGB", (400, 100), "white")
+    ImageDraw.Draw(image).text((10, 40), text, fill="black")
+    return image
+
+
+def test_key_depends_on_pixels_prompt_model_and_payload():
+    key = segment_cache_key(segment(), "prompt", "gpt-4o")
+    assert key == segment_cache_key(segment(), "prompt", "gpt-4o")
+    assert key != segment_cache_key(segment("Your Answer: 8"), "prompt", "gpt-4o")
+    assert key != segment_cache_key(segment(), "other prompt", "gpt-4o")
+    assert key != segment_cache_key(segment(), "prompt", "gpt-4o-mini")
+    assert key != segment_cache_key(segment(), "prompt", "gpt-4o", "gray")
+
+
+def test_key_depends_on_source_dpi_only_for_resampling_payloads():
+    assert (segment_cache_key(segment(), "prompt", "gpt-4o", "gray", 150)
+            == segment_cache_key(segment(), "prompt", "gpt-4o", "gray", 300))
+    assert (segment_cache_key(segment(), "prompt", "gpt-4o", "gray-100dpi", 150)
+            != segment_cache_key(segment(), "prompt", "gpt-4o", "gray-100dpi", 300))
+
+
+def test_cache_round_trip_and_stats(tmp_path):
+    with OCRCache(str(tmp_path / "cache.sqlite")) as cache:
+        assert cache.get("key") is None
+        cache.put("key", "text")
+        cache.put("refused", None)
+        assert cache.get("key") == "text"
+        assert cache.get("refused") is None
+        stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    with OCRCache(str(tmp_path / "cache.sqlite")) as cache:
+        assert cache.get("key") == "text"
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    with OCRCache(str(tmp_path / "cache.sqlite"), max_bytes=10) as cache:
+        cache.put("old", "aaaa")
+        cache.put("used", "bbbb")
+        cache.get("used")
+        cache.put("new", "cccc")
+        assert cache.get("old") is None
+        assert cache.get("used") == "bbbb"
+        assert cache.stats()["evictions"] == 1
+
+
+def test_context_manager_closes_the_database(tmp_path):
+    with OCRCache(str(tmp_path / "cache.sqlite")) as cache:
+        pass
+    with pytest.raises(sqlite3.ProgrammingError):
+        cache.get("key")
+
+
+def test_pdf_to_text_closes_its_cache_when_ocr_fails(tmp_path, monkeypatch):
+    opened = []
+
+    class TrackedCache(OCRCache):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.closed = False
+            opened.append(self)
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    def failing_page_count(pdf_path):
+        raise RuntimeError("pdfinfo failed")
+
+    monkeypatch.setattr(pdf_to_text, "OCRCache", TrackedCache)
+    monkeypatch.setattr(pdf_to_text, "get_page_count", failing_page_count)
+    with pytest.raises(RuntimeError, match="pdfinfo failed"):
+        pdf_to_text.pdf_to_text("missing.pdf", cache_path=str(tmp_path / "cache.sqlite"))
+    assert [cache.closed for cache in opened] == [True]
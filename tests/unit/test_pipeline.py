@@ -0,0 +1,93 @@
+import pytest
+from PIL import Image, ImageDraw
+from answer_key import load_answer_key
+from benchmark_pipeline import extraction_responder
+from pdf_to_text import encode_segment
+from pipeline import ProblemAssembler, run_pipeline
+from segment_filter import SegmentFilter
+from segmentation import segment_image
+from stub_clients import StubOpenAIClient, StubAnthropicClient, StubGeminiModel
+
+ANSWER_KEY = """Problem 1
+Answer: 1
+
+Problem 2
+Answer: 2
+
+Problem 3
+Answer: 3
+
+Problem 4
+Answer: 4
+"""
+
+
+@pytest.fixture
+def compiled_key(tmp_path):
+    key_path = tmp_path / "answer_key.txt"
+    key_path.write_text(ANSWER_KEY)
+    return load_answer_key(str(key_path))
+
+
+def released(chunks):
+    return [number for chunk in chunks for number, _ in chunk]
+
+
+def page_with_ink():
+    image = Image.new("RGB", (1000, 1300), "white")
+    draw = ImageDraw.Draw(image)
+    draw.text((50, 100), "Problem", fill="black")
+    draw.rectangle((50, 300, 600, 330), fill="black")
+    return image
+
+
+def blank_page():
+    return Image.new("RGB", (1000, 1300), "white")
+
+
+def test_assembler_releases_problems_in_page_order():
+    assembler = ProblemAssembler()
+    assert assembler.add((1, 0, 1, "Problem 3\nc")) == []
+    assert released(assembler.add((0, 0, 2, "Problem 1\na"))) == []
+    assert released(assembler.add((0, 1, 2, "Problem 2\nb"))) == ["1", "2"]
+    assert released(assembler.flush()) == ["3"]
+    assert assembler.text() == "Problem 1\na\nProblem 2\nb\n\nProblem 3\nc"
+
+
+def test_assembler_moves_past_a_page_without_segments():
+    assembler = ProblemAssembler()
+    assert released(assembler.add((0, 0, 1, "Problem 1\na\nProblem 2\nb"))) == ["1"]
+    assert released(assembler.add((2, 0, 1, "Problem 3\nc\nProblem 4\nd"))) == []
+    assert released(assembler.add((1, None, 0, None))) == ["2", "3"]
+    assert released(assembler.flush()) == ["4"]
+    assert assembler.text() == "Problem 1\na\nProblem 2\nb\n\n\n\nProblem 3\nc\nProblem 4\nd"
+
+
+def test_pipeline_grades_problems_after_a_blank_page(compiled_key):
+    pages = [page_with_ink(), blank_page(), page_with_ink().rotate(180, fillcolor="white")]
+    assert segment_image(pages[1], mode="adaptive")[0] == []
+    texts = ["Problem 1\nAnswer: 1\nProblem 2\nAnswer: 2", "Problem 3\nAnswer: 3\nProblem 4\nAnswer: 5"]
+    transcript = {encode_segment(segment_image(page, mode="adaptive")[0][0]): text
+                  for page, text in zip(pages[::2], texts)}
+
+    def ocr_responder(call_number, messages):
+        return transcript[messages[0]["content"][1]["image_url"]["url"]]
+
+    result = run_pipeline(pages, compiled_key, StubOpenAIClient(0, ocr_responder),
+                          StubAnthropicClient(0, extraction_responder), StubGeminiModel(0),
+                          segment_mode="adaptive")
+
+    assert result["metadata"]["problem_numbers"] == ["1", "2", "3", "4"]
+    assert [problem["grade_percentage"] for problem in result["problems"].values()] == [100, 100, 100, 0]
+
+
+@pytest.mark.parametrize("segment_filter", [None, SegmentFilter()])
+def test_pipeline_fails_when_ocr_fails(compiled_key, segment_filter):
+    def ocr_responder(call_number, messages):
+        raise ConnectionError("OCR unavailable")
+
+    # The second page repeats the first, so with a filter it waits on the failed request
+    with pytest.raises(RuntimeError, match="ocr stage failed"):
+        run_pipeline([page_with_ink(), page_with_ink()], compiled_key, StubOpenAIClient(0, ocr_responder),
+                     StubAnthropicClient(0, extraction_responder), StubGeminiModel(0), segment_mode="adaptive",
+                     segment_filter=segment_filter)
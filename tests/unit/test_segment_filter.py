@@ -0,0 +1,33 @@
+from PIL import Image, ImageDraw
+from segment_filter import SegmentFilter, BLANK, DUPLICATE
+
+
+def render_answer(answer, size=(1100, 400)):
+    """A synthetic answer segment: a question line and the student's answer."""
+    segment = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(segment)
+    draw.text((40, 60), "Question 3. Which option describes the decision boundary?", fill="black")
+    draw.text((40, 200), f"Your Answer: {answer}", fill="black")
+    return segment
+
+
+def test_answers_differing_in_one_character_are_not_deduplicated():
+    segment_filter = SegmentFilter()
+    for answer in ("B", "A", "8", "B."):
+        status, key = segment_filter.check(render_answer(answer))
+        assert status is None, f"'Your Answer: {answer}' was treated as {status}"
+        segment_filter.remember(key, answer)
+    assert segment_filter.stats()["duplicates"] == 0
+
+
+def test_identical_segment_reuses_the_earlier_result():
+    segment_filter = SegmentFilter()
+    status, key = segment_filter.check(render_answer("B"))
+    segment_filter.remember(key, "Your Answer: B")
+    assert segment_filter.check(render_answer("B")) == (DUPLICATE, "Your Answer: B")
+
+
+def test_blank_segment_is_skipped():
+    segment_filter = SegmentFilter()
+    assert segment_filter.check(Image.new("RGB", (1100, 400), "white")) == (BLANK, None)
+    assert segment_filter.stats() == {"blank": 1, "duplicates": 0, "skipped": 1}
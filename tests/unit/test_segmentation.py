@@ -0,0 +1,54 @@
+import glob
+import numpy as np
+import pytest
+from PIL import Image
+from benchmark_segmentation import segment_image_reference, EXAMPLES_GLOB
+from segmentation import (segment_image, row_std_profile, stitched_rows, MAX_PIXELS, MIN_HEIGHT, TARGET_HEIGHT,
+                          SMOOTHING_WINDOW, GAP_ROWS)
+
+PAGES = sorted(glob.glob(EXAMPLES_GLOB))
+
+
+@pytest.fixture(scope="module", params=PAGES, ids=lambda path: path.rsplit("/", 1)[-1])
+def page(request):
+    return Image.open(request.param).convert("RGB")
+
+
+def test_example_pages_exist():
+    assert PAGES
+
+
+def test_row_std_profile_matches_numpy(page):
+    img_array = np.array(page.convert("L"))
+    kernel = np.ones(SMOOTHING_WINDOW) / SMOOTHING_WINDOW
+    expected = np.convolve(img_array.std(axis=1), kernel, mode="same")
+    np.testing.assert_allclose(row_std_profile(img_array), expected, atol=1e-9)
+
+
+def test_greedy_cuts_match_the_reference_loop(page):
+    for scale in (1.0, 2.0):
+        image = page.resize((int(page.width * scale), int(page.height * scale)))
+        assert segment_image(image, mode="greedy")[1] == segment_image_reference(image)[1]
+
+
+def test_dp_cuts_cover_the_page_within_bounds(page):
+    _, segments = segment_image(page, mode="dp")
+    assert segments[0][0] == 0 and segments[-1][1] == page.height
+    assert all(end == next_start for (_, end), (next_start, _) in zip(segments, segments[1:]))
+    assert all(MIN_HEIGHT <= end - start <= 2 * TARGET_HEIGHT for start, end in segments[:-1])
+
+
+def test_adaptive_segments_fit_the_pixel_budget(page):
+    images, segments = segment_image(page, mode="adaptive")
+    assert images and len(images) == len(segments)
+    assert all(image.width * image.height <= MAX_PIXELS for image in images)
+    assert all(start < end for start, end in segments)
+
+
+def test_adaptive_drops_blank_pages():
+    assert segment_image(Image.new("RGB", (1000, 1300), "white"), mode="adaptive") == ([], [])
+
+
+def test_stitched_rows_counts_the_gaps():
+    assert stitched_rows([(0, 10)]) == 10
+    assert stitched_rows([(0, 10), (50, 60)]) == 20 + GAP_ROWS